@@ -0,0 +1,233 @@
+"""
+Response cache for read-heavy GET endpoints.
+
+Responses are cached as encoded JSON bodies under a key built from the request path, the
+query string and the current version of every table the endpoint reads ("tags"). Write
+endpoints call `invalidate(...)` with the tables they touched, which bumps those versions so
+stale entries are never served again and simply age out. Every cached response carries an
+ETag, and a matching If-None-Match header is answered with 304 Not Modified.
+
+Configuration (environment):
+- API_CACHE_BACKEND: "memory" (default), "file" or "none"
+- API_CACHE_TTL: Seconds an entry stays valid (default 60)
+- API_CACHE_MAX_ENTRIES: Entries kept before least-recently-used ones are evicted (default 512)
+- API_CACHE_DIR: Directory for the file backend, which can be shared by several workers
+
+Tables written outside the API (e.g. by the ETL) are not invalidated; the TTL bounds how
+long such changes take to show up.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import Request, Response
+
+import serialization
+
+
+class CacheEntry(NamedTuple):
+    expires_at: float
+    etag: str
+    body: bytes
+
+
+class NullBackend:
+    """Backend that stores nothing; responses still get ETags."""
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        return None
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        pass
+
+    def tag_version(self, tag: str) -> int:
+        return 0
+
+    def bump(self, tag: str) -> None:
+        pass
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._versions: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def tag_version(self, tag: str) -> int:
+        with self._lock:
+            return self._versions.get(tag, 0)
+
+    def bump(self, tag: str) -> None:
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+
+class FileBackend:
+    """
+    Store entries and tag versions as files in a directory, so several API worker
+    processes on one host share cached responses and invalidations.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 512):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(os.path.join(directory, "tags"), exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def _write(self, path: str, data: bytes) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(key), "rb") as f:
+                expires_at, etag, body = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at < time.time():
+            return None
+        os.utime(self._path(key))
+        return CacheEntry(expires_at, etag, body)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self._write(self._path(key), pickle.dumps(tuple(entry)))
+        files = [e for e in os.scandir(self.directory) if e.is_file()]
+        if len(files) > self.max_entries:
+            files.sort(key=lambda e: e.stat().st_mtime)
+            for stale in files[:len(files) - self.max_entries]:
+                try:
+                    os.remove(stale.path)
+                except OSError:
+                    pass
+
+    def tag_version(self, tag: str) -> int:
+        try:
+            with open(os.path.join(self.directory, "tags", tag)) as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump(self, tag: str) -> None:
+        self._write(os.path.join(self.directory, "tags", tag), str(self.tag_version(tag) + 1).encode())
+
+
+class ResponseCache:
+    """
+    Cache of encoded JSON responses keyed on request and table versions.
+
+    Parameters:
+    - backend: Storage backend (NullBackend, MemoryBackend or FileBackend)
+    - ttl: Seconds an entry stays valid
+    """
+
+    def __init__(self, backend, ttl: float = 60):
+        self.backend = backend
+        self.ttl = ttl
+        # File entries are shared between processes, whose monotonic clocks differ
+        self._clock = time.time if isinstance(backend, FileBackend) else time.monotonic
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """Build the cache configured by the API_CACHE_* environment variables."""
+        kind = os.getenv("API_CACHE_BACKEND", "memory")
+        max_entries = int(os.getenv("API_CACHE_MAX_ENTRIES", "512"))
+        if kind == "none":
+            backend = NullBackend()
+        elif kind == "file":
+            directory = os.getenv("API_CACHE_DIR", os.path.join(tempfile.gettempdir(), "api_cache"))
+            backend = FileBackend(directory, max_entries=max_entries)
+        elif kind == "memory":
+            backend = MemoryBackend(max_entries=max_entries)
+        else:
+            raise ValueError(f"Unknown API_CACHE_BACKEND {kind!r}")
+        return cls(backend, ttl=float(os.getenv("API_CACHE_TTL", "60")))
+
+    def key_for(self, request: Request, tags: Iterable[str]) -> str:
+        """Cache key for a request, including the current version of each tag."""
+        versions = ",".join(f"{tag}:{self.backend.tag_version(tag)}" for tag in sorted(tags))
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        return f"{request.url.path}?{query}|{versions}"
+
+    def lookup(self, request: Request, tags: Iterable[str]) -> Tuple[str, Optional[Response]]:
+        """
+        Return the cache key and, on a hit, the response to send (200 or 304).
+        """
+        key = self.key_for(request, tags)
+        entry = self.backend.get(key)
+        if entry is None:
+            return key, None
+        return key, self._response(request, entry)
+
+    def store(self, request: Request, key: str, payload: Any) -> Response:
+        """Encode a payload, cache it under `key` and return the response to send."""
+        body = serialization.dumps(payload)
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        entry = CacheEntry(self._clock() + self.ttl, etag, body)
+        self.backend.set(key, entry)
+        return self._response(request, entry)
+
+    def respond(self, request: Request, tags: Iterable[str], build: Callable[[], Any]) -> Response:
+        """Serve a cached response, or call `build` for the payload and cache it."""
+        tags = tuple(tags)
+        key, response = self.lookup(request, tags)
+        if response is not None:
+            return response
+        return self.store(request, key, build())
+
+    async def respond_async(
+            self, request: Request, tags: Iterable[str], build: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """Like `respond`, for async endpoints whose `build` is a coroutine function."""
+        tags = tuple(tags)
+        key, response = self.lookup(request, tags)
+        if response is not None:
+            return response
+        return self.store(request, key, await build())
+
+    def invalidate(self, *tags: str) -> None:
+        """Invalidate every cached response that depends on any of the given tables."""
+        for tag in tags:
+            self.backend.bump(tag)
+
+    @staticmethod
+    def _response(request: Request, entry: CacheEntry) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match", "")
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if entry.etag in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+        return serialization.encoded_response(request, entry.body, headers)
+
+
+response_cache = ResponseCache.from_env()
@@ -1,8 +1,11 @@
 # crud_base.py
 
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import models
 import schemas
@@ -14,6 +17,15 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def dialect_insert(db: Session, model: Type[ModelType]):
+    """
+    Return an INSERT construct for the session's dialect that supports ON CONFLICT.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     CRUD object with default Create, Read, Update, Delete (CRUD) operations.
@@ -84,6 +96,37 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             db.commit()
         return obj
 
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Async read counterpart of CRUDBase for use with an AsyncSession; writes go through CRUDBase.
+
+    Parameters:
+    - model: A SQLAlchemy model class.
+    """
+
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+
+    async def get_multi(
+            self, db: AsyncSession, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        """
+        Get multiple records with pagination.
+        """
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars())
+
+    async def get_multi_columns(
+            self, db: AsyncSession, names: List[str], skip: int = 0, limit: Optional[int] = 100
+    ) -> List[tuple]:
+        """
+        Get multiple records as plain tuples of the named columns, without building ORM objects.
+        """
+        table = self.model.__table__
+        result = await db.execute(select(*[table.c[name] for name in names]).offset(skip).limit(limit))
+        return [tuple(row) for row in result]
+
 # 🚀 Fact Transactions
 crud_fact_transaction = CRUDBase[
     models.FactTransaction,
@@ -108,15 +151,59 @@ crud_dim_menu_daytime = CRUDBase[
 ](models.DimMenuDaytime)
 
 
+# 🚀 Rankings published by the DS jobs
+class CRUDRanking(CRUDBase[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    CRUD object for a precomputed ranking that the DS jobs republish as a whole.
+    """
+
+    def replace_all(self, db: Session, objs_in: List[CreateSchemaType]) -> int:
+        """
+        Replace every stored row with the given ranking in one transaction.
+
+        Readers keep seeing the previous ranking until the transaction commits.
+        """
+        try:
+            db.execute(delete(self.model))
+            if objs_in:
+                db.execute(insert(self.model), [obj.model_dump() for obj in objs_in])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(objs_in)
+
+
 # 🚀 Menu Recommendations
-crud_menu_recommendation = CRUDBase[
+crud_menu_recommendation = CRUDRanking[
     models.MenuRecommendation,
     schemas.MenuRecommendationCreate,
     schemas.MenuRecommendationUpdate,
 ](models.MenuRecommendation)
 
 
+# 🚀 Menu Item Pairs
+crud_menu_item_pair = CRUDRanking[
+    models.MenuItemPair,
+    schemas.MenuItemPairCreate,
+    schemas.MenuItemPairUpdate,
+](models.MenuItemPair)
+
+
 # 🚀 Dim Users
+def known_mobile_ids(db: Session, mobile_ids: set) -> set:
+    """
+    Return the given mobile_ids that exist in dim_users.
+    """
+    if not mobile_ids:
+        return set()
+    return set(
+        db.execute(
+            select(models.DimUser.mobile_id).where(models.DimUser.mobile_id.in_(mobile_ids))
+        ).scalars()
+    )
+
+
 crud_dim_user = CRUDBase[
     models.DimUser,
     schemas.DimUserCreate,
@@ -125,11 +212,118 @@ crud_dim_user = CRUDBase[
 
 
 # 🚀 RFM Segments
-crud_rfm_segment = CRUDBase[
-    models.RfmSegment,
-    schemas.RfmSegmentCreate,
-    schemas.RfmSegmentUpdate,
-](models.RfmSegment)
+class CRUDRfmSegment(CRUDBase[models.RfmSegment, schemas.RfmSegmentCreate, schemas.RfmSegmentUpdate]):
+    """
+    CRUD object for RFM segments with a single-transaction bulk upsert.
+    """
+
+    UPSERT_KEY = ("mobile_id", "date_created")
+
+    def bulk_upsert(
+            self, db: Session, rows: List[Tuple[int, Dict[str, Any]]]
+    ) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Insert or update many rows keyed on (mobile_id, date_created) in one transaction.
+
+        Parameters:
+        - rows: (index, values) pairs, where index is the row's position in the request
+
+        Returns:
+        - The number of rows written and (index, reason) pairs for rows that were skipped
+        """
+        errors = []
+        known = known_mobile_ids(db, {values["mobile_id"] for _, values in rows})
+
+        # One statement may not touch the same key twice, so the last occurrence wins
+        latest: Dict[Tuple[Any, ...], Tuple[int, Dict[str, Any]]] = {}
+        for index, values in rows:
+            if values["mobile_id"] not in known:
+                errors.append((index, f"unknown mobile_id {values['mobile_id']!r}"))
+                continue
+            key = tuple(values[column] for column in self.UPSERT_KEY)
+            if key in latest:
+                errors.append((latest[key][0], f"superseded by row {index} with the same key"))
+            latest[key] = (index, values)
+
+        records = [values for _, values in latest.values()]
+        if records:
+            stmt = dialect_insert(db, self.model)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(self.UPSERT_KEY),
+                set_={
+                    column: stmt.excluded[column]
+                    for column in records[0]
+                    if column not in self.UPSERT_KEY
+                },
+            )
+            try:
+                db.execute(stmt, records)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+        return len(records), sorted(errors)
+
+
+crud_rfm_segment = CRUDRfmSegment(models.RfmSegment)
+
+
+# 🚀 User Menu Recommendations
+class CRUDUserMenuRecommendation(
+    CRUDBase[models.UserMenuRecommendation, schemas.UserRecommendationBulkItem, schemas.UserRecommendationBulkItem]
+):
+    """
+    CRUD object for personalized recommendations, replaced one customer's list at a time.
+    """
+
+    def bulk_replace(
+            self, db: Session, rows: List[Tuple[int, schemas.UserRecommendationBulkItem]]
+    ) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Replace the ranked lists of many customers in one transaction.
+
+        Parameters:
+        - rows: (index, item) pairs, where index is the row's position in the request
+
+        Returns:
+        - The number of customers written and (index, reason) pairs for rows that were skipped
+        """
+        errors = []
+        known = known_mobile_ids(db, {item.mobile_id for _, item in rows})
+
+        # A customer listed twice keeps the last list
+        latest: Dict[str, Tuple[int, schemas.UserRecommendationBulkItem]] = {}
+        for index, item in rows:
+            if item.mobile_id not in known:
+                errors.append((index, f"unknown mobile_id {item.mobile_id!r}"))
+                continue
+            if len(item.menu_item_ids) != len(item.scores):
+                errors.append((index, "menu_item_ids and scores differ in length"))
+                continue
+            if item.mobile_id in latest:
+                errors.append((latest[item.mobile_id][0], f"superseded by row {index} with the same mobile_id"))
+            latest[item.mobile_id] = (index, item)
+
+        records = [
+            {"mobile_id": item.mobile_id, "rank": rank, "menu_item_id": menu_item_id, "score": score}
+            for _, item in latest.values()
+            for rank, (menu_item_id, score) in enumerate(zip(item.menu_item_ids, item.scores), start=1)
+        ]
+        if latest:
+            try:
+                db.execute(delete(self.model).where(self.model.mobile_id.in_(list(latest))))
+                if records:
+                    db.execute(insert(self.model), records)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+        return len(latest), sorted(errors)
+
+
+crud_user_menu_recommendation = CRUDUserMenuRecommendation(models.UserMenuRecommendation)
 
 
 # 🚀 Marketing Campaigns
@@ -169,4 +363,119 @@ crud_dim_menu_item = CRUDBase[
     models.DimMenuItem,
     schemas.DimMenuItemCreate,
     schemas.DimMenuItemUpdate,
-](models.DimMenuItem)
\ No newline at end of file
+](models.DimMenuItem)
+
+
+class AsyncCRUDMenuItemPair(
+    AsyncCRUDBase[models.MenuItemPair, schemas.MenuItemPairCreate, schemas.MenuItemPairUpdate]
+):
+    """
+    Async CRUD object for menu item pairs with a companion lookup per item.
+    """
+
+    async def get_companions(self, db: AsyncSession, item_id: int, limit: Optional[int] = None) -> List[dict]:
+        """
+        Get the ranked companions of one item with their menu details, as plain dicts.
+
+        Reads one range of the (item_id, rank) index and joins the companion's dimension row.
+        """
+        pair, item = self.model, models.DimMenuItem
+        query = (
+            select(
+                pair.companion_item_id, item.menu_item_name, item.category, item.price,
+                pair.rank, pair.pair_count, pair.confidence, pair.lift,
+            )
+            .outerjoin(item, item.item_id == pair.companion_item_id)
+            .where(pair.item_id == item_id)
+            .order_by(pair.rank)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+
+class AsyncCRUDUserMenuRecommendation(
+    AsyncCRUDBase[
+        models.UserMenuRecommendation, schemas.UserRecommendationBulkItem, schemas.UserRecommendationBulkItem
+    ]
+):
+    """
+    Async CRUD object for personalized recommendations with a lookup per customer.
+    """
+
+    async def get_for_user(self, db: AsyncSession, mobile_id: str, limit: Optional[int] = None) -> List[dict]:
+        """
+        Get one customer's ranked items with their menu details, as plain dicts.
+
+        Reads one range of the (mobile_id, rank) primary key and joins the item's dimension row.
+        """
+        rec, item = self.model, models.DimMenuItem
+        query = (
+            select(rec.menu_item_id, item.menu_item_name, item.category, item.price, rec.rank, rec.score)
+            .outerjoin(item, item.item_id == rec.menu_item_id)
+            .where(rec.mobile_id == mobile_id)
+            .order_by(rec.rank)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+
+# ⚡ Async CRUD objects used by the read endpoints
+async_crud_fact_transaction = AsyncCRUDBase[
+    models.FactTransaction,
+    schemas.FactTransactionCreate,
+    schemas.FactTransactionUpdate,
+](models.FactTransaction)
+async_crud_fact_transaction_item = AsyncCRUDBase[
+    models.FactTransactionItem,
+    schemas.FactTransactionItemCreate,
+    schemas.FactTransactionItemUpdate,
+](models.FactTransactionItem)
+async_crud_dim_menu_daytime = AsyncCRUDBase[
+    models.DimMenuDaytime,
+    schemas.DimMenuDaytimeCreate,
+    schemas.DimMenuDaytimeUpdate,
+](models.DimMenuDaytime)
+async_crud_menu_recommendation = AsyncCRUDBase[
+    models.MenuRecommendation,
+    schemas.MenuRecommendationCreate,
+    schemas.MenuRecommendationUpdate,
+](models.MenuRecommendation)
+async_crud_menu_item_pair = AsyncCRUDMenuItemPair(models.MenuItemPair)
+async_crud_user_menu_recommendation = AsyncCRUDUserMenuRecommendation(models.UserMenuRecommendation)
+async_crud_dim_user = AsyncCRUDBase[
+    models.DimUser,
+    schemas.DimUserCreate,
+    schemas.DimUserUpdate,
+](models.DimUser)
+async_crud_rfm_segment = AsyncCRUDBase[
+    models.RfmSegment,
+    schemas.RfmSegmentCreate,
+    schemas.RfmSegmentUpdate,
+](models.RfmSegment)
+async_crud_marketing_campaign = AsyncCRUDBase[
+    models.MarketingCampaign,
+    schemas.MarketingCampaignCreate,
+    schemas.MarketingCampaignUpdate,
+](models.MarketingCampaign)
+async_crud_dim_time = AsyncCRUDBase[
+    models.DimTime,
+    schemas.DimTimeCreate,
+    schemas.DimTimeUpdate,
+](models.DimTime)
+async_crud_dim_table = AsyncCRUDBase[
+    models.DimTable,
+    schemas.DimTableCreate,
+    schemas.DimTableUpdate,
+](models.DimTable)
+async_crud_nfc_engagement = AsyncCRUDBase[
+    models.NfcEngagement,
+    schemas.NfcEngagementCreate,
+    schemas.NfcEngagementUpdate,
+](models.NfcEngagement)
+async_crud_dim_menu_item = AsyncCRUDBase[
+    models.DimMenuItem,
+    schemas.DimMenuItemCreate,
+    schemas.DimMenuItemUpdate,
+](models.DimMenuItem)
@@ -0,0 +1,153 @@
+"""
+Dashboard aggregates computed in SQL.
+
+Each function returns exactly the rows one dashboard widget needs for a calendar month,
+so the frontend transfers small result sets instead of whole fact tables. Sales figures
+are read from the rollup tables the ETL maintains and the API catches up at startup
+(sales_daily_table, sales_daily_item, sales_monthly; see rollups.py), so their cost does not
+grow with fact_transactions.
+"""
+
+from datetime import date, datetime
+from typing import List, Tuple
+
+from sqlalchemy import extract, func, select
+from sqlalchemy.orm import Session
+
+import models
+import schemas
+
+nfc = models.NfcEngagement
+daily_table = models.SalesDailyTable
+daily_item = models.SalesDailyItem
+monthly = models.SalesMonthly
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def _in_month(column, year: int, month: int, as_datetime: bool = False):
+    start, end = _month_range(year, month)
+    if as_datetime:
+        start, end = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.min.time())
+    return column >= start, column < end
+
+
+def overview_totals(db: Session) -> Tuple[float, int, int]:
+    """Total sales, transactions and items sold over all months."""
+    total_sales, transactions, items_sold = db.execute(
+        select(func.sum(monthly.total_sales), func.sum(monthly.transactions), func.sum(monthly.items_sold))
+    ).one()
+    return total_sales or 0, transactions or 0, items_sold or 0
+
+
+def sales_trend(db: Session) -> List[schemas.SalesTrendItem]:
+    """Total sales per day over all available dates."""
+    rows = db.execute(
+        select(daily_table.date, func.sum(daily_table.total_sales))
+        .group_by(daily_table.date)
+        .order_by(daily_table.date)
+    ).all()
+    return [schemas.SalesTrendItem(date=day, total_sales=sales) for day, sales in rows]
+
+
+def available_months(db: Session) -> List[schemas.MonthlySalesItem]:
+    """Total sales and transaction count for every month that has transactions."""
+    rows = db.execute(
+        select(monthly.year, monthly.month, monthly.total_sales, monthly.transactions)
+        .where(monthly.transactions > 0)
+        .order_by(monthly.year, monthly.month)
+    ).all()
+    return [
+        schemas.MonthlySalesItem(year=y, month=m, total_sales=sales, transactions=count)
+        for y, m, sales, count in rows
+    ]
+
+
+def month_kpis(db: Session, year: int, month: int) -> schemas.MonthKpis:
+    """Total sales, transaction count and average check for a month."""
+    row = db.execute(
+        select(monthly.total_sales, monthly.transactions)
+        .where(monthly.year == year, monthly.month == month)
+    ).one_or_none()
+    total_sales, transactions = row or (0, 0)
+    return schemas.MonthKpis(
+        total_sales=total_sales,
+        transactions=transactions,
+        avg_check=total_sales / transactions if transactions else 0,
+    )
+
+
+def month_items(db: Session, year: int, month: int, limit: int = 100) -> List[schemas.MenuItemPerformance]:
+    """Quantity sold, sales and average price per menu item for a month, best sellers first."""
+    total_sales = func.sum(daily_item.total_sales).label("total_sales")
+    rows = db.execute(
+        select(
+            daily_item.item_id,
+            models.DimMenuItem.menu_item_name,
+            func.sum(daily_item.quantity),
+            total_sales,
+            func.sum(daily_item.price_sum) / func.sum(daily_item.line_count),
+        )
+        .join(models.DimMenuItem, models.DimMenuItem.item_id == daily_item.item_id, isouter=True)
+        .where(*_in_month(daily_item.date, year, month))
+        .group_by(daily_item.item_id, models.DimMenuItem.menu_item_name)
+        .order_by(total_sales.desc())
+        .limit(limit)
+    ).all()
+    return [
+        schemas.MenuItemPerformance(
+            item_id=item_id, menu_item_name=name, quantity=quantity, total_sales=sales, avg_price=avg_price
+        )
+        for item_id, name, quantity, sales, avg_price in rows
+    ]
+
+
+def month_daily_sales(db: Session, year: int, month: int) -> List[schemas.SalesTrendItem]:
+    """Total sales per day of a month."""
+    rows = db.execute(
+        select(daily_table.date, func.sum(daily_table.total_sales))
+        .where(*_in_month(daily_table.date, year, month))
+        .group_by(daily_table.date)
+        .order_by(daily_table.date)
+    ).all()
+    return [schemas.SalesTrendItem(date=day, total_sales=sales) for day, sales in rows]
+
+
+def month_table_usage(db: Session, year: int, month: int) -> List[schemas.TableUsageItem]:
+    """Number of transactions per table for a month."""
+    rows = db.execute(
+        select(daily_table.table_id, func.sum(daily_table.transactions))
+        .where(*_in_month(daily_table.date, year, month))
+        .group_by(daily_table.table_id)
+        .order_by(daily_table.table_id)
+    ).all()
+    return [schemas.TableUsageItem(table_id=table_id, count=count) for table_id, count in rows]
+
+
+def month_nfc_hourly(db: Session, year: int, month: int) -> List[schemas.HourlyEngagementItem]:
+    """Number of NFC engagements per hour of day for a month."""
+    hour = extract("hour", nfc.engagement_time).label("hour")
+    rows = db.execute(
+        select(hour, func.count(nfc.engagement_id))
+        .where(*_in_month(nfc.engagement_time, year, month, as_datetime=True))
+        .group_by(hour)
+        .order_by(hour)
+    ).all()
+    return [schemas.HourlyEngagementItem(hour=h, count=count) for h, count in rows]
+
+
+def month_dashboard(db: Session, year: int, month: int, top_n: int = 100) -> schemas.DashboardMonth:
+    """All month-level dashboard aggregates in one response."""
+    return schemas.DashboardMonth(
+        year=year,
+        month=month,
+        kpis=month_kpis(db, year, month),
+        items=month_items(db, year, month, limit=top_n),
+        daily_sales=month_daily_sales(db, year, month),
+        table_usage=month_table_usage(db, year, month),
+        nfc_hourly=month_nfc_hourly(db, year, month),
+    )
@@ -1,10 +1,20 @@
 """
 Database Configuration.
 
-Sets up the SQLAlchemy engine, base class, and session factory for database operations.
+Sets up the SQLAlchemy engines, base class, and session factories for database operations.
+Both a synchronous engine and an AsyncEngine (asyncpg, or aiosqlite for SQLite) are built
+from DATABASE_URL and share the pool settings below.
+
+Pool configuration (environment):
+- DB_POOL_SIZE: Connections kept open per engine (default 5)
+- DB_MAX_OVERFLOW: Extra connections allowed under load (default 10)
+- DB_POOL_PRE_PING: Test connections before use, "true" or "false" (default true)
+- DB_ECHO: Log every SQL statement, "true" or "false" (default false; see metrics.py for
+  per-route SQL counts and a slow-query log)
 """
 
 import sqlalchemy as sql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 import sqlalchemy.orm as orm
 from dotenv import load_dotenv
@@ -22,6 +32,41 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Provide an async database session.
+    Yields:
+        AsyncSession: A SQLAlchemy async database session.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read a true/false environment variable."""
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+def async_url(url: str) -> str:
+    """Swap a database URL's driver for its asyncio counterpart (asyncpg / aiosqlite)."""
+    backend, rest = url.split("://", 1)
+    dialect = backend.split("+", 1)[0]
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+def engine_options(url: str) -> dict:
+    """Engine keyword arguments from the DB_* environment variables."""
+    options = {"echo": env_flag("DB_ECHO", False)}
+    # SQLite uses a single-file pool that takes no sizing arguments
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            pool_pre_ping=env_flag("DB_POOL_PRE_PING", True),
+        )
+    return options
+
 load_dotenv('.env')
 
 
@@ -30,11 +75,15 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in .env")
 
-engine = sql.create_engine(DATABASE_URL, echo=True)
+engine = sql.create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+async_engine = create_async_engine(async_url(DATABASE_URL), **engine_options(DATABASE_URL))
 
 
 Base = declarative_base()
 
 SessionLocal = orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# expire_on_commit=False so objects stay readable after commit without implicit async IO
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
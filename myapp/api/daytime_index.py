@@ -0,0 +1,37 @@
+"""
+Minute-of-day index over menu daytime slots.
+
+Maps each of the 1440 minutes in a day to the daytime_id covering it, so resolving the
+slot for a timestamp is a single list lookup instead of a scan over dim_menu_daytimes.
+"""
+
+from datetime import time
+from typing import Iterable, List, Optional
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_of_day(at: time) -> int:
+    """Return the minute of the day (0-1439) for a time of day."""
+    return at.hour * 60 + at.minute
+
+
+def build_minute_index(daytimes: Iterable) -> List[Optional[int]]:
+    """
+    Build a 1440-entry list mapping each minute of the day to a daytime_id.
+
+    Parameters:
+    - daytimes: Objects with daytime_id, start_time and end_time (e.g. DimMenuDaytime rows)
+
+    A slot covers start_time to end_time inclusive and may wrap past midnight. Minutes
+    outside every slot map to None; where slots overlap the earlier one wins.
+    """
+    index: List[Optional[int]] = [None] * MINUTES_PER_DAY
+    for slot in reversed(list(daytimes)):
+        first, last = minute_of_day(slot.start_time), minute_of_day(slot.end_time)
+        minutes = range(first, last + 1) if first <= last else [
+            *range(first, MINUTES_PER_DAY), *range(0, last + 1)
+        ]
+        for minute in minutes:
+            index[minute] = slot.daytime_id
+    return index
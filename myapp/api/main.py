@@ -1,140 +1,617 @@
-from database import get_db, engine
+from database import SessionLocal, async_engine, get_async_db, get_db, engine
 import schemas
 import crud
 import models
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from sqlalchemy import func
-from datetime import datetime
+from typing import Any, List, Literal, Optional
+from contextlib import asynccontextmanager
+from sqlalchemy import func, select
+from datetime import datetime, time, timezone
+import json
+import cache
+import dashboard
+import daytime_index
+import metrics
+import migrations
+import recommendation_index
+import rfm
+import rollups
+import serialization
+import streaming
 
-# Create DB tables
+# Create DB tables, then bring tables created by older versions up to date
 models.Base.metadata.create_all(bind=engine)
-app = FastAPI()
+migrations.upgrade(engine)
+# Roll up fact rows no ETL load has (loaded before the rollups existed, or by a failed load)
+with SessionLocal() as _db:
+    if rollups.refresh_rollups(_db):
+        cache.response_cache.invalidate("sales_rollups")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close pooled async connections so workers shut down cleanly
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+response_cache = cache.response_cache
+
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine, "sync")
+    metrics.instrument_engine(async_engine.sync_engine, "async")
+
+# Tables each cached endpoint family reads; writes below invalidate by the same names
+MENU_RECS_TAGS = ("menu_recommendations",)
+MENU_PAIRS_TAGS = ("menu_item_pairs", "dim_menu_items")
+RFM_TAGS = ("rfm_segments",)
+CAMPAIGN_TAGS = ("marketing_campaigns",)
+MONTH_TAGS = ("sales_rollups", "nfc_engagements", "dim_menu_items")
+
+# ========== Helpers ==========
+
+async def read_bulk_records(request: Request) -> List[Any]:
+    """
+    Read a bulk request body sent either as a JSON array or as NDJSON (one object per line).
+
+    NDJSON lines that are not valid JSON are kept as raw strings so they fail validation
+    and are reported with their index instead of rejecting the whole request.
+    """
+    body = await request.body()
+    if "ndjson" in request.headers.get("content-type", ""):
+        records = []
+        for line in body.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                records.append(line)
+        return records
+
+    try:
+        records = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Body is not valid JSON")
+    if not isinstance(records, list):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Body must be a JSON array")
+    return records
+
+
+def export_response(request: Request, columns, key, filters, after_id, batch_size, format) -> StreamingResponse:
+    """
+    Build a streaming NDJSON or Arrow response over a keyset-ordered table scan,
+    compressed on the fast path when the client accepts it.
+    """
+    if format == "arrow" and not streaming.arrow_available():
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="Arrow export requires pyarrow")
+    batches = streaming.iter_keyset_batches(columns, key, filters, after=after_id, batch_size=batch_size)
+    if format == "arrow":
+        body, media_type = streaming.encode_arrow(columns, batches), streaming.ARROW_MEDIA_TYPE
+    else:
+        body, media_type = streaming.encode_ndjson(columns, batches), streaming.NDJSON_MEDIA_TYPE
+    encoding = serialization.negotiate_encoding(request)
+    headers = {"Vary": "Accept-Encoding"} if serialization.FAST_JSON else {}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(serialization.compress_stream(body, encoding), media_type=media_type, headers=headers)
+
+
+async def list_out(schema, crud_obj, db: AsyncSession, **kwargs) -> list:
+    """
+    Load rows with an async CRUD object for `schema`, in a form that can be cached.
+
+    On the fast path (API_FAST_JSON) only the schema's columns are selected, as plain dicts;
+    otherwise ORM rows are validated into `schema` instances.
+    """
+    if serialization.FAST_JSON:
+        names = list(schema.model_fields)
+        return serialization.records(names, await crud_obj.get_multi_columns(db, names, **kwargs))
+    return [schema.model_validate(row) for row in await crud_obj.get_multi(db, **kwargs)]
+
+
+async def list_response(request: Request, schema, crud_obj, db: AsyncSession, **kwargs):
+    """
+    Respond to an uncached list endpoint. The fast path encodes column rows directly;
+    otherwise ORM rows are returned for FastAPI to validate against the response_model.
+    """
+    if serialization.FAST_JSON:
+        return serialization.json_response(request, await list_out(schema, crud_obj, db, **kwargs))
+    return await crud_obj.get_multi(db, **kwargs)
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into a short one-line message."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+    )
 
 # ========== Tables ==========
 
 # ----------------- Transactions -----------------
 @app.get("/api/transactions/", response_model=List[schemas.FactTransactionOut])
-def get_transactions(db: Session = Depends(get_db)):
-    """Retrieve all transactions from the database."""
-    return crud.crud_fact_transaction.get_multi(db)
+async def get_transactions(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retrieve a page of transactions; use /api/transactions/export for full reads."""
+    return await list_response(
+        request, schemas.FactTransactionOut, crud.async_crud_fact_transaction, db, skip=skip, limit=limit
+    )
+
+@app.get("/api/transactions/export")
+def export_transactions(
+    request: Request,
+    format: Literal["ndjson", "arrow"] = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    batch_size: int = Query(5000, ge=1, le=100000),
+):
+    """
+    Stream all transactions ordered by transaction_id as NDJSON or an Arrow IPC stream.
+
+    Filters on created_at with since (inclusive) and until (exclusive); pass the last
+    transaction_id received as after_id to resume an interrupted export.
+    """
+    table = models.FactTransaction
+    filters = []
+    if since is not None:
+        filters.append(table.created_at >= since)
+    if until is not None:
+        filters.append(table.created_at < until)
+    columns = [
+        table.transaction_id, table.mobile_id, table.table_id,
+        table.time_id, table.total_amount, table.created_at,
+    ]
+    return export_response(request, columns, table.transaction_id, filters, after_id, batch_size, format)
 
 # ----------------- Fact Transaction Items -----------------
 @app.get("/api/fact_transaction_items/", response_model=List[schemas.FactTransactionItemOut])
-def get_transaction_items(db: Session = Depends(get_db)):
-    """Retrieve all transaction items from the database."""
-    return crud.crud_fact_transaction_item.get_multi(db)
+async def get_transaction_items(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retrieve a page of transaction items; use /api/fact_transaction_items/export for full reads."""
+    return await list_response(
+        request, schemas.FactTransactionItemOut, crud.async_crud_fact_transaction_item, db, skip=skip, limit=limit
+    )
+
+@app.get("/api/fact_transaction_items/export")
+def export_transaction_items(
+    request: Request,
+    format: Literal["ndjson", "arrow"] = "ndjson",
+    after_id: Optional[int] = None,
+    batch_size: int = Query(5000, ge=1, le=100000),
+):
+    """Stream all transaction items ordered by id as NDJSON or an Arrow IPC stream."""
+    table = models.FactTransactionItem
+    columns = [table.id, table.transaction_id, table.item_id, table.quantity, table.price]
+    return export_response(request, columns, table.id, [], after_id, batch_size, format)
 
 # ----------------- Dim Menu Daytimes -----------------
 @app.get("/api/dim_menu_daytimes/", response_model=List[schemas.DimMenuDaytimeOut])
-def get_menu_daytimes(db: Session = Depends(get_db)):
+async def get_menu_daytimes(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Retrieve all menu daytime periods (e.g., breakfast, lunch)."""
-    return crud.crud_dim_menu_daytime.get_multi(db)
+    return await list_response(
+        request, schemas.DimMenuDaytimeOut, crud.async_crud_dim_menu_daytime, db
+    )
+
+@app.get("/api/dim_menu_daytimes/minute_index", response_model=schemas.DaytimeMinuteIndex)
+async def get_menu_daytime_minute_index(db: AsyncSession = Depends(get_async_db)):
+    """Get the 1440-entry minute-of-day → daytime_id lookup built from the daytime periods."""
+    result = await db.execute(select(models.DimMenuDaytime).order_by(models.DimMenuDaytime.daytime_id))
+    daytimes = result.scalars().all()
+    return schemas.DaytimeMinuteIndex(minutes=daytime_index.build_minute_index(daytimes))
 
 # ----------------- Menu Recommendations -----------------
 @app.get("/api/menu_recommendations/", response_model=List[schemas.MenuRecommendationOut])
-def get_menu_recommendations(db: Session = Depends(get_db)):
+async def get_menu_recommendations(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get all stored menu recommendations."""
-    return crud.crud_menu_recommendation.get_multi(db)
+    return await response_cache.respond_async(request, MENU_RECS_TAGS, lambda: list_out(
+        schemas.MenuRecommendationOut, crud.async_crud_menu_recommendation, db
+    ))
 
 @app.post("/api/menu_recommendations/", response_model=schemas.MenuRecommendationOut)
 def create_menu_recommendation(
     obj_in: schemas.MenuRecommendationCreate, db: Session = Depends(get_db)
 ):
     """Create a new menu recommendation entry."""
-    return crud.crud_menu_recommendation.create(db, obj_in=obj_in)
+    created = crud.crud_menu_recommendation.create(db, obj_in=obj_in)
+    response_cache.invalidate(*MENU_RECS_TAGS)
+    recommendation_index.recommendation_index.invalidate()
+    return created
+
+@app.put("/api/menu_recommendations/", response_model=schemas.MenuRecommendationPublishResult)
+def publish_menu_recommendations(
+    obj_in: schemas.MenuRecommendationPublish, db: Session = Depends(get_db)
+):
+    """
+    Atomically replace all menu recommendations with the ranking for every daytime slot.
+    """
+    seen = set()
+    for rec in obj_in.recommendations:
+        if (rec.daytime_id, rec.rank) in seen:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Duplicate rank {rec.rank} for daytime_id {rec.daytime_id}",
+            )
+        seen.add((rec.daytime_id, rec.rank))
+
+    published = crud.crud_menu_recommendation.replace_all(db, obj_in.recommendations)
+    response_cache.invalidate(*MENU_RECS_TAGS)
+    recommendation_index.recommendation_index.invalidate()
+    return schemas.MenuRecommendationPublishResult(
+        published=published,
+        daytime_ids=sorted({daytime_id for daytime_id, _ in seen}),
+    )
+
+# ----------------- Menu Item Pairs -----------------
+@app.put("/api/menu_item_pairs/", response_model=schemas.MenuItemPairPublishResult)
+def publish_menu_item_pairs(
+    obj_in: schemas.MenuItemPairPublish, db: Session = Depends(get_db)
+):
+    """
+    Atomically replace all menu item pairs with the top companions of every item.
+    """
+    seen = set()
+    for pair in obj_in.pairs:
+        if pair.companion_item_id == pair.item_id:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Item {pair.item_id} cannot be its own companion",
+            )
+        if (pair.item_id, pair.rank) in seen:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Duplicate rank {pair.rank} for item_id {pair.item_id}",
+            )
+        seen.add((pair.item_id, pair.rank))
+
+    published = crud.crud_menu_item_pair.replace_all(db, obj_in.pairs)
+    response_cache.invalidate(*MENU_PAIRS_TAGS)
+    return schemas.MenuItemPairPublishResult(
+        published=published,
+        item_ids=sorted({item_id for item_id, _ in seen}),
+    )
+
+# ----------------- User Menu Recommendations -----------------
+@app.post("/api/user_recommendations/bulk", response_model=schemas.BulkWriteResult)
+def bulk_replace_user_recommendations(
+    records: List[Any] = Depends(read_bulk_records), db: Session = Depends(get_db)
+):
+    """
+    Replace the personalized lists of many customers in a single transaction.
+
+    Accepts a JSON array or NDJSON stream of UserRecommendationBulkItem rows, one per customer;
+    each replaces every stored item of that customer, so retrying a chunk is safe.
+    """
+    rows, errors = [], []
+    for index, raw in enumerate(records):
+        try:
+            rows.append((index, schemas.UserRecommendationBulkItem.model_validate(raw)))
+        except ValidationError as exc:
+            errors.append((index, format_validation_error(exc)))
+
+    written, skipped = crud.crud_user_menu_recommendation.bulk_replace(db, rows)
+    return schemas.BulkWriteResult(
+        received=len(records),
+        written=written,
+        errors=[schemas.BulkRowError(index=i, detail=d) for i, d in sorted(errors + skipped)],
+    )
 
 # ----------------- Users -----------------
 @app.get("/api/users/", response_model=List[schemas.DimUserOut])
-def get_users(db: Session = Depends(get_db)):
+async def get_users(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Retrieve all users from the database."""
-    return crud.crud_dim_user.get_multi(db)
+    return await list_response(request, schemas.DimUserOut, crud.async_crud_dim_user, db)
+
+@app.get("/api/users/export")
+def export_users(
+    request: Request,
+    format: Literal["ndjson", "arrow"] = "ndjson",
+    after_mobile_id: Optional[str] = None,
+    batch_size: int = Query(5000, ge=1, le=100000),
+):
+    """
+    Stream all users ordered by mobile_id as NDJSON or an Arrow IPC stream.
+
+    Pass the last mobile_id received as after_mobile_id to resume an interrupted export.
+    """
+    table = models.DimUser
+    columns = [table.mobile_id, table.notes]
+    return export_response(request, columns, table.mobile_id, [], after_mobile_id, batch_size, format)
 
 # ----------------- RFM Segments -----------------
 @app.get("/api/rfm_segments/", response_model=List[schemas.RfmSegmentOut])
-def get_rfm_segments(db: Session = Depends(get_db)):
+async def get_rfm_segments(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Retrieve all RFM segmentation data."""
-    return crud.crud_rfm_segment.get_multi(db)
+    return await response_cache.respond_async(request, RFM_TAGS, lambda: list_out(
+        schemas.RfmSegmentOut, crud.async_crud_rfm_segment, db
+    ))
 
 @app.post("/api/rfm_segments/", response_model=schemas.RfmSegmentOut)
 def create_rfm_segment(
     obj_in: schemas.RfmSegmentCreate, db: Session = Depends(get_db)
 ):
     """Create a new RFM segment entry."""
-    return crud.crud_rfm_segment.create(db, obj_in=obj_in)
+    created = crud.crud_rfm_segment.create(db, obj_in=obj_in)
+    response_cache.invalidate(*RFM_TAGS)
+    return created
+
+@app.post("/api/rfm_segments/bulk", response_model=schemas.BulkWriteResult)
+def bulk_upsert_rfm_segments(
+    records: List[Any] = Depends(read_bulk_records), db: Session = Depends(get_db)
+):
+    """
+    Upsert many RFM segment rows in a single transaction.
+
+    Accepts a JSON array or NDJSON stream of RfmSegmentCreate rows; rows are keyed on
+    (mobile_id, date_created) and rows without date_created share one batch timestamp.
+    """
+    batch_ts = datetime.now(timezone.utc)
+    rows, errors = [], []
+    for index, raw in enumerate(records):
+        try:
+            item = schemas.RfmSegmentBulkItem.model_validate(raw)
+        except ValidationError as exc:
+            errors.append((index, format_validation_error(exc)))
+            continue
+        values = item.model_dump()
+        values["date_created"] = values["date_created"] or batch_ts
+        rows.append((index, values))
+
+    written, skipped = crud.crud_rfm_segment.bulk_upsert(db, rows)
+    if written:
+        response_cache.invalidate(*RFM_TAGS)
+    return schemas.BulkWriteResult(
+        received=len(records),
+        written=written,
+        errors=[schemas.BulkRowError(index=i, detail=d) for i, d in sorted(errors + skipped)],
+    )
+
+@app.post("/api/rfm_segments/recompute", response_model=schemas.RfmRecomputeResult)
+def recompute_rfm_segments(as_of: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """
+    Recompute RFM segments for all customers inside the database.
+
+    Recency is measured against as_of (default: start of the current UTC day).
+    """
+    written, date_created = rfm.recompute_rfm_segments(db, as_of=as_of)
+    response_cache.invalidate(*RFM_TAGS)
+    return schemas.RfmRecomputeResult(written=written, date_created=date_created)
+
+@app.post("/api/rfm_segments/refresh", response_model=schemas.RfmRefreshResult)
+def refresh_rfm_segments(as_of: Optional[datetime] = None, db: Session = Depends(get_db)):
+    """
+    Fold transactions added since the last refresh into the RFM segments.
+
+    Only customers whose score or segment changed get a new rfm_segments row.
+    """
+    result = rfm.refresh_rfm_segments(db, as_of=as_of)
+    if result["written"]:
+        response_cache.invalidate(*RFM_TAGS)
+    return schemas.RfmRefreshResult(**result)
 
 # ----------------- Dashboard: Overview -----------------
 @app.get("/api/dashboard/overview", response_model=schemas.DashboardOverview)
-def dashboard_overview(db: Session = Depends(get_db)):
+async def dashboard_overview(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get key dashboard metrics like sales, users, transactions, items sold."""
-    total_sales = db.query(models.FactTransaction).with_entities(func.sum(models.FactTransaction.total_amount)).scalar() or 0
-    total_transactions = db.query(models.FactTransaction).count()
-    total_users = db.query(models.DimUser).count()
-    total_items_sold = db.query(models.FactTransactionItem).with_entities(func.sum(models.FactTransactionItem.quantity)).scalar() or 0
+    def build(db: Session):
+        total_sales, total_transactions, total_items_sold = dashboard.overview_totals(db)
+        total_users = db.query(models.DimUser).count()
 
-    return schemas.DashboardOverview(
-        total_sales=total_sales,
-        total_transactions=total_transactions,
-        total_users=total_users,
-        total_items_sold=total_items_sold,
-        last_updated=datetime.utcnow()
-    )
+        return schemas.DashboardOverview(
+            total_sales=total_sales,
+            total_transactions=total_transactions,
+            total_users=total_users,
+            total_items_sold=total_items_sold,
+            last_updated=datetime.utcnow()
+        )
+
+    return await response_cache.respond_async(request, ("sales_rollups", "dim_users"), lambda: db.run_sync(build))
 
 # ----------------- Dashboard: Sales Trend -----------------
 @app.get("/api/dashboard/sales_trend", response_model=schemas.SalesTrendResponse)
-def sales_trend(db: Session = Depends(get_db)):
+async def sales_trend(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Return daily sales trend for all available dates."""
-    sales_data = (
-        db.query(models.DimTime.date, func.sum(models.FactTransaction.total_amount).label("total_sales"))
-        .join(models.FactTransaction, models.DimTime.time_id == models.FactTransaction.time_id)
-        .group_by(models.DimTime.date)
-        .all()
-    )
-    trend = [schemas.SalesTrendItem(date=row[0], total_sales=row[1]) for row in sales_data]
-    return schemas.SalesTrendResponse(trend=trend)
+    async def build():
+        return schemas.SalesTrendResponse(trend=await db.run_sync(dashboard.sales_trend))
+
+    return await response_cache.respond_async(request, ("sales_rollups",), build)
 
 # ----------------- Dashboard: NFC Engagement -----------------
 @app.get("/api/dashboard/nfc_engagement", response_model=schemas.NfcEngagementDashboardResponse)
-def nfc_engagement_dashboard(db: Session = Depends(get_db)):
+async def nfc_engagement_dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get engagement counts per NFC tag type for dashboard view."""
-    data = (
-        db.query(models.NfcEngagement.tag_type, func.count(models.NfcEngagement.engagement_id))
-        .group_by(models.NfcEngagement.tag_type)
-        .all()
+    def build(db: Session):
+        data = (
+            db.query(models.NfcEngagement.tag_type, func.count(models.NfcEngagement.engagement_id))
+            .group_by(models.NfcEngagement.tag_type)
+            .all()
+        )
+        stats = [
+            schemas.NfcEngagementStats(tag_type=row[0], total_engagements=row[1]) for row in data
+        ]
+        return schemas.NfcEngagementDashboardResponse(
+            stats=stats,
+            last_updated=datetime.utcnow()
+        )
+
+    return await response_cache.respond_async(request, ("nfc_engagements",), lambda: db.run_sync(build))
+
+# ----------------- Dashboard: Monthly -----------------
+MonthPath = Path(..., ge=1, le=12)
+# Months up to December 9998 still have a following month within date's range
+YearPath = Path(..., ge=1, le=9998)
+
+@app.get("/api/dashboard/months", response_model=List[schemas.MonthlySalesItem])
+async def dashboard_months(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """List months that have transactions, with their total sales."""
+    return await response_cache.respond_async(
+        request, ("sales_rollups",), lambda: db.run_sync(dashboard.available_months)
     )
-    stats = [
-        schemas.NfcEngagementStats(tag_type=row[0], total_engagements=row[1]) for row in data
-    ]
-    return schemas.NfcEngagementDashboardResponse(
-        stats=stats,
-        last_updated=datetime.utcnow()
+
+@app.get("/api/dashboard/month/{year}/{month}", response_model=schemas.DashboardMonth)
+async def dashboard_month(
+    request: Request,
+    year: int = YearPath,
+    month: int = MonthPath,
+    top_n: int = Query(100, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get every monthly dashboard aggregate (KPIs, items, daily sales, tables, NFC) in one call."""
+    return await response_cache.respond_async(
+        request, MONTH_TAGS, lambda: db.run_sync(dashboard.month_dashboard, year, month, top_n=top_n)
+    )
+
+@app.get("/api/dashboard/month/{year}/{month}/kpis", response_model=schemas.MonthKpis)
+async def dashboard_month_kpis(
+    request: Request, year: int = YearPath, month: int = MonthPath, db: AsyncSession = Depends(get_async_db)
+):
+    """Get total sales, transaction count and average check for a month."""
+    return await response_cache.respond_async(
+        request, ("sales_rollups",), lambda: db.run_sync(dashboard.month_kpis, year, month)
+    )
+
+@app.get("/api/dashboard/month/{year}/{month}/items", response_model=List[schemas.MenuItemPerformance])
+async def dashboard_month_items(
+    request: Request,
+    year: int = YearPath,
+    month: int = MonthPath,
+    top_n: int = Query(10, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get the top-N menu items of a month by sales."""
+    return await response_cache.respond_async(
+        request,
+        ("sales_rollups", "dim_menu_items"),
+        lambda: db.run_sync(dashboard.month_items, year, month, limit=top_n),
+    )
+
+@app.get("/api/dashboard/month/{year}/{month}/daily_sales", response_model=List[schemas.SalesTrendItem])
+async def dashboard_month_daily_sales(
+    request: Request, year: int = YearPath, month: int = MonthPath, db: AsyncSession = Depends(get_async_db)
+):
+    """Get total sales per day of a month."""
+    return await response_cache.respond_async(
+        request, ("sales_rollups",), lambda: db.run_sync(dashboard.month_daily_sales, year, month)
+    )
+
+@app.get("/api/dashboard/month/{year}/{month}/tables", response_model=List[schemas.TableUsageItem])
+async def dashboard_month_tables(
+    request: Request, year: int = YearPath, month: int = MonthPath, db: AsyncSession = Depends(get_async_db)
+):
+    """Get transaction counts per table for a month."""
+    return await response_cache.respond_async(
+        request, ("sales_rollups",), lambda: db.run_sync(dashboard.month_table_usage, year, month)
+    )
+
+@app.get("/api/dashboard/month/{year}/{month}/nfc_hourly", response_model=List[schemas.HourlyEngagementItem])
+async def dashboard_month_nfc_hourly(
+    request: Request, year: int = YearPath, month: int = MonthPath, db: AsyncSession = Depends(get_async_db)
+):
+    """Get NFC engagement counts per hour of day for a month."""
+    return await response_cache.respond_async(
+        request, ("nfc_engagements",), lambda: db.run_sync(dashboard.month_nfc_hourly, year, month)
     )
 
 # ----------------- Segments: RFM -----------------
 @app.get("/api/segments/rfm", response_model=List[schemas.RfmSegmentOut])
-def get_rfm_segments_list(db: Session = Depends(get_db)):
+async def get_rfm_segments_list(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Alternative RFM segment endpoint (duplicate)."""
-    return crud.crud_rfm_segment.get_multi(db)
+    return await response_cache.respond_async(request, RFM_TAGS, lambda: list_out(
+        schemas.RfmSegmentOut, crud.async_crud_rfm_segment, db
+    ))
 
 # ----------------- Campaigns -----------------
 @app.get("/api/campaigns/", response_model=List[schemas.MarketingCampaignOut])
-def get_campaigns(db: Session = Depends(get_db)):
+async def get_campaigns(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Retrieve all marketing campaigns."""
-    return crud.crud_marketing_campaign.get_multi(db)
+    return await response_cache.respond_async(request, CAMPAIGN_TAGS, lambda: list_out(
+        schemas.MarketingCampaignOut, crud.async_crud_marketing_campaign, db
+    ))
 
 @app.post("/api/campaigns/", response_model=schemas.MarketingCampaignOut)
 def create_campaign(
     obj_in: schemas.MarketingCampaignCreate, db: Session = Depends(get_db)
 ):
     """Create a new marketing campaign entry."""
-    return crud.crud_marketing_campaign.create(db, obj_in=obj_in)
+    created = crud.crud_marketing_campaign.create(db, obj_in=obj_in)
+    response_cache.invalidate(*CAMPAIGN_TAGS)
+    return created
 
 # ----------------- Recommendations: Menu -----------------
 @app.get("/api/recommendations/menu", response_model=List[schemas.MenuRecommendationOut])
-def get_menu_recommendations_alt(db: Session = Depends(get_db)):
+async def get_menu_recommendations_alt(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get menu recommendations based on time of day."""
-    return crud.crud_menu_recommendation.get_multi(db)
+    return await response_cache.respond_async(request, MENU_RECS_TAGS, lambda: list_out(
+        schemas.MenuRecommendationOut, crud.async_crud_menu_recommendation, db
+    ))
+
+@app.get("/api/recommendations/now", response_model=schemas.NowRecommendations)
+async def get_recommendations_now(
+    request: Request,
+    at: Optional[time] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the ranked menu items of the daytime slot covering a time of day, given as HH:MM
+    (default: the server's current local time).
+
+    Served from the in-memory recommendation index without a database query, except for
+    the first request after a publish, which reloads the index.
+    """
+    body = await recommendation_index.recommendation_index.lookup(db, at or datetime.now().time())
+    return serialization.encoded_response(request, body)
+
+# ----------------- Recommendations: Pairs -----------------
+@app.get("/api/recommendations/pairs/{item_id}", response_model=List[schemas.MenuItemCompanionOut])
+async def get_item_pairs(
+    request: Request,
+    item_id: int,
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the items most often bought together with an item, strongest first.
+
+    Returns at most `limit` companions (default: all stored), or an empty list for an item
+    without any.
+    """
+    return await response_cache.respond_async(
+        request,
+        MENU_PAIRS_TAGS,
+        lambda: crud.async_crud_menu_item_pair.get_companions(db, item_id, limit=limit),
+    )
+
+# ----------------- Recommendations: Per Customer -----------------
+@app.get("/api/recommendations/users/{mobile_id}", response_model=List[schemas.UserMenuRecommendationOut])
+async def get_user_recommendations(
+    request: Request,
+    mobile_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get a customer's personalized menu items, best first.
+
+    Not cached: each customer's list is a single primary-key range read. Returns an empty
+    list for customers without one, e.g. those who have not bought anything yet.
+    """
+    rows = await crud.async_crud_user_menu_recommendation.get_for_user(db, mobile_id, limit=limit)
+    if serialization.FAST_JSON:
+        return serialization.json_response(request, rows)
+    return rows
 
 # ----------------- Auth: Login -----------------
 @app.post("/api/auth/login", response_model=schemas.TokenResponse)
@@ -149,21 +626,57 @@ def login(obj_in: schemas.LoginRequest):
 
 # ----------------- Dimensions -----------------
 @app.get("/api/dim_menu_items/", response_model=list[schemas.DimMenuItemOut])
-def get_dim_menu_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_dim_menu_items(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get menu items from dimension table."""
-    return crud.crud_dim_menu_item.get_multi(db, skip=skip, limit=limit)
+    return await list_response(
+        request, schemas.DimMenuItemOut, crud.async_crud_dim_menu_item, db, skip=skip, limit=limit
+    )
 
 @app.get("/api/dim_tables/", response_model=list[schemas.DimTableOut])
-def get_dim_tables(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_dim_tables(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get tables from dimension table."""
-    return crud.crud_dim_table.get_multi(db, skip=skip, limit=limit)
+    return await list_response(
+        request, schemas.DimTableOut, crud.async_crud_dim_table, db, skip=skip, limit=limit
+    )
 
 @app.get("/api/dim_time/", response_model=list[schemas.DimTimeOut])
-def get_dim_time(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_dim_time(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get time entries from time dimension."""
-    return crud.crud_dim_time.get_multi(db, skip=skip, limit=limit)
+    return await list_response(
+        request, schemas.DimTimeOut, crud.async_crud_dim_time, db, skip=skip, limit=limit
+    )
 
 @app.get("/api/nfc_engagements/", response_model=list[schemas.NfcEngagementOut])
-def get_nfc_engagements(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_nfc_engagements(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+):
     """Get all NFC engagement records."""
-    return crud.crud_nfc_engagement.get_multi(db, skip=skip, limit=limit)
+    return await list_response(
+        request, schemas.NfcEngagementOut, crud.async_crud_nfc_engagement, db, skip=skip, limit=limit
+    )
+
+# ========== Metrics ==========
+
+if metrics.ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def get_metrics():
+        """Request, SQL and connection-pool metrics in Prometheus text format."""
+        return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
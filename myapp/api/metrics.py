@@ -0,0 +1,316 @@
+"""
+Request and database metrics, exposed in Prometheus text format at /metrics.
+
+`MetricsMiddleware` times every request by method, route template and status. SQLAlchemy
+engine events count the statements each request runs and the time spent in them, and a
+timer around each engine's pool checkout records how long requests wait for a connection.
+Pool sizes and connections in use are read when /metrics is scraped. Statements slower than
+API_SLOW_QUERY_MS are logged with their parameters and, for SELECTs, their EXPLAIN plan.
+
+Metrics live in process memory, so every API process exposes its own.
+
+Configuration (environment):
+- API_METRICS: Record metrics and serve /metrics, "true" or "false" (default true)
+- API_SLOW_QUERY_MS: Log statements slower than this many milliseconds, 0 to turn off (default 500)
+- API_SLOW_QUERY_EXPLAIN: Add the EXPLAIN plan to slow SELECTs, "true" or "false" (default true)
+"""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database import env_flag
+
+ENABLED = env_flag("API_METRICS", True)
+SLOW_QUERY_SECONDS = float(os.getenv("API_SLOW_QUERY_MS", "500")) / 1000
+SLOW_QUERY_EXPLAIN = env_flag("API_SLOW_QUERY_EXPLAIN", True)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Route label for requests that matched no route, so unknown paths do not each get a series
+UNMATCHED_ROUTE = "<unmatched>"
+# Longest statement or parameter text written to the slow-query log
+LOG_TEXT_LIMIT = 2000
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [_number(bound) for bound in self.buckets] + ["+Inf"]
+        with self._lock:
+            for labels, series in sorted(self._values.items()):
+                for bound, count in zip(bounds, series):
+                    le = 'le="' + bound + '"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {series[-2]}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose values are read by a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...],
+                 read: Callable[[], Iterable[Tuple[Tuple[str, ...], float]]]):
+        self.name, self.help, self.labelnames, self.read = name, help, labelnames, read
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.read():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+# Engines by label, for the pool gauges
+_engines: Dict[str, Engine] = {}
+
+
+def _pool_values(read_pool: Callable[[Any], float]) -> Callable[[], List[Tuple[Tuple[str, ...], float]]]:
+    def read():
+        values = []
+        for name, engine in _engines.items():
+            try:
+                values.append(((name,), read_pool(engine.pool)))
+            except AttributeError:
+                # Only queue pools report sizes; SQLite's static/singleton pools do not
+                pass
+        return values
+    return read
+
+
+REQUESTS = Histogram(
+    "api_request_duration_seconds", "Time to serve a request, including streaming the body.",
+    ("method", "route", "status"),
+)
+REQUEST_STATEMENTS = Histogram(
+    "api_request_db_statements", "SQL statements executed per request.", ("route",), STATEMENT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "api_request_db_seconds", "Time spent executing SQL per request.", ("route",),
+)
+STATEMENTS = Counter("api_db_statements_total", "SQL statements executed.", ("engine",))
+STATEMENT_SECONDS = Counter("api_db_statement_seconds_total", "Time spent executing SQL.", ("engine",))
+SLOW_QUERIES = Counter("api_db_slow_queries_total", "Statements slower than API_SLOW_QUERY_MS.", ("engine",))
+POOL_WAIT = Histogram(
+    "api_db_pool_checkout_seconds", "Time to check a connection out of the pool, including connecting.",
+    ("engine",),
+)
+METRICS = [
+    REQUESTS, REQUEST_STATEMENTS, REQUEST_DB_SECONDS, STATEMENTS, STATEMENT_SECONDS, SLOW_QUERIES, POOL_WAIT,
+    Gauge("api_db_pool_connections_in_use", "Connections checked out of the pool.", ("engine",),
+          _pool_values(lambda pool: pool.checkedout())),
+    Gauge("api_db_pool_connections_idle", "Connections open and idle in the pool.", ("engine",),
+          _pool_values(lambda pool: pool.checkedin())),
+    Gauge("api_db_pool_size", "Configured pool size.", ("engine",), _pool_values(lambda pool: pool.size())),
+    # QueuePool.overflow() counts unopened pool slots as negative overflow
+    Gauge("api_db_pool_overflow", "Connections open beyond the pool size.", ("engine",),
+          _pool_values(lambda pool: max(pool.overflow(), 0))),
+]
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+class RequestStats:
+    """SQL work done while serving one request."""
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Stats of the request being served; copied into threadpool calls and async DB greenlets
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and SQL work per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            # The router stores the matched route in the scope; its path is the template
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            REQUESTS.observe(time.perf_counter() - started, (scope["method"], route, str(status)))
+            REQUEST_STATEMENTS.observe(stats.statements, (route,))
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, (route,))
+
+
+def _clip(text: str) -> str:
+    return text if len(text) <= LOG_TEXT_LIMIT else text[:LOG_TEXT_LIMIT] + "…"
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    """
+    EXPLAIN a statement on the connection that ran it, with the same parameters.
+    On PostgreSQL a savepoint keeps a failing EXPLAIN from aborting the caller's transaction.
+    """
+    postgresql = conn.dialect.name == "postgresql"
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    # A raw DBAPI cursor, so the EXPLAIN fires no engine events of its own
+    cursor = conn.connection.cursor()
+    try:
+        if postgresql:
+            cursor.execute("SAVEPOINT explain_slow_query")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+        except Exception:
+            if postgresql:
+                cursor.execute("ROLLBACK TO SAVEPOINT explain_slow_query")
+            raise
+        if postgresql:
+            cursor.execute("RELEASE SAVEPOINT explain_slow_query")
+        return plan
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(conn, engine_name: str, statement: str, parameters, elapsed: float, executemany: bool) -> None:
+    SLOW_QUERIES.inc((engine_name,))
+    plan = None
+    if SLOW_QUERY_EXPLAIN and not executemany and statement.lstrip()[:6].upper() in ("SELECT", "WITH"):
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as exc:
+            plan = f"(EXPLAIN failed: {exc})"
+    message = f"Slow query ({elapsed * 1000:.0f} ms, {engine_name} engine): {_clip(statement.strip())}"
+    message += f"\nParameters: {_clip(repr(parameters))}"
+    if plan:
+        message += f"\nPlan:\n{plan}"
+    logger.warning(message)
+
+
+def _time_checkouts(pool, engine_name: str) -> None:
+    """
+    Time connection checkouts from `pool`. The pool's class is swapped for a subclass,
+    rather than the method patched on the instance, so pools recreated by dispose() keep it.
+    """
+    base = type(pool)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return base._do_get(self)
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started, (engine_name,))
+
+    pool.__class__ = type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    Record statements, SQL time, slow queries and pool checkouts of a (sync) engine under
+    the label `name`. For an AsyncEngine pass its `sync_engine`.
+    """
+    _engines[name] = engine
+    _time_checkouts(engine.pool, name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        started = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        STATEMENTS.inc((name,))
+        STATEMENT_SECONDS.inc((name,), elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+        if 0 < SLOW_QUERY_SECONDS <= elapsed:
+            _log_slow_query(conn, name, statement, parameters, elapsed, executemany)
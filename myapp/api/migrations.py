@@ -0,0 +1,234 @@
+"""
+Versioned schema migrations.
+
+`create_all` only creates missing tables, so changes to tables that already exist (new
+indexes, partitioning) are applied here in version order, once per database. Applied
+versions are recorded in schema_migrations; on PostgreSQL an advisory lock keeps several
+API workers starting at once from applying the same migration twice.
+
+Configuration (environment):
+- DB_PARTITION_FACTS: Turn fact_transactions and nfc_engagements into monthly range-partitioned
+  tables on PostgreSQL, "true" or "false" (default false)
+- DB_PARTITION_MONTHS_AHEAD: Months after the current one that always have a partition (default 3)
+
+Partitioned tables get a composite primary key (id plus timestamp) and the foreign key from
+fact_transaction_items to fact_transactions is dropped, since PostgreSQL cannot reference a
+partitioned table by the id alone. Rows outside every monthly partition land in a
+`<table>_default` partition.
+
+Usage:
+- python migrations.py                           Apply pending migrations
+- python migrations.py detach <table> <YYYY-MM>  Detach one month's partition into its own table
+"""
+
+import os
+import sys
+from datetime import date
+from typing import Callable, List, NamedTuple
+
+from loguru import logger
+from sqlalchemy import insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import AddConstraint
+
+from database import engine, env_flag
+import models
+
+PARTITION_FACTS = env_flag("DB_PARTITION_FACTS", False)
+PARTITION_MONTHS_AHEAD = int(os.getenv("DB_PARTITION_MONTHS_AHEAD", "3"))
+# Range-partitioned tables and their partition key
+PARTITIONED_TABLES = {
+    "fact_transactions": "created_at",
+    "nfc_engagements": "engagement_time",
+}
+# Arbitrary constant identifying the migration lock
+LOCK_ID = 72_016
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # Migrations that are not enabled are skipped without being recorded, so they run once enabled
+    enabled: Callable[[Connection], bool] = lambda conn: True
+
+
+def _create_indexes(conn: Connection, *model_classes) -> None:
+    """Create every index declared on the given models that does not exist yet."""
+    for model in model_classes:
+        for index in model.__table__.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+def _add_months(start: date, months: int) -> date:
+    month = start.month - 1 + months
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table: str, year: int, month: int) -> str:
+    """Name of the partition holding `table` rows for one month."""
+    return f"{table}_{year:04d}_{month:02d}"
+
+
+def _is_partitioned(conn: Connection, table: str) -> bool:
+    return conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table},
+    ).scalar()
+
+
+def _create_month_partition(conn: Connection, parent: str, table: str, start: date) -> None:
+    """Create the partition of `parent` for the month starting at `start` (named after `table`)."""
+    end = _add_months(start, 1)
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, start.year, start.month)}" '
+        f"PARTITION OF \"{parent}\" FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def _partition_table(conn: Connection, model, key: str) -> None:
+    """
+    Rebuild a table as a monthly range-partitioned table on `key`, keeping its rows,
+    serial sequence, indexes and foreign keys to unpartitioned tables.
+    """
+    table = model.__table__
+    name, staging = table.name, f"{table.name}_partitioned"
+    primary_key = [column.name for column in table.primary_key.columns]
+    first = conn.execute(text(f'SELECT MIN("{key}") FROM "{name}"')).scalar()
+    this_month = date.today().replace(day=1)
+    start = min(first.date().replace(day=1), this_month) if first else this_month
+
+    conn.execute(text(f'CREATE TABLE "{staging}" (LIKE "{name}" INCLUDING DEFAULTS) PARTITION BY RANGE ("{key}")'))
+    # A partitioned table's primary key must contain the partition key
+    columns = ", ".join(f'"{column}"' for column in primary_key + [key])
+    conn.execute(text(f'ALTER TABLE "{staging}" ADD CONSTRAINT "{name}_pkey_new" PRIMARY KEY ({columns})'))
+    conn.execute(text(f'CREATE TABLE "{name}_default" PARTITION OF "{staging}" DEFAULT'))
+    month = start
+    while month <= _add_months(this_month, PARTITION_MONTHS_AHEAD):
+        _create_month_partition(conn, staging, name, month)
+        month = _add_months(month, 1)
+    conn.execute(text(f'INSERT INTO "{staging}" SELECT * FROM "{name}"'))
+
+    # Hand the id sequence to the new table before the old one (its owner) is dropped
+    for column in primary_key:
+        sequence = conn.execute(
+            text("SELECT pg_get_serial_sequence(:table, :column)"), {"table": name, "column": column}
+        ).scalar()
+        if sequence:
+            conn.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{staging}"."{column}"'))
+    conn.execute(text(f'DROP TABLE "{name}" CASCADE'))
+    conn.execute(text(f'ALTER TABLE "{staging}" RENAME TO "{name}"'))
+    conn.execute(text(f'ALTER TABLE "{name}" RENAME CONSTRAINT "{name}_pkey_new" TO "{name}_pkey"'))
+
+    # Indexes on the parent are created on every partition
+    _create_indexes(conn, model)
+    for constraint in table.foreign_key_constraints:
+        if constraint.referred_table.name not in PARTITIONED_TABLES:
+            conn.execute(AddConstraint(constraint))
+    logger.info(f"Partitioned {name} by month on {key} from {start:%Y-%m}")
+
+
+def _partition_facts(conn: Connection) -> None:
+    for model in (models.FactTransaction, models.NfcEngagement):
+        if not _is_partitioned(conn, model.__tablename__):
+            _partition_table(conn, model, PARTITIONED_TABLES[model.__tablename__])
+
+
+def _partitioning_enabled(conn: Connection) -> bool:
+    return PARTITION_FACTS and conn.dialect.name == "postgresql"
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "rfm_segments bulk upsert key",
+              lambda conn: _create_indexes(conn, models.RfmSegment)),
+    Migration(2, "foreign-key and time indexes on fact tables",
+              lambda conn: _create_indexes(
+                  conn, models.FactTransaction, models.FactTransactionItem, models.NfcEngagement)),
+    Migration(3, "monthly range partitions for fact_transactions and nfc_engagements",
+              _partition_facts, _partitioning_enabled),
+]
+
+
+def _lock(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": LOCK_ID})
+
+
+def ensure_partitions(conn: Connection) -> None:
+    """
+    Create monthly partitions up to DB_PARTITION_MONTHS_AHEAD months ahead.
+
+    A month whose rows already sit in the default partition is skipped with a warning,
+    since PostgreSQL refuses to create a partition that would take rows from it.
+    """
+    this_month = date.today().replace(day=1)
+    for table, key in PARTITIONED_TABLES.items():
+        if not _is_partitioned(conn, table):
+            continue
+        for offset in range(PARTITION_MONTHS_AHEAD + 1):
+            start = _add_months(this_month, offset)
+            name = partition_name(table, start.year, start.month)
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+                continue
+            stranded = conn.execute(
+                text(f'SELECT EXISTS (SELECT 1 FROM "{table}_default" WHERE "{key}" >= :start AND "{key}" < :end)'),
+                {"start": start, "end": _add_months(start, 1)},
+            ).scalar()
+            if stranded:
+                logger.warning(f"Not creating {name}: {table}_default already holds rows for that month")
+                continue
+            _create_month_partition(conn, table, table, start)
+            logger.info(f"Created partition {name}")
+
+
+def detach_partition(bind: Engine, table: str, year: int, month: int) -> str:
+    """
+    Detach one month's partition from a partitioned table.
+
+    The rows stay in a standalone table (returned by name) that can be archived or dropped
+    without touching the rest of the data.
+    """
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"{table} is not a partitioned table")
+    name = partition_name(table, year, month)
+    with bind.begin() as conn:
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+    logger.info(f"Detached {name} from {table}")
+    return name
+
+
+def upgrade(bind: Engine) -> List[int]:
+    """
+    Apply pending migrations in version order, each in its own transaction.
+
+    Returns:
+    - Versions applied by this call
+    """
+    applied_now = []
+    for migration in MIGRATIONS:
+        with bind.begin() as conn:
+            _lock(conn)
+            applied = set(conn.execute(select(models.SchemaMigration.version)).scalars())
+            if migration.version in applied or not migration.enabled(conn):
+                continue
+            migration.apply(conn)
+            conn.execute(insert(models.SchemaMigration).values(version=migration.version, name=migration.name))
+        logger.info(f"Applied migration {migration.version}: {migration.name}")
+        applied_now.append(migration.version)
+
+    with bind.begin() as conn:
+        if _partitioning_enabled(conn):
+            _lock(conn)
+            ensure_partitions(conn)
+    return applied_now
+
+
+if __name__ == "__main__":
+    models.Base.metadata.create_all(bind=engine)
+    if sys.argv[1:2] == ["detach"] and len(sys.argv) == 4:
+        year, month = map(int, sys.argv[3].split("-"))
+        detach_partition(engine, sys.argv[2], year, month)
+    elif len(sys.argv) == 1:
+        upgrade(engine)
+    else:
+        sys.exit(__doc__)
@@ -7,7 +7,7 @@ These models define the structure of fact and dimension tables used for transact
 user, time, and campaign data in a restaurant analytics platform.
 """
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Time, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Time, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base  # Assuming you have Base from declarative_base()
@@ -30,13 +30,17 @@ class FactTransaction(Base):
     - user: Associated user (DimUser)
     """
     __tablename__ = "fact_transactions"
+    __table_args__ = (
+        # Per-customer history in RFM and exports, newest first
+        Index("ix_fact_transactions_mobile_id_created_at", "mobile_id", "created_at"),
+    )
 
     transaction_id = Column(Integer, primary_key=True, index=True)
     mobile_id = Column(String, ForeignKey("dim_users.mobile_id"))
     table_id = Column(Integer, ForeignKey("dim_tables.table_id"))
-    time_id = Column(Integer, ForeignKey("dim_time.time_id"))
+    time_id = Column(Integer, ForeignKey("dim_time.time_id"), index=True)
     total_amount = Column(Float)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     items = relationship("FactTransactionItem", back_populates="transaction")
     user = relationship("DimUser", back_populates="transactions")
@@ -59,10 +63,14 @@ class FactTransactionItem(Base):
     - menu_item: Associated menu item
     """
     __tablename__ = "fact_transaction_items"
+    __table_args__ = (
+        # Joins from transactions, covering the item for basket queries
+        Index("ix_fact_transaction_items_transaction_id_item_id", "transaction_id", "item_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(Integer, ForeignKey("fact_transactions.transaction_id"))
-    item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"), index=True)
     quantity = Column(Integer)
     price = Column(Float)
 
@@ -115,6 +123,65 @@ class MenuRecommendation(Base):
     daytime = relationship("DimMenuDaytime")
 
 
+# ---------- Menu Item Pairs ----------
+class MenuItemPair(Base):
+    """
+    Stores the top companions of each menu item ("frequently bought together").
+
+    Columns:
+    - id: Primary key
+    - item_id: Foreign key to DimMenuItem, the item the companions are for
+    - companion_item_id: Foreign key to DimMenuItem, an item often bought with it
+    - rank: Rank of the companion for this item (1 = strongest)
+    - pair_count: Transactions containing both items
+    - confidence: Share of the item's transactions that also contain the companion
+    - lift: Confidence relative to how often the companion is bought at all
+
+    Relationships:
+    - companion: The companion menu item
+    """
+    __tablename__ = "menu_item_pairs"
+    __table_args__ = (
+        # Companions of one item in rank order, read as a single index range
+        Index("ix_menu_item_pairs_item_id_rank", "item_id", "rank", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    companion_item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    rank = Column(Integer)
+    pair_count = Column(Integer)
+    confidence = Column(Float)
+    lift = Column(Float)
+
+    companion = relationship("DimMenuItem", foreign_keys=[companion_item_id])
+
+
+# ---------- User Menu Recommendations ----------
+class UserMenuRecommendation(Base):
+    """
+    Stores the personalized top-N menu items of each customer.
+
+    Columns:
+    - mobile_id: Foreign key to DimUser, part of the primary key
+    - rank: Rank position for this customer (1 = most recommended), part of the primary key
+    - menu_item_id: Foreign key to DimMenuItem
+    - score: Predicted preference from the factorization model
+
+    Relationships:
+    - menu_item: The recommended menu item
+    """
+    __tablename__ = "user_menu_recommendations"
+
+    # The (mobile_id, rank) primary key serves one customer's list as a single index range
+    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    menu_item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    score = Column(Float)
+
+    menu_item = relationship("DimMenuItem")
+
+
 # ---------- Dim Users ----------
 class DimUser(Base):
     """
@@ -157,8 +224,13 @@ class RfmSegment(Base):
 
     Relationships:
     - user: Associated user
+
+    A user has at most one row per date_created, which is the key used by bulk upserts.
     """
     __tablename__ = "rfm_segments"
+    __table_args__ = (
+        Index("uq_rfm_segments_mobile_date", "mobile_id", "date_created", unique=True),
+    )
 
     rfm_id = Column(Integer, primary_key=True, index=True)
     mobile_id = Column(String, ForeignKey("dim_users.mobile_id"))
@@ -175,6 +247,123 @@ class RfmSegment(Base):
     user = relationship("DimUser", back_populates="rfm_segments")
 
 
+# ---------- RFM Customer Stats ----------
+class RfmCustomerStat(Base):
+    """
+    Running RFM aggregates per user, maintained by the incremental RFM refresh.
+
+    Columns:
+    - mobile_id: Primary key and foreign key to DimUser
+    - last_transaction_date: Timestamp of the latest transaction folded in
+    - frequency: Number of transactions folded in
+    - monetary: Total spend folded in
+    - RFM_score, segment: Scores last written to rfm_segments for this user
+    """
+    __tablename__ = "rfm_customer_stats"
+
+    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"), primary_key=True, index=True)
+    last_transaction_date = Column(DateTime(timezone=True))
+    frequency = Column(Integer, nullable=False, default=0)
+    monetary = Column(Float, nullable=False, default=0.0)
+    RFM_score = Column(String, nullable=True)
+    segment = Column(String, nullable=True)
+
+
+# ---------- Pipeline Watermarks ----------
+class PipelineWatermark(Base):
+    """
+    Progress marker for incremental jobs that consume fact_transactions.
+
+    Columns:
+    - name: Job name (e.g., 'rfm_segments')
+    - last_transaction_id: Highest transaction_id already processed
+    - last_created_at: created_at of the newest transaction processed
+    - updated_at: When the job last advanced the watermark
+    """
+    __tablename__ = "pipeline_watermarks"
+
+    name = Column(String, primary_key=True, index=True)
+    last_transaction_id = Column(Integer, nullable=False, default=0)
+    last_created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# ---------- Schema Migrations ----------
+class SchemaMigration(Base):
+    """
+    Schema migrations applied to this database (see migrations.py).
+
+    Columns:
+    - version: Migration number
+    - name: Short description of the migration
+    - applied_at: When the migration was applied
+    """
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# ---------- Sales Rollups ----------
+class SalesDailyTable(Base):
+    """
+    Daily sales per table, maintained incrementally by the ETL from fact_transactions.
+
+    Columns:
+    - date: Sales date (from dim_time)
+    - table_id: Table the transactions were made at
+    - transactions: Number of transactions
+    - total_sales: Sum of transaction totals
+    """
+    __tablename__ = "sales_daily_table"
+
+    date = Column(Date, primary_key=True)
+    table_id = Column(Integer, primary_key=True)
+    transactions = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Float, nullable=False, default=0.0)
+
+
+class SalesDailyItem(Base):
+    """
+    Daily sales per menu item, maintained incrementally by the ETL from fact_transaction_items.
+
+    Columns:
+    - date: Sales date (from dim_time)
+    - item_id: Menu item sold
+    - quantity: Units sold
+    - total_sales: Sum of price * quantity
+    - line_count, price_sum: Number of line items and sum of their prices, for average price
+    """
+    __tablename__ = "sales_daily_item"
+
+    date = Column(Date, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Float, nullable=False, default=0.0)
+    line_count = Column(Integer, nullable=False, default=0)
+    price_sum = Column(Float, nullable=False, default=0.0)
+
+
+class SalesMonthly(Base):
+    """
+    Monthly sales totals, maintained incrementally by the ETL.
+
+    Columns:
+    - year, month: Calendar month (from dim_time)
+    - transactions: Number of transactions
+    - total_sales: Sum of transaction totals
+    - items_sold: Units sold across all line items
+    """
+    __tablename__ = "sales_monthly"
+
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    transactions = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Float, nullable=False, default=0.0)
+    items_sold = Column(Integer, nullable=False, default=0)
+
+
 # ---------- Marketing Campaigns ----------
 class MarketingCampaign(Base):
     """
@@ -260,12 +449,16 @@ class NfcEngagement(Base):
     - table: The table interacted with
     """
     __tablename__ = "nfc_engagements"
+    __table_args__ = (
+        # Engagement counts per tag type, optionally within a time range
+        Index("ix_nfc_engagements_tag_type_engagement_time", "tag_type", "engagement_time"),
+    )
 
     engagement_id = Column(Integer, primary_key=True, index=True)
-    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"))
+    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"), index=True)
     table_id = Column(Integer, ForeignKey("dim_tables.table_id"))
     tag_type = Column(String)
-    engagement_time = Column(DateTime)
+    engagement_time = Column(DateTime, index=True)
 
     user = relationship("DimUser", back_populates="engagements")
     table = relationship("DimTable")
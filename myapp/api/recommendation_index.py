@@ -0,0 +1,133 @@
+"""
+In-memory index answering "what should we recommend right now?".
+
+It holds the minute-of-day → daytime slot index (see daytime_index) and, for every slot, its
+ranked menu recommendations with item names, already encoded as the JSON response body.
+Resolving a time of day is then a list lookup and a dict lookup without touching the
+database, cheap enough to run on every NFC menu tap.
+
+The index is loaded on first use and reloaded by the next request after:
+- a publish through this process (`invalidate()`),
+- a bump of one of its tables in the response cache backend, which is how publishes handled
+  by other workers show up when they share the file backend,
+- API_CACHE_TTL seconds, which bounds how long changes written outside the API (e.g. new
+  daytime slots or item names loaded by the ETL) take to appear.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from datetime import time as time_of_day
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import daytime_index
+import models
+import schemas
+import serialization
+from cache import response_cache
+
+# Tables the index is built from; publishing recommendations bumps the first one
+TAGS = ("menu_recommendations", "dim_menu_daytimes", "dim_menu_items")
+
+
+class Snapshot(NamedTuple):
+    minutes: List[Optional[int]]
+    bodies: Dict[Optional[int], bytes]
+    versions: Tuple[int, ...]
+    loaded_at: float
+
+
+def _tag_versions() -> Tuple[int, ...]:
+    return tuple(response_cache.backend.tag_version(tag) for tag in TAGS)
+
+
+def load_snapshot(db: Session) -> Snapshot:
+    """
+    Read the daytime slots and the current recommendations and encode one body per slot.
+
+    Minutes outside every slot map to None, whose body has no slot and no items.
+    """
+    versions = _tag_versions()
+    daytimes = db.execute(
+        select(models.DimMenuDaytime).order_by(models.DimMenuDaytime.daytime_id)
+    ).scalars().all()
+
+    rec, item = models.MenuRecommendation, models.DimMenuItem
+    rows = db.execute(
+        select(rec.daytime_id, rec.menu_item_id, item.menu_item_name, item.category, item.price, rec.rank)
+        .outerjoin(item, item.item_id == rec.menu_item_id)
+        .order_by(rec.daytime_id, rec.rank)
+    ).all()
+    items: Dict[int, List[schemas.NowRecommendationItem]] = defaultdict(list)
+    for daytime_id, menu_item_id, name, category, price, rank in rows:
+        items[daytime_id].append(schemas.NowRecommendationItem(
+            menu_item_id=menu_item_id, menu_item_name=name, category=category, price=price, rank=rank,
+        ))
+
+    bodies = {None: serialization.dumps(schemas.NowRecommendations(items=[]))}
+    for slot in daytimes:
+        bodies[slot.daytime_id] = serialization.dumps(schemas.NowRecommendations(
+            daytime_id=slot.daytime_id,
+            daytime_label=slot.daytime_label,
+            start_time=slot.start_time,
+            end_time=slot.end_time,
+            items=items.get(slot.daytime_id, []),
+        ))
+    return Snapshot(daytime_index.build_minute_index(daytimes), bodies, versions, time.monotonic())
+
+
+class RecommendationIndex:
+    """
+    The current Snapshot plus the rules for replacing it.
+
+    Parameters:
+    - ttl: Seconds after which the snapshot is reloaded even without an invalidation
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: Optional[Snapshot] = None
+        # Bumped by every invalidation, so a reload that started before one is not kept
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Reload on the next lookup, e.g. after publishing new recommendations."""
+        self._generation += 1
+        self._snapshot = None
+
+    def _is_fresh(self, snapshot: Optional[Snapshot]) -> bool:
+        return (
+            snapshot is not None
+            and time.monotonic() - snapshot.loaded_at < self.ttl
+            and snapshot.versions == _tag_versions()
+        )
+
+    async def snapshot(self, db: AsyncSession) -> Snapshot:
+        """The current snapshot, reloaded first if it is missing or stale."""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+        # One request reloads; the others waiting here reuse its snapshot
+        async with self._lock:
+            snapshot = self._snapshot
+            if not self._is_fresh(snapshot):
+                generation = self._generation
+                snapshot = await db.run_sync(load_snapshot)
+                # An invalidation during the load may mean the rows were read before the
+                # publish committed; serve them to this request only
+                if self._generation == generation:
+                    self._snapshot = snapshot
+        return snapshot
+
+    async def lookup(self, db: AsyncSession, at: time_of_day) -> bytes:
+        """Encoded recommendations of the daytime slot covering `at`."""
+        snapshot = await self.snapshot(db)
+        return snapshot.bodies[snapshot.minutes[daytime_index.minute_of_day(at)]]
+
+
+recommendation_index = RecommendationIndex(ttl=response_cache.ttl)
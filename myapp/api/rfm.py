@@ -0,0 +1,256 @@
+"""
+Set-based RFM segmentation.
+
+Computes recency, frequency and monetary value per customer with a single GROUP BY over
+fact_transactions, scores each dimension into quintiles with NTILE(5) window functions and
+writes the result into rfm_segments with one INSERT ... SELECT, so no rows leave the database.
+
+The incremental refresh keeps running per-customer aggregates in rfm_customer_stats and a
+transaction watermark in pipeline_watermarks, so each run only reads transactions added
+since the previous one.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import Integer, String, case, cast, func, literal, or_, select, true, update
+from sqlalchemy.orm import Session
+
+import crud
+import models
+
+# Checked in order, the first matching rule wins
+SEGMENT_RULES = [
+    ("Champions", lambda r, f: (r >= 4) & (f >= 4)),
+    ("Loyal Customers", lambda r, f: (r >= 3) & (f >= 3)),
+    ("Recent Customers", lambda r, f: r >= 4),
+    ("Frequent Buyers", lambda r, f: f >= 4),
+]
+DEFAULT_SEGMENT = "Others"
+WATERMARK_NAME = "rfm_segments"
+
+
+def days_between(db: Session, as_of: datetime, column):
+    """
+    Whole days elapsed from `column` to `as_of`, as a SQL expression for the session's dialect.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        naive = as_of.astimezone(timezone.utc).replace(tzinfo=None)
+        return cast(func.julianday(literal(naive)) - func.julianday(column), Integer)
+    return cast(func.floor(func.extract("epoch", literal(as_of) - column) / 86400), Integer)
+
+
+def segment_case(r_score, f_score):
+    """SQL CASE expression mapping R and F scores to a segment label."""
+    return case(
+        *[(rule(r_score, f_score), label) for label, rule in SEGMENT_RULES],
+        else_=DEFAULT_SEGMENT,
+    )
+
+
+def score_select(base):
+    """
+    Select quintile scores and segment labels from a subquery with columns
+    mobile_id, recency_days, frequency and monetary (5 is always the best score).
+    """
+    scored = select(
+        base.c.mobile_id,
+        base.c.recency_days,
+        base.c.frequency,
+        base.c.monetary,
+        (6 - func.ntile(5).over(order_by=(base.c.recency_days, base.c.mobile_id))).label("R_score"),
+        func.ntile(5).over(order_by=(base.c.frequency, base.c.mobile_id)).label("F_score"),
+        func.ntile(5).over(order_by=(base.c.monetary, base.c.mobile_id)).label("M_score"),
+    ).subquery("rfm_scored")
+
+    return select(
+        scored.c.mobile_id,
+        scored.c.recency_days,
+        scored.c.frequency,
+        scored.c.monetary,
+        scored.c.R_score,
+        scored.c.F_score,
+        scored.c.M_score,
+        (cast(scored.c.R_score, String) + cast(scored.c.F_score, String) + cast(scored.c.M_score, String))
+        .label("RFM_score"),
+        segment_case(scored.c.R_score, scored.c.F_score).label("segment"),
+    )
+
+
+def write_segments(db: Session, scored, date_created: datetime) -> int:
+    """
+    INSERT ... SELECT scored rows into rfm_segments stamped with `date_created`.
+
+    Re-running with the same timestamp overwrites that snapshot instead of failing.
+    """
+    scored = scored.subquery("rfm_result")
+    columns = [
+        "mobile_id", "recency_days", "frequency", "monetary",
+        "R_score", "F_score", "M_score", "RFM_score", "segment",
+    ]
+    # SQLite needs a WHERE clause to tell an upsert's ON CONFLICT apart from a join
+    source = select(
+        *[scored.c[name] for name in columns],
+        literal(date_created, models.RfmSegment.date_created.type).label("date_created"),
+    ).where(true())
+
+    stmt = crud.dialect_insert(db, models.RfmSegment).from_select(columns + ["date_created"], source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(crud.CRUDRfmSegment.UPSERT_KEY),
+        set_={name: stmt.excluded[name] for name in columns if name != "mobile_id"},
+    )
+    return db.execute(stmt).rowcount
+
+
+def recompute_rfm_segments(db: Session, as_of: Optional[datetime] = None) -> Tuple[int, datetime]:
+    """
+    Recompute RFM segments for every customer from the full transaction history.
+
+    Parameters:
+    - as_of: Reference time for recency; defaults to the start of the current UTC day
+
+    Returns:
+    - The number of segment rows written and the date_created they were stamped with
+    """
+    now = datetime.now(timezone.utc)
+    reference = as_of or now.replace(hour=0, minute=0, second=0, microsecond=0)
+    txn = models.FactTransaction
+
+    base = (
+        select(
+            txn.mobile_id,
+            days_between(db, reference, func.max(txn.created_at)).label("recency_days"),
+            func.count(txn.transaction_id.distinct()).label("frequency"),
+            func.sum(txn.total_amount).label("monetary"),
+        )
+        .join(models.DimUser, models.DimUser.mobile_id == txn.mobile_id)
+        .group_by(txn.mobile_id)
+        .subquery("rfm_base")
+    )
+
+    try:
+        written = write_segments(db, score_select(base), now)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return written, now
+
+
+def get_watermark(db: Session, name: str) -> models.PipelineWatermark:
+    """
+    Return the named watermark row, locked for the rest of the transaction, creating it if needed.
+    """
+    # A plain add would let two concurrent first refreshes both insert the row
+    db.execute(
+        crud.dialect_insert(db, models.PipelineWatermark)
+        .values(name=name, last_transaction_id=0)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    return (
+        db.query(models.PipelineWatermark)
+        .filter(models.PipelineWatermark.name == name)
+        .with_for_update()
+        .one()
+    )
+
+
+def fold_transactions(db: Session, after_id: int, up_to_id: int) -> None:
+    """
+    Add transactions with after_id < transaction_id <= up_to_id to the running per-customer stats.
+    """
+    txn = models.FactTransaction
+    stats = models.RfmCustomerStat
+    delta = (
+        select(
+            txn.mobile_id,
+            func.max(txn.created_at).label("last_transaction_date"),
+            func.count(txn.transaction_id).label("frequency"),
+            func.sum(txn.total_amount).label("monetary"),
+        )
+        .join(models.DimUser, models.DimUser.mobile_id == txn.mobile_id)
+        .where(txn.transaction_id > after_id, txn.transaction_id <= up_to_id)
+        .group_by(txn.mobile_id)
+    )
+    latest = func.max if db.get_bind().dialect.name == "sqlite" else func.greatest
+
+    stmt = crud.dialect_insert(db, stats).from_select(
+        ["mobile_id", "last_transaction_date", "frequency", "monetary"], delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["mobile_id"],
+        set_={
+            "last_transaction_date": latest(stats.last_transaction_date, stmt.excluded.last_transaction_date),
+            "frequency": stats.frequency + stmt.excluded.frequency,
+            "monetary": stats.monetary + stmt.excluded.monetary,
+        },
+    )
+    db.execute(stmt)
+
+
+def refresh_rfm_segments(db: Session, as_of: Optional[datetime] = None) -> dict:
+    """
+    Incrementally refresh RFM segments from transactions added since the last run.
+
+    New transactions are folded into rfm_customer_stats, then every customer is re-scored
+    from those aggregates (one row per customer, never the transaction history), and only
+    customers whose RFM score or segment changed get a new rfm_segments row.
+
+    Parameters:
+    - as_of: Reference time for recency; defaults to the start of the current UTC day
+
+    Returns:
+    - Counts for the run and the new watermark
+    """
+    now = datetime.now(timezone.utc)
+    reference = as_of or now.replace(hour=0, minute=0, second=0, microsecond=0)
+    txn = models.FactTransaction
+    stats = models.RfmCustomerStat
+
+    try:
+        watermark = get_watermark(db, WATERMARK_NAME)
+        after_id = watermark.last_transaction_id
+        new_count, up_to_id, last_created_at = db.execute(
+            select(func.count(), func.max(txn.transaction_id), func.max(txn.created_at))
+            .where(txn.transaction_id > after_id)
+        ).one()
+
+        if new_count:
+            fold_transactions(db, after_id, up_to_id)
+            watermark.last_transaction_id = up_to_id
+            watermark.last_created_at = last_created_at
+
+        base = select(
+            stats.mobile_id,
+            days_between(db, reference, stats.last_transaction_date).label("recency_days"),
+            stats.frequency,
+            stats.monetary,
+        ).subquery("rfm_base")
+        scored = score_select(base).subquery("rfm_rescored")
+        changed = (
+            select(*scored.c)
+            .join(stats, stats.mobile_id == scored.c.mobile_id)
+            .where(or_(
+                stats.RFM_score.is_distinct_from(scored.c.RFM_score),
+                stats.segment.is_distinct_from(scored.c.segment),
+            ))
+        )
+        written = write_segments(db, changed, now)
+
+        segment = models.RfmSegment
+        db.execute(
+            update(stats)
+            .where(segment.mobile_id == stats.mobile_id, segment.date_created == now)
+            .values(RFM_score=segment.RFM_score, segment=segment.segment)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "new_transactions": new_count,
+        "written": written,
+        "last_transaction_id": watermark.last_transaction_id,
+        "date_created": now,
+    }
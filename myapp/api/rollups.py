@@ -0,0 +1,163 @@
+"""
+Sales rollups: daily x table, daily x menu item and monthly totals.
+
+The ETL keeps these tables current after every load by aggregating only the transactions
+added since the previous refresh (tracked by a watermark in pipeline_watermarks) and adding
+the result onto the existing rollup rows, so dashboard reads stay flat as the fact table grows.
+The API runs the same refresh at startup, which catches the rollups up with fact rows that no
+load rolled up (data loaded before the rollups existed, or a load that failed partway).
+
+This module is shared by the etl and api services; CI (.github/workflows/checks.yaml) fails
+when the two copies differ.
+"""
+
+import os
+import sys
+
+from loguru import logger
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.dirname(__file__))
+import models
+
+WATERMARK_NAME = "sales_rollups"
+
+
+def _insert(db: Session, model):
+    """INSERT construct with ON CONFLICT support for the session's dialect."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def _add_into(db: Session, model, keys: list[str], source) -> None:
+    """
+    INSERT ... SELECT `source` into `model`, adding the selected measures onto existing rows.
+    Args:
+        db (Session): Open session; the caller commits.
+        model: Rollup model to upsert into.
+        keys (list[str]): Primary-key columns of the rollup.
+        source: SELECT whose columns are named like the rollup columns.
+    """
+    columns = [column.name for column in source.selected_columns]
+    stmt = _insert(db, model).from_select(columns, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            name: getattr(model, name) + stmt.excluded[name]
+            for name in columns
+            if name not in keys
+        },
+    )
+    db.execute(stmt)
+
+
+def refresh_rollups(db: Session) -> int:
+    """
+    Fold transactions added since the last refresh into the sales rollup tables.
+
+    The first run (no watermark yet) builds the rollups from the whole fact table.
+    Args:
+        db (Session): Open session; committed on success.
+    Returns:
+        int: Number of new transactions folded in.
+    """
+    txn = models.FactTransaction
+    line = models.FactTransactionItem
+    dim_time = models.DimTime
+
+    # Concurrent first runs (e.g. API workers starting together) must not both insert the row
+    db.execute(
+        _insert(db, models.PipelineWatermark)
+        .values(name=WATERMARK_NAME, last_transaction_id=0)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    watermark = (
+        db.query(models.PipelineWatermark)
+        .filter(models.PipelineWatermark.name == WATERMARK_NAME)
+        .with_for_update()
+        .one()
+    )
+
+    after_id = watermark.last_transaction_id
+    new_count, up_to_id, last_created_at = db.execute(
+        select(func.count(), func.max(txn.transaction_id), func.max(txn.created_at))
+        .where(txn.transaction_id > after_id)
+    ).one()
+    if not new_count:
+        db.commit()
+        return 0
+
+    in_range = (txn.transaction_id > after_id, txn.transaction_id <= up_to_id)
+
+    _add_into(db, models.SalesDailyTable, ["date", "table_id"], (
+        select(
+            dim_time.date.label("date"),
+            txn.table_id.label("table_id"),
+            func.count(txn.transaction_id).label("transactions"),
+            func.sum(txn.total_amount).label("total_sales"),
+        )
+        .join(dim_time, dim_time.time_id == txn.time_id)
+        .where(*in_range)
+        .group_by(dim_time.date, txn.table_id)
+    ))
+
+    _add_into(db, models.SalesDailyItem, ["date", "item_id"], (
+        select(
+            dim_time.date.label("date"),
+            line.item_id.label("item_id"),
+            func.sum(line.quantity).label("quantity"),
+            func.sum(line.price * line.quantity).label("total_sales"),
+            func.count(line.id).label("line_count"),
+            func.sum(line.price).label("price_sum"),
+        )
+        .join(txn, txn.transaction_id == line.transaction_id)
+        .join(dim_time, dim_time.time_id == txn.time_id)
+        .where(*in_range)
+        .group_by(dim_time.date, line.item_id)
+    ))
+
+    _add_into(db, models.SalesMonthly, ["year", "month"], (
+        select(
+            dim_time.year.label("year"),
+            dim_time.month.label("month"),
+            func.count(txn.transaction_id).label("transactions"),
+            func.sum(txn.total_amount).label("total_sales"),
+            literal(0).label("items_sold"),
+        )
+        .join(dim_time, dim_time.time_id == txn.time_id)
+        .where(*in_range)
+        .group_by(dim_time.year, dim_time.month)
+    ))
+    _add_into(db, models.SalesMonthly, ["year", "month"], (
+        select(
+            dim_time.year.label("year"),
+            dim_time.month.label("month"),
+            literal(0).label("transactions"),
+            literal(0.0).label("total_sales"),
+            func.sum(line.quantity).label("items_sold"),
+        )
+        .join(txn, txn.transaction_id == line.transaction_id)
+        .join(dim_time, dim_time.time_id == txn.time_id)
+        .where(*in_range)
+        .group_by(dim_time.year, dim_time.month)
+    ))
+
+    watermark.last_transaction_id = up_to_id
+    watermark.last_created_at = last_created_at
+    db.commit()
+    logger.info(f"Rolled up {new_count} new transactions (up to transaction_id {up_to_id})")
+    return new_count
+
+
+# === Run standalone to catch rollups up with data loaded outside the ETL ===
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        refresh_rollups(session)
+    finally:
+        session.close()
@@ -88,6 +88,11 @@ class DimMenuDaytimeOut(DimMenuDaytimeBase):
         from_attributes= True
 
 
+class DaytimeMinuteIndex(BaseModel):
+    """Daytime slot lookup: entry i is the daytime_id covering minute i of the day, or null."""
+    minutes: List[Optional[int]]
+
+
 # ---------- menu_recommendations ----------
 class MenuRecommendationBase(BaseModel):
     """Base schema for menu_recommendations table."""
@@ -112,6 +117,95 @@ class MenuRecommendationOut(MenuRecommendationBase):
         from_attributes= True
 
 
+class MenuRecommendationPublish(BaseModel):
+    """Full ranking for all daytime slots, replacing every stored recommendation."""
+    recommendations: List[MenuRecommendationCreate]
+
+
+class MenuRecommendationPublishResult(BaseModel):
+    """Outcome of publishing a new ranking."""
+    published: int
+    daytime_ids: List[int]
+
+
+class NowRecommendationItem(BaseModel):
+    """A recommended menu item of the current daytime slot."""
+    menu_item_id: int
+    menu_item_name: Optional[str] = None
+    category: Optional[str] = None
+    price: Optional[float] = None
+    rank: int
+
+
+class NowRecommendations(BaseModel):
+    """The daytime slot covering a time of day and its ranked items; no slot outside service hours."""
+    daytime_id: Optional[int] = None
+    daytime_label: Optional[str] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    items: List[NowRecommendationItem]
+
+
+# ---------- menu_item_pairs ----------
+class MenuItemPairBase(BaseModel):
+    """Base schema for menu_item_pairs table."""
+    item_id: int
+    companion_item_id: int
+    rank: int
+    pair_count: int
+    confidence: float
+    lift: float
+
+
+class MenuItemPairCreate(MenuItemPairBase):
+    """Schema for creating a menu item pair."""
+
+
+class MenuItemPairUpdate(MenuItemPairBase):
+    """Schema for updating a menu item pair."""
+
+
+class MenuItemPairPublish(BaseModel):
+    """Top companions of every item, replacing every stored pair."""
+    pairs: List[MenuItemPairCreate]
+
+
+class MenuItemPairPublishResult(BaseModel):
+    """Outcome of publishing new item pairs."""
+    published: int
+    item_ids: List[int]
+
+
+class MenuItemCompanionOut(BaseModel):
+    """An item frequently bought together with the requested one."""
+    companion_item_id: int
+    menu_item_name: Optional[str] = None
+    category: Optional[str] = None
+    price: Optional[float] = None
+    rank: int
+    pair_count: int
+    confidence: float
+    lift: float
+
+
+# ---------- user_menu_recommendations ----------
+class UserRecommendationBulkItem(BaseModel):
+    """One customer's ranked items in a bulk upload, best first, with a score per item."""
+    mobile_id: str
+    menu_item_ids: List[int]
+    scores: List[float]
+
+
+class UserMenuRecommendationOut(BaseModel):
+    """A personalized menu recommendation for one customer."""
+    menu_item_id: int
+    menu_item_name: Optional[str] = None
+    category: Optional[str] = None
+    price: Optional[float] = None
+    rank: int
+    score: float
+
+
 # ---------- dim_users ----------
 class DimUserBase(BaseModel):
     """Base schema for dim_users table."""
@@ -169,6 +263,23 @@ class RfmSegmentOut(RfmSegmentBase):
         from_attributes= True
 
 
+class RfmSegmentBulkItem(RfmSegmentCreate):
+    """Schema for one row of a bulk RFM upload; date_created defaults to the batch timestamp."""
+    date_created: Optional[datetime] = None
+
+
+class RfmRecomputeResult(BaseModel):
+    """Outcome of an in-database RFM recomputation."""
+    written: int
+    date_created: datetime
+
+
+class RfmRefreshResult(RfmRecomputeResult):
+    """Outcome of an incremental RFM refresh."""
+    new_transactions: int
+    last_transaction_id: int
+
+
 # ---------- marketing_campaigns ----------
 class MarketingCampaignBase(BaseModel):
     """Base schema for marketing_campaigns table."""
@@ -317,6 +428,20 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
 
 
+# ---- Bulk Writes ----
+class BulkRowError(BaseModel):
+    """A rejected row of a bulk request, by its position in the payload."""
+    index: int
+    detail: str
+
+
+class BulkWriteResult(BaseModel):
+    """Outcome of a bulk write: rows received, rows written and per-row errors."""
+    received: int
+    written: int
+    errors: List[BulkRowError]
+
+
 # ---- Dashboard Overview ----
 class DashboardOverview(BaseModel):
     """Schema for top-level dashboard metrics."""
@@ -339,6 +464,54 @@ class SalesTrendResponse(BaseModel):
     trend: List[SalesTrendItem]
 
 
+# ---- Monthly Dashboard ----
+class MonthlySalesItem(BaseModel):
+    """Sales totals for one calendar month."""
+    year: int
+    month: int
+    total_sales: float
+    transactions: int
+
+
+class MonthKpis(BaseModel):
+    """Headline metrics for one month."""
+    total_sales: float
+    transactions: int
+    avg_check: float
+
+
+class MenuItemPerformance(BaseModel):
+    """Sales of one menu item within a month."""
+    item_id: int
+    menu_item_name: Optional[str] = None
+    quantity: int
+    total_sales: float
+    avg_price: float
+
+
+class TableUsageItem(BaseModel):
+    """Transaction count for one table within a month."""
+    table_id: int
+    count: int
+
+
+class HourlyEngagementItem(BaseModel):
+    """NFC engagement count for one hour of day within a month."""
+    hour: int
+    count: int
+
+
+class DashboardMonth(BaseModel):
+    """All aggregates behind the monthly dashboard view."""
+    year: int
+    month: int
+    kpis: MonthKpis
+    items: List[MenuItemPerformance]
+    daily_sales: List[SalesTrendItem]
+    table_usage: List[TableUsageItem]
+    nfc_hourly: List[HourlyEngagementItem]
+
+
 # ---- NFC Engagement ----
 class NfcEngagementStats(BaseModel):
     """Engagement count per NFC tag type."""
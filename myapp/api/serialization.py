@@ -0,0 +1,146 @@
+"""
+Fast JSON path for large list and export responses.
+
+With API_FAST_JSON=true, list endpoints select only their schema's columns as plain tuples
+(no ORM entities, no per-row pydantic validation), bodies are encoded with orjson, and
+responses are compressed with brotli or gzip when the client's Accept-Encoding allows it.
+Responses decode to the same values as on the default path (NDJSON lines are compact).
+
+Configuration (environment):
+- API_FAST_JSON: Enable the fast path, "true" or "false" (default false)
+- API_COMPRESS_MIN_BYTES: Smallest body worth compressing (default 1024)
+- API_GZIP_LEVEL: gzip level, 1-9 (default 6)
+- API_BROTLI_QUALITY: brotli quality, 0-11 (default 4)
+
+orjson and brotli are optional: without orjson the standard encoder is used, and without
+brotli only gzip is offered.
+"""
+
+import gzip
+import json
+import os
+import zlib
+from datetime import date, datetime, time
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from database import env_flag
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FAST_JSON = env_flag("API_FAST_JSON", False)
+COMPRESS_MIN_BYTES = int(os.getenv("API_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("API_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("API_BROTLI_QUALITY", "4"))
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a payload (rows, dicts or pydantic models) as compact JSON bytes."""
+    if FAST_JSON and orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode("utf-8")
+
+
+def dumps_line(record: dict) -> bytes:
+    """Encode one record as an NDJSON line."""
+    if FAST_JSON and orjson is not None:
+        return orjson.dumps(record, default=_default) + b"\n"
+    return (json.dumps(record, default=_default) + "\n").encode("utf-8")
+
+
+def records(names: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[dict]:
+    """Turn column tuples into dicts keyed by column name."""
+    return [dict(zip(names, row)) for row in rows]
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from the request's Accept-Encoding, preferring brotli.
+    Returns None when the client accepts neither (or compression is off).
+    """
+    if not FAST_JSON:
+        return None
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    """Compress a whole body with the negotiated encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Compress a streamed body chunk by chunk with the negotiated encoding."""
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+    # wbits 16+ writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def encoded_response(request: Request, body: bytes, headers: Optional[dict] = None,
+                     media_type: str = "application/json") -> Response:
+    """Response for an encoded body, compressed if the client accepts it and it is large enough."""
+    headers = dict(headers or {})
+    encoding = negotiate_encoding(request) if len(body) >= COMPRESS_MIN_BYTES else None
+    if FAST_JSON:
+        headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+        # The compressed bytes differ, so the validator is only weakly equal to the identity one
+        if "ETag" in headers and not headers["ETag"].startswith("W/"):
+            headers["ETag"] = "W/" + headers["ETag"]
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def json_response(request: Request, payload: Any) -> Response:
+    """Encode a payload with `dumps` and send it, compressed when negotiated."""
+    return encoded_response(request, dumps(payload))
@@ -0,0 +1,220 @@
+"""
+End-to-end benchmark suite.
+
+For each scale factor a dataset is generated with `simulate_all` into a fresh database and
+every stage is timed: generation, ETL load (including the sales rollups), the DS jobs (RFM,
+menu recommendations, item pairs and per-customer recommendations), and each GET endpoint
+under /api (dashboard and list endpoints, through the FastAPI test client). The DS jobs talk to a uvicorn server started for
+the run, as they do in docker-compose. Scale factor 1 is the ETL's default dataset (100 users, 300
+transactions); users, NFC engagements and transactions grow linearly with it.
+
+Each run is appended to a JSON history together with the git commit it measured, so runs
+on different commits can be compared. Results depend on the machine: compare runs made on
+the same one.
+
+The database is a SQLite file per scale in a temporary directory, unless --database-url
+points at another one (e.g. a local PostgreSQL); its tables are dropped and recreated for
+every scale. Settings such as RFM_ENGINE, DS_DATA_SOURCE, API_FAST_JSON and ETL_WORKERS are
+taken from the environment and recorded with the run. Response caching and SQL echo are off.
+
+Usage (from myapp/):
+- python benchmarks/run.py run [--scales 1 10 100] [--repeat 3] [--database-url URL]
+- python benchmarks/run.py compare [BASE [HEAD]]   Compare two runs by commit (default: the last two)
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from typing import List, Optional
+
+MYAPP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = os.path.join(MYAPP_DIR, "benchmarks", "stages.py")
+DEFAULT_HISTORY = os.path.join(MYAPP_DIR, "benchmarks", "history.json")
+# Settings that change what is measured; recorded with every run
+RECORDED_SETTINGS = (
+    "RFM_ENGINE", "DS_DATA_SOURCE", "API_FAST_JSON", "ETL_WORKERS", "ETL_CHUNK_ROWS", "DB_POOL_SIZE",
+)
+SERVER_START_TIMEOUT = 60
+
+
+def _git(*args: str) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=MYAPP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _run_group(group: str, service: str, env: dict, scale: int, out: str, *extra: str) -> None:
+    subprocess.run(
+        [sys.executable, STAGES, group, "--scale", str(scale), "--out", out, *extra],
+        cwd=os.path.join(MYAPP_DIR, service), env=env, check=True,
+    )
+
+
+def _start_api(env: dict, port: int) -> subprocess.Popen:
+    """Start the API with uvicorn and wait until it answers."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.join(MYAPP_DIR, "api"), env=env,
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"API server exited with status {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"API server did not start within {SERVER_START_TIMEOUT}s")
+
+
+def run_scale(scale: int, database_url: str, args: argparse.Namespace, workdir: str) -> List[dict]:
+    """Run every stage at one scale factor and return its measurements."""
+    out = os.path.join(workdir, f"scale_{scale}.jsonl")
+    env = {**os.environ, "DATABASE_URL": database_url, "DB_ECHO": "false", "API_CACHE_BACKEND": "none"}
+    # A snapshot would replace generation and the DS reads
+    env.pop("SNAPSHOT_DIR", None)
+
+    _run_group("etl", "etl", env, scale, out, "--seed", str(args.seed))
+    port = _free_port()
+    server = _start_api(env, port)
+    try:
+        _run_group("ds", "ds", {**env, "API_BASE": f"http://127.0.0.1:{port}/api"}, scale, out)
+    finally:
+        server.terminate()
+        server.wait()
+    _run_group("api", "api", env, scale, out, "--repeat", str(args.repeat), "--list-limit", str(args.list_limit))
+
+    with open(out) as f:
+        return [json.loads(line) for line in f]
+
+
+def load_history(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"runs": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_history(path: str, history: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def run(args: argparse.Namespace) -> None:
+    entry = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "label": args.label,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": (args.database_url or "sqlite").split(":", 1)[0],
+        "seed": args.seed,
+        "settings": {name: os.environ[name] for name in RECORDED_SETTINGS if name in os.environ},
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="smartcrm-bench-") as workdir:
+        for scale in args.scales:
+            url = args.database_url or f"sqlite:///{os.path.join(workdir, f'bench_{scale}.db')}"
+            print(f"Scale {scale}…", file=sys.stderr)
+            results = run_scale(scale, url, args, workdir)
+            entry["results"].extend(results)
+            for result in results:
+                print(_format_result(result))
+
+    history = load_history(args.history)
+    history["runs"].append(entry)
+    save_history(args.history, history)
+    print(f"Recorded run for {entry['commit'][:10] or 'unknown commit'} in {args.history}", file=sys.stderr)
+
+
+def _format_result(result: dict) -> str:
+    rate = f"{result['rows_per_sec']:>12,.0f} rows/s" if result.get("rows_per_sec") else " " * 19
+    return (f"x{result['scale']:<5} {result['stage']:<20} {result['name']:<48} "
+            f"{result['seconds']:>9.3f}s {rate} {result['peak_rss_mb']:>8.1f} MiB")
+
+
+def _find_run(runs: List[dict], commit: Optional[str], before: Optional[dict] = None) -> dict:
+    candidates = runs[:runs.index(before)] if before else runs
+    for entry in reversed(candidates):
+        if commit is None or entry["commit"].startswith(commit):
+            return entry
+    raise SystemExit(f"No benchmark run found for {commit or 'comparison'}")
+
+
+def compare(args: argparse.Namespace) -> None:
+    """Print the change in wall time between two runs, flagging slowdowns above --threshold."""
+    runs = load_history(args.history)["runs"]
+    head = _find_run(runs, args.head)
+    base = _find_run(runs, args.base, before=None if args.base else head)
+    print(f"base {base['commit'][:10]} ({base['started_at']})  →  head {head['commit'][:10]} ({head['started_at']})")
+
+    key = lambda result: (result["scale"], result["stage"], result["name"])
+    base_results = {key(result): result for result in base["results"]}
+    regressions = 0
+    for result in head["results"]:
+        before = base_results.get(key(result))
+        if before is None or not before["seconds"] or not result["seconds"]:
+            continue
+        change = (result["seconds"] - before["seconds"]) / before["seconds"] * 100
+        flag = ""
+        if change > args.threshold:
+            flag, regressions = "  slower", regressions + 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"x{result['scale']:<5} {result['stage']:<20} {result['name']:<48} "
+              f"{before['seconds']:>9.3f}s → {result['seconds']:>9.3f}s {change:+7.1f}%"
+              f"  rss {before['peak_rss_mb']:.0f} → {result['peak_rss_mb']:.0f} MiB{flag}")
+    if regressions and args.strict:
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--history", default=DEFAULT_HISTORY, help="JSON history file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", parents=[common], help="Benchmark the working tree and record the run")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed calls per endpoint (median is kept)")
+    run_parser.add_argument("--list-limit", type=int, default=10_000, help="limit passed to list endpoints")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--database-url", help="Database to use instead of a SQLite file per scale")
+    run_parser.add_argument("--label", help="Free-form note stored with the run")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser("compare", parents=[common], help="Compare two recorded runs")
+    compare_parser.add_argument("base", nargs="?", help="Commit (prefix) of the baseline run")
+    compare_parser.add_argument("head", nargs="?", help="Commit (prefix) of the run to check (default: latest)")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Percent change worth flagging")
+    compare_parser.add_argument("--strict", action="store_true", help="Exit with status 1 if anything got slower")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
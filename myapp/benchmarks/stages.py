@@ -0,0 +1,252 @@
+"""
+Benchmark stages, run by run.py inside one service directory each.
+
+Every stage group runs in its own process with the service directory as working directory,
+since the services ship their own `models`, `database` and `main` modules that cannot be
+imported side by side. Each measurement is appended to the `--out` file as one JSON line:
+scale, stage, name, seconds, rows, rows_per_sec and peak_rss_mb.
+
+Peak RSS is the process high-water mark during the stage: on Linux it is reset before each
+stage through /proc/self/clear_refs, elsewhere it is the high-water mark since start-up.
+
+Usage (normally called by run.py):
+- python stages.py etl --scale N --seed S --out FILE   (in myapp/etl)
+- python stages.py ds --scale N --out FILE             (in myapp/ds, API_BASE pointing at a running API)
+- python stages.py api --scale N --repeat R --list-limit L --out FILE   (in myapp/api)
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+# Make the service modules importable from the working directory
+sys.path.insert(0, os.getcwd())
+
+# Table sizes at scale factor 1 (the etl_process defaults); users and facts grow with the scale
+BASE_SCALE = {
+    "n_tables": 10,
+    "n_days": 365,
+    "n_menu_items": 50,
+    "n_users": 100,
+    "n_nfc": 100,
+    "n_tx": 300,
+    "n_campaigns": 5,
+}
+SCALED = ("n_users", "n_nfc", "n_tx")
+
+
+def scale_sizes(scale: int) -> dict:
+    """Table sizes for a scale factor."""
+    return {name: size * scale if name in SCALED else size for name, size in BASE_SCALE.items()}
+
+
+def _reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class Recorder:
+    """Append measurements for one scale factor to a JSON-lines file."""
+
+    def __init__(self, path: str, scale: int):
+        self.path = path
+        self.scale = scale
+
+    def add(self, stage: str, name: str, seconds: float, rows: Optional[int], **extra) -> None:
+        result = {
+            "scale": self.scale,
+            "stage": stage,
+            "name": name,
+            "seconds": round(seconds, 6),
+            "rows": rows,
+            "rows_per_sec": round(rows / seconds, 1) if rows and seconds > 0 else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **extra,
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+    @contextmanager
+    def stage(self, stage: str, name: Optional[str] = None) -> Iterator[dict]:
+        """
+        Time the body as one measurement. The body sets `rows` (and any extra fields)
+        on the yielded dict.
+        """
+        info = {"rows": None}
+        _reset_peak_rss()
+        started = time.perf_counter()
+        yield info
+        elapsed = time.perf_counter() - started
+        rows = info.pop("rows")
+        self.add(stage, name or stage, elapsed, rows, **info)
+
+
+def run_etl(recorder: Recorder, seed: int) -> None:
+    """Generate a dataset with simulate_all on ETL_WORKERS processes into a fresh schema and bulk-load it."""
+    from loguru import logger
+    from sqlalchemy import text
+
+    from data_generator import simulate_all
+    from database import SessionLocal, engine
+    from loader import load_stream
+    from rollups import refresh_rollups
+    import models
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    # The ETL engine echoes every statement; the logging is not what is being measured
+    engine.echo = False
+
+    # Start from an empty schema so reused databases (e.g. a local PostgreSQL) are comparable
+    models.Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    models.Base.metadata.create_all(bind=engine)
+
+    # Midnight keeps the dataset identical for every run on the same day
+    as_of = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    with recorder.stage("generate") as info:
+        dfs = simulate_all(
+            **scale_sizes(recorder.scale), seed=seed, workers=int(os.getenv("ETL_WORKERS", "1")), as_of=as_of
+        )
+        info["rows"] = sum(len(df) for df in dfs.values())
+
+    with recorder.stage("etl_load") as info:
+        db = SessionLocal()
+        try:
+            info["rows"] = load_stream(db, iter(dfs.items()))
+            refresh_rollups(db)
+            db.commit()
+        finally:
+            db.close()
+
+
+def _count(table: str) -> int:
+    from sqlalchemy import text
+
+    import data_access
+
+    with data_access.get_engine().connect() as conn:
+        return conn.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+
+
+def run_ds(recorder: Recorder) -> None:
+    """Run the RFM, menu recommendation, item pair and per-customer jobs against the API at API_BASE."""
+    from basket import run_basket_pairs
+    from modeling import run_rfm_pipeline
+    from personalization import run_user_recommendations
+    from recomendation import run_menu_recommendations
+
+    transactions, items = _count("fact_transactions"), _count("fact_transaction_items")
+    with recorder.stage("rfm") as info:
+        run_rfm_pipeline()
+        info["rows"] = transactions
+    with recorder.stage("recommendations") as info:
+        run_menu_recommendations()
+        info["rows"] = items
+    with recorder.stage("basket_pairs") as info:
+        run_basket_pairs()
+        info["rows"] = items
+    with recorder.stage("user_recommendations") as info:
+        run_user_recommendations()
+        info["rows"] = items
+
+
+def _fill_path(path: str, month: Optional[dict]) -> Optional[str]:
+    """Fill {year}/{month} with the latest month; None if the path has other parameters."""
+    if month is not None:
+        path = path.replace("{year}", str(month["year"])).replace("{month}", str(month["month"]))
+    return None if "{" in path else path
+
+
+def _rows(response, transactions: int) -> int:
+    if response.headers.get("content-type", "").startswith("application/x-ndjson"):
+        return response.content.count(b"\n")
+    body = response.json()
+    # Aggregate endpoints summarise the transactions, so count those as the rows processed
+    return len(body) if isinstance(body, list) else transactions
+
+
+def run_api(recorder: Recorder, repeat: int, list_limit: int) -> None:
+    """Time every GET endpoint under /api with the FastAPI test client (median of `repeat` calls)."""
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, select
+
+    from database import SessionLocal
+    import main
+    import models
+
+    with SessionLocal() as db:
+        transactions = db.execute(select(func.count()).select_from(models.FactTransaction)).scalar()
+
+    client = TestClient(main.app)
+    months = client.get("/api/dashboard/months").json()
+    latest = max(months, key=lambda m: (m["year"], m["month"])) if months else None
+
+    for route in main.app.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods or not route.path.startswith("/api/"):
+            continue
+        url = _fill_path(route.path, latest)
+        if url is None:
+            continue
+        query = {param.name for param in route.dependant.query_params}
+        params = {"limit": list_limit} if "limit" in query else None
+
+        response = client.get(url, params=params)
+        if response.status_code != 200:
+            recorder.add("api", route.path, 0.0, None, status=response.status_code)
+            continue
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url, params=params)
+            timings.append(time.perf_counter() - started)
+        recorder.add("api", route.path, statistics.median(timings), _rows(response, transactions))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("group", choices=["etl", "ds", "api"])
+    parser.add_argument("--scale", type=int, required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--list-limit", type=int, default=10_000)
+    args = parser.parse_args()
+
+    recorder = Recorder(args.out, args.scale)
+    if args.group == "etl":
+        run_etl(recorder, args.seed)
+    elif args.group == "ds":
+        run_ds(recorder)
+    else:
+        run_api(recorder, args.repeat, args.list_limit)
+
+
+if __name__ == "__main__":
+    main()
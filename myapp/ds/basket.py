@@ -0,0 +1,152 @@
+# basket_pairs_pipeline.py
+
+"""
+Market-basket analysis: which menu items are bought together.
+
+Line items form a sparse transactions × items incidence matrix X, with a 1 where a
+transaction contains an item (however many units). Xᵀ·X is the item × item co-occurrence
+matrix: entry (i, j) counts the transactions holding both items and the diagonal counts each
+item's transactions. Both matrices stay sparse, so memory grows with the number of line items
+and distinct pairs, never with transactions × items.
+
+For every pair seen in at least BASKET_MIN_PAIR_COUNT transactions:
+- confidence(i → j) = count(i, j) / count(i)
+- lift(i, j) = count(i, j) · N / (count(i) · count(j)), with N transactions that have items
+The BASKET_TOP_K companions of each item with the highest lift (ties broken by confidence)
+are published to PUT /api/menu_item_pairs/, replacing the previous set.
+
+Configuration (environment):
+- BASKET_TOP_K: Companions kept per item (default 5)
+- BASKET_MIN_PAIR_COUNT: Transactions a pair must appear in to be kept (default 2)
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import data_access
+import profiling
+from http_client import client
+
+MENU_PAIRS_ENDPOINT = "/menu_item_pairs/"
+TOP_K = int(os.getenv("BASKET_TOP_K", "5"))
+MIN_PAIR_COUNT = int(os.getenv("BASKET_MIN_PAIR_COUNT", "2"))
+
+
+def build_incidence(transaction_ids: np.ndarray, item_ids: np.ndarray) -> sparse.csr_matrix:
+    """
+    Build the transactions × items incidence matrix from line items.
+    Args:
+        transaction_ids (np.ndarray): Transaction of each line item.
+        item_ids (np.ndarray): Item of each line item.
+    Returns:
+        sparse.csr_matrix: int32 matrix indexed by transaction_id and item_id, with a 1 for
+        every item a transaction contains; repeated lines of one item count once.
+    """
+    shape = (int(transaction_ids.max()) + 1, int(item_ids.max()) + 1) if len(item_ids) else (0, 0)
+    ones = np.ones(len(item_ids), dtype=np.int32)
+    incidence = sparse.coo_matrix((ones, (transaction_ids, item_ids)), shape=shape).tocsr()
+    # Converting to CSR sums duplicate entries; presence is all that counts
+    incidence.data[:] = 1
+    return incidence
+
+
+def score_pairs(incidence: sparse.csr_matrix, min_count: int = MIN_PAIR_COUNT) -> pd.DataFrame:
+    """
+    Count co-occurrences of every pair of items and score them.
+    Args:
+        incidence (sparse.csr_matrix): Transactions × items incidence matrix.
+        min_count (int): Transactions a pair must appear in to be kept.
+    Returns:
+        pd.DataFrame: One row per ordered pair (item_id, companion_item_id) with pair_count,
+        confidence and lift.
+    """
+    transactions = int(np.count_nonzero(np.diff(incidence.indptr)))
+    cooccurrence = (incidence.T.tocsr() @ incidence).tocoo()
+    item_counts = cooccurrence.diagonal().astype(np.float64)
+
+    keep = (cooccurrence.row != cooccurrence.col) & (cooccurrence.data >= min_count)
+    items = cooccurrence.row[keep]
+    companions = cooccurrence.col[keep]
+    pair_counts = cooccurrence.data[keep]
+    confidence = pair_counts / item_counts[items]
+    lift = confidence * transactions / item_counts[companions]
+    return pd.DataFrame({
+        "item_id": items,
+        "companion_item_id": companions,
+        "pair_count": pair_counts,
+        "confidence": confidence,
+        "lift": lift,
+    })
+
+
+def top_companions(pairs: pd.DataFrame, top_k: int = TOP_K) -> pd.DataFrame:
+    """
+    Keep the top_k companions of each item, by lift and then confidence.
+    Args:
+        pairs (pd.DataFrame): Scored pairs from `score_pairs`.
+        top_k (int): Companions kept per item.
+    Returns:
+        pd.DataFrame: The kept pairs ordered by item and rank, with a 1-based rank column.
+    """
+    # lexsort sorts by its last key first: item, then highest lift, then highest confidence
+    order = np.lexsort((-pairs["confidence"].to_numpy(), -pairs["lift"].to_numpy(), pairs["item_id"].to_numpy()))
+    ranked = pairs.iloc[order].reset_index(drop=True)
+    items = ranked["item_id"].to_numpy()
+    ranked["rank"] = np.arange(len(ranked)) - np.searchsorted(items, items, side="left") + 1
+    return ranked[ranked["rank"] <= top_k]
+
+
+@profiling.profiled("basket_pairs")
+def run_basket_pairs():
+    # 1) Read only the ids of every line item
+    with profiling.stage("fetch") as stage:
+        df_items = data_access.read_table("fact_transaction_items", ["transaction_id", "item_id"]).dropna()
+        stage.rows(rows_out=len(df_items))
+
+    # 2) Incidence matrix and its co-occurrences, sparse throughout
+    with profiling.stage("aggregate") as stage:
+        incidence = build_incidence(
+            df_items["transaction_id"].to_numpy(dtype=np.int32),
+            df_items["item_id"].to_numpy(dtype=np.int32),
+        )
+        del df_items
+        pairs = score_pairs(incidence)
+        stage.rows(rows_in=incidence.nnz, rows_out=len(pairs))
+
+    # 3) Rank the companions of each item
+    with profiling.stage("score") as stage:
+        top = top_companions(pairs)
+        records = [
+            {
+                "item_id": int(item_id),
+                "companion_item_id": int(companion_id),
+                "rank": int(rank),
+                "pair_count": int(pair_count),
+                "confidence": float(confidence),
+                "lift": float(lift),
+            }
+            for item_id, companion_id, rank, pair_count, confidence, lift in zip(
+                top["item_id"], top["companion_item_id"], top["rank"],
+                top["pair_count"], top["confidence"], top["lift"],
+            )
+        ]
+        stage.rows(rows_in=len(pairs), rows_out=len(records))
+
+    # 4) Publish every item's companions in one call
+    with profiling.stage("publish") as stage:
+        resp = client.put(MENU_PAIRS_ENDPOINT, json={"pairs": records})
+        stage.rows(rows_in=len(records))
+    if resp.ok:
+        result = resp.json()
+        print(f"✅ Published {result['published']} item pairs for {len(result['item_ids'])} items.")
+    else:
+        print("❌ Publish failed:", resp.status_code, resp.text)
+
+    print("Done.")
+
+# ✅ Allow direct script execution too
+if __name__ == "__main__":
+    run_basket_pairs()
@@ -0,0 +1,163 @@
+"""
+Table reads for the DS jobs, from the API, the database or a Parquet snapshot.
+
+DS_DATA_SOURCE selects the source:
+- "api" (default): the API's NDJSON export and list endpoints
+- "db": the database at DATABASE_URL, read through a server-side cursor in chunks of
+  DS_READ_CHUNK_ROWS rows (default 100000), so large jobs skip JSON entirely
+- "snapshot": Parquet files in SNAPSHOT_DIR (the default when SNAPSHOT_DIR is set)
+
+Whatever the source, `read_table` returns only the requested columns with the same compact
+dtypes: 32/16-bit integer ids, pyarrow-backed strings, UTC timestamps and `datetime.time` slots.
+"""
+
+import os
+from datetime import time
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import column as sql_column, create_engine, select, table as sql_table
+
+import profiling
+import snapshot
+from http_client import client
+
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
+
+DATA_SOURCE = os.getenv("DS_DATA_SOURCE", "snapshot" if snapshot.SNAPSHOT_DIR else "api")
+CHUNK_ROWS = int(os.getenv("DS_READ_CHUNK_ROWS", "100000"))
+
+# Endpoint serving each table in full; exports stream NDJSON, the others return a JSON list
+API_ENDPOINTS = {
+    "fact_transactions": ("/transactions/export", True),
+    "fact_transaction_items": ("/fact_transaction_items/export", True),
+    "dim_users": ("/users/export", True),
+    "dim_menu_daytimes": ("/dim_menu_daytimes/", False),
+}
+
+# Compact dtypes; nullable integer types where the column may hold NULLs
+DTYPES = {
+    "fact_transactions": {
+        "transaction_id": "int32",
+        "mobile_id": "string[pyarrow]",
+        "table_id": "Int16",
+        "time_id": "Int32",
+        "total_amount": "float64",
+    },
+    "fact_transaction_items": {
+        "id": "int32",
+        "transaction_id": "Int32",
+        "item_id": "Int16",
+        "quantity": "Int16",
+        "price": "float32",
+    },
+    "dim_users": {
+        "mobile_id": "string[pyarrow]",
+        "notes": "string[pyarrow]",
+    },
+    "dim_menu_daytimes": {
+        "daytime_id": "int16",
+        "daytime_label": "string[pyarrow]",
+    },
+}
+TIMESTAMP_COLUMNS = {"fact_transactions": ["created_at"]}
+TIME_COLUMNS = {"dim_menu_daytimes": ["start_time", "end_time"]}
+
+_engine = None
+
+
+def get_engine():
+    """SQLAlchemy engine for DATABASE_URL, created on first use."""
+    global _engine
+    if _engine is None:
+        url = os.getenv("DATABASE_URL")
+        if not url:
+            raise ValueError("DATABASE_URL is not set; it is required for DS_DATA_SOURCE=db")
+        _engine = create_engine(url)
+    return _engine
+
+
+def _as_time(value) -> Optional[time]:
+    if value is None or isinstance(value, time) or pd.isna(value):
+        return value
+    return time.fromisoformat(value)
+
+
+def compact(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """Cast a table's columns to their compact dtypes, whichever source they came from."""
+    dtypes = {name: dtype for name, dtype in DTYPES.get(table, {}).items() if name in df.columns}
+    df = df.astype(dtypes)
+    for name in TIMESTAMP_COLUMNS.get(table, []):
+        if name in df.columns:
+            # API timestamps omit the fraction when it is zero, so one format does not fit all
+            df[name] = pd.to_datetime(df[name], utc=True, format="ISO8601")
+    for name in TIME_COLUMNS.get(table, []):
+        if name in df.columns:
+            df[name] = df[name].map(_as_time)
+    return df
+
+
+def iter_db_chunks(table: str, columns: List[str], chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read columns of a table from the database in chunks.
+
+    Rows are fetched through a server-side cursor (stream_results), so at most one chunk
+    is held in memory besides the chunks already yielded.
+    """
+    stmt = select(*[sql_column(name) for name in columns]).select_from(sql_table(table))
+    with get_engine().connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows)
+        for chunk in pd.read_sql(stmt, conn, chunksize=chunk_rows):
+            yield compact(chunk, table)
+
+
+def _read_api(table: str, columns: List[str]) -> pd.DataFrame:
+    path, ndjson = API_ENDPOINTS[table]
+    records = client.get_ndjson(path) if ndjson else client.get_json(path)
+    return pd.DataFrame(records, columns=columns)
+
+
+def read_table(table: str, columns: List[str], source: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read columns of a table into a DataFrame with compact dtypes.
+    Args:
+        table (str): Table name, e.g. "fact_transactions".
+        columns (List[str]): Columns to read.
+        source (str, optional): "api", "db" or "snapshot". Defaults to DS_DATA_SOURCE.
+    Returns:
+        pd.DataFrame: The requested columns, in the order given.
+    """
+    source = source or DATA_SOURCE
+    if source == "db":
+        # Chunks are typed as they arrive, so parsing is part of the fetch here
+        with profiling.stage(f"fetch:{table}") as stage:
+            chunks = list(iter_db_chunks(table, columns))
+            df = pd.concat(chunks, ignore_index=True) if chunks else compact(pd.DataFrame(columns=columns), table)
+            stage.rows(rows_out=len(df))
+        return df
+    if source == "snapshot":
+        read = lambda: snapshot.read_table(snapshot.SNAPSHOT_DIR, table, columns=columns)
+    elif source == "api":
+        read = lambda: _read_api(table, columns)
+    else:
+        raise ValueError(f"Unknown DS_DATA_SOURCE {source!r}")
+    with profiling.stage(f"fetch:{table}") as stage:
+        df = read()
+        stage.rows(rows_out=len(df))
+    with profiling.stage(f"parse:{table}") as stage:
+        df = compact(df, table)
+        stage.rows(rows_in=len(df), rows_out=len(df))
+    return df
+
+
+def read_tables(tables: Dict[str, List[str]], source: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Read several tables (name -> columns) with `read_table`, concurrently.
+
+    Each table is read on its own thread, so API requests and database queries overlap.
+    """
+    return client.fetch_many({
+        table: (lambda table=table, columns=columns: read_table(table, columns, source))
+        for table, columns in tables.items()
+    })
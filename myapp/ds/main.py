@@ -1,6 +1,10 @@
 from recomendation import run_menu_recommendations
 from modeling import run_rfm_pipeline
+from basket import run_basket_pairs
+from personalization import run_user_recommendations
 
 
 run_rfm_pipeline()
-run_menu_recommendations()
\ No newline at end of file
+run_menu_recommendations()
+run_basket_pairs()
+run_user_recommendations()
\ No newline at end of file
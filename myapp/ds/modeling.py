@@ -1,43 +1,82 @@
 
-import requests
+import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
-API_BASE = "http://api:8000/api"
-RFMS_ENDPOINT = f"{API_BASE}/rfm_segments/"
+import data_access
+import profiling
+from http_client import client
 
+RFMS_ENDPOINT = "/rfm_segments/"
+RFMS_BULK_ENDPOINT = "/rfm_segments/bulk"
+RFMS_RECOMPUTE_ENDPOINT = "/rfm_segments/recompute"
+RFMS_REFRESH_ENDPOINT = "/rfm_segments/refresh"
+# "incremental" folds new transactions into running aggregates, "sql" recomputes all of
+# history inside the database, "pandas" downloads history and scores it here
+RFM_ENGINE = os.getenv("RFM_ENGINE", "incremental")
+UPLOAD_CHUNK_SIZE = 5000
+
+@profiling.profiled("rfm_pipeline")
 def run_rfm_pipeline():
-    users = requests.get(f"{API_BASE}/users/").json()
-    txns  = requests.get(f"{API_BASE}/transactions/").json()
-
-    df_users = pd.DataFrame(users)
-    df_transactions = pd.DataFrame(txns)
-    df_transactions["created_at"] = pd.to_datetime(df_transactions["created_at"])
-
-    df = df_transactions.merge(df_users, on="mobile_id", how="inner")
-
-    rfm_base = (
-        df.groupby("mobile_id")
-          .agg(
-              last_transaction_date=("created_at", "max"),
-              frequency=("transaction_id", "nunique"),
-              monetary=("total_amount", "sum")
-          )
-          .reset_index()
-    )
-    rfm_base["last_transaction_date"] = pd.to_datetime(rfm_base["last_transaction_date"], errors="coerce")
-
-    rfm_base["recency_days"] = (
-            pd.Timestamp.now(tz='UTC').normalize() - rfm_base["last_transaction_date"]
-    ).dt.days
+    if RFM_ENGINE == "incremental":
+        # Safe to retry: the watermark makes a repeated refresh fold in nothing twice
+        with profiling.stage("publish") as stage:
+            resp = client.post(RFMS_REFRESH_ENDPOINT, idempotent=True)
+            resp.raise_for_status()
+            result = resp.json()
+            stage.rows(rows_in=result["new_transactions"], rows_out=result["written"])
+        print(f"Folded in {result['new_transactions']} transactions, "
+              f"wrote {result['written']} changed records.")
+        print('Done')
+        return
+
+    if RFM_ENGINE == "sql":
+        with profiling.stage("publish") as stage:
+            resp = client.post(RFMS_RECOMPUTE_ENDPOINT)
+            resp.raise_for_status()
+            stage.rows(rows_out=resp.json()["written"])
+        print(f"Recomputed {resp.json()['written']} records in the database.")
+        print('Done')
+        return
+
+    with profiling.stage("fetch") as stage:
+        tables = data_access.read_tables({
+            "dim_users": ["mobile_id"],
+            "fact_transactions": ["transaction_id", "mobile_id", "total_amount", "created_at"],
+        })
+        df_users = tables["dim_users"]
+        df_transactions = tables["fact_transactions"]
+        stage.rows(rows_out=len(df_users) + len(df_transactions))
+
+    with profiling.stage("join") as stage:
+        df = df_transactions.merge(df_users, on="mobile_id", how="inner")
+        stage.rows(rows_in=len(df_transactions), rows_out=len(df))
+
+    with profiling.stage("aggregate") as stage:
+        rfm_base = (
+            df.groupby("mobile_id")
+              .agg(
+                  last_transaction_date=("created_at", "max"),
+                  frequency=("transaction_id", "nunique"),
+                  monetary=("total_amount", "sum")
+              )
+              .reset_index()
+        )
+        rfm_base["last_transaction_date"] = pd.to_datetime(rfm_base["last_transaction_date"], errors="coerce")
+
+        rfm_base["recency_days"] = (
+                pd.Timestamp.now(tz='UTC').normalize() - rfm_base["last_transaction_date"]
+        ).dt.days
+        stage.rows(rows_in=len(df), rows_out=len(rfm_base))
 
     rfm = rfm_base[["mobile_id", "recency_days", "frequency", "monetary"]]
 
     def rfm_score_segment_fast(df):
         df = df.copy()
         df['R_rank'] = df['recency_days'].rank(method='first', ascending=True)
-        df['F_rank'] = df['frequency'].rank(method='first', ascending=False)
-        df['M_rank'] = df['monetary'].rank(method='first', ascending=False)
+        df['F_rank'] = df['frequency'].rank(method='first', ascending=True)
+        df['M_rank'] = df['monetary'].rank(method='first', ascending=True)
 
         df['R_score'] = pd.qcut(df['R_rank'], 5, labels=[5,4,3,2,1]).astype(int)
         df['F_score'] = pd.qcut(df['F_rank'], 5, labels=[1,2,3,4,5]).astype(int)
@@ -56,26 +95,37 @@ def run_rfm_pipeline():
           (df['F_score']>=4)
         ]
         labels = ['Champions','Loyal Customers','Recent Customers','Frequent Buyers']
-        df['segment'] = 'Others'
-        for cond, lbl in zip(conditions, labels):
-            df.loc[cond, 'segment'] = lbl
+        # first matching rule wins, same as the CASE used by the SQL engine
+        df['segment'] = np.select(conditions, labels, default='Others')
 
         return df.drop(columns=['R_rank','F_rank','M_rank'])
 
-    rfm_result = rfm_score_segment_fast(rfm)
-
-    # 4) Stamp with creation time
-    now_ts = datetime.utcnow().isoformat()
-    rfm_result['date_created'] = now_ts
-
-    # 5) Push into your rfm_segments API
-    failures = []
-    for rec in rfm_result.to_dict(orient="records"):
-        resp = requests.post(RFMS_ENDPOINT, json=rec)
-        if not resp.ok:
-            failures.append((rec['mobile_id'], resp.status_code, resp.text))
-
-    print(f"Uploaded {len(rfm_result) - len(failures)} records.")
+    with profiling.stage("score") as stage:
+        rfm_result = rfm_score_segment_fast(rfm)
+
+        # 4) Stamp with creation time
+        now_ts = datetime.utcnow().isoformat()
+        rfm_result['date_created'] = now_ts
+        stage.rows(rows_in=len(rfm), rows_out=len(rfm_result))
+
+    # 5) Push into your rfm_segments API in a few large bulk requests, several at a time;
+    #    rows are upserted on (mobile_id, date_created), so retrying a chunk is safe
+    with profiling.stage("publish") as stage:
+        records = rfm_result.to_dict(orient="records")
+        chunks = [records[start:start + UPLOAD_CHUNK_SIZE] for start in range(0, len(records), UPLOAD_CHUNK_SIZE)]
+        failures = []
+        uploaded = 0
+        for chunk, resp in zip(chunks, client.post_many(RFMS_BULK_ENDPOINT, chunks, idempotent=True)):
+            if not resp.ok:
+                failures.extend((rec['mobile_id'], resp.status_code, resp.text) for rec in chunk)
+                continue
+            result = resp.json()
+            uploaded += result["written"]
+            for err in result["errors"]:
+                failures.append((chunk[err["index"]]['mobile_id'], resp.status_code, err["detail"]))
+        stage.rows(rows_in=len(records), rows_out=uploaded)
+
+    print(f"Uploaded {uploaded} records.")
     if failures:
         print("Failures:")
         for fail in failures:
@@ -0,0 +1,263 @@
+"""
+Stage-level profiling for the DS pipelines.
+
+A pipeline function decorated with `@profiled("name")` becomes a profiled run, and each
+`with stage("join") as s:` block inside it is timed as one stage. A stage records wall time,
+rows in and out (set with `s.rows(...)`), rows/sec and, for top-level stages, peak memory.
+When the run ends a JSON report is written to DS_PROFILE_DIR and a summary is printed.
+
+Stages may nest (e.g. per-table reads inside "fetch", which run on several threads). Nested
+stages report time and rows only, since their memory peaks overlap with their parent's.
+
+Configuration (environment):
+- DS_PROFILE: Profile pipeline runs, "true" or "false" (default false). When off, `stage`
+  returns a shared no-op context manager, so instrumented code costs a function call per stage.
+- DS_PROFILE_DIR: Directory for reports and dumps (default "profiles")
+- DS_PROFILE_TRACEMALLOC: Also record the peak of Python allocations with tracemalloc, which
+  slows allocation-heavy code down, "true" or "false" (default false)
+- DS_PROFILE_DUMP: Write a profile per top-level stage: "cprofile" (.prof, for snakeviz or
+  pstats) or "pyinstrument" (.html, if pyinstrument is installed); empty for none (default)
+"""
+
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Iterator, List, Optional
+
+try:
+    from pyinstrument import Profiler as Pyinstrument
+except ImportError:
+    Pyinstrument = None
+
+
+def _flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+ENABLED = _flag("DS_PROFILE", False)
+PROFILE_DIR = os.getenv("DS_PROFILE_DIR", "profiles")
+TRACEMALLOC = _flag("DS_PROFILE_TRACEMALLOC", False)
+DUMP = os.getenv("DS_PROFILE_DUMP", "").strip().lower()
+
+
+def _reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB (since the last reset on Linux)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+class _NullStage:
+    """Stage used when profiling is off; every method is a no-op."""
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def rows(self, rows_in: Optional[int] = None, rows_out: Optional[int] = None) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Stage:
+    """One timed stage of a run."""
+
+    def __init__(self, run: "Run", name: str, top_level: bool, record: dict):
+        self.run = run
+        self.name = name
+        self.top_level = top_level
+        self.record = record
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        self._profiler = None
+
+    def rows(self, rows_in: Optional[int] = None, rows_out: Optional[int] = None) -> None:
+        """Record the rows the stage consumed and produced."""
+        if rows_in is not None:
+            self.rows_in = int(rows_in)
+        if rows_out is not None:
+            self.rows_out = int(rows_out)
+
+    def __enter__(self) -> "Stage":
+        if self.top_level:
+            _reset_peak_rss()
+            if TRACEMALLOC:
+                tracemalloc.reset_peak()
+            self._profiler = self.run.start_dump()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        seconds = time.perf_counter() - self._started
+        record = self.record
+        record.update(seconds=round(seconds, 6), rows_in=self.rows_in, rows_out=self.rows_out, rows_per_sec=None)
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        if rows and seconds > 0:
+            record["rows_per_sec"] = round(rows / seconds, 1)
+        if self.top_level:
+            record["peak_rss_mb"] = round(peak_rss_mb(), 1)
+            if TRACEMALLOC:
+                record["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+            self.run.stop_dump(self._profiler, self.name)
+        self.run.finish(self)
+
+
+class Run:
+    """A profiled pipeline run collecting stage records."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: List[dict] = []
+        self.current_top: Optional[str] = None
+        self._lock = threading.Lock()
+        self.file_prefix = os.path.join(PROFILE_DIR, f"{name}-{self.started_at:%Y%m%d-%H%M%S}")
+
+    def stage(self, name: str) -> Stage:
+        # Records are listed in start order, so nested stages follow their parent
+        record = {"name": name}
+        with self._lock:
+            top_level = self.current_top is None
+            if top_level:
+                self.current_top = name
+            else:
+                record["parent"] = self.current_top
+            self.stages.append(record)
+        return Stage(self, name, top_level, record)
+
+    def finish(self, stage: Stage) -> None:
+        if stage.top_level:
+            with self._lock:
+                self.current_top = None
+
+    def start_dump(self):
+        if DUMP == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        if DUMP == "pyinstrument" and Pyinstrument is not None:
+            profiler = Pyinstrument()
+            profiler.start()
+            return profiler
+        return None
+
+    def stop_dump(self, profiler, stage_name: str) -> None:
+        if profiler is None:
+            return
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            profiler.dump_stats(f"{self.file_prefix}-{stage_name}.prof")
+        else:
+            profiler.stop()
+            with open(f"{self.file_prefix}-{stage_name}.html", "w") as f:
+                f.write(profiler.output_html())
+
+    def report(self, seconds: float) -> dict:
+        return {
+            "pipeline": self.name,
+            "started_at": self.started_at.isoformat(),
+            "seconds": round(seconds, 6),
+            "settings": {
+                name: os.environ[name]
+                for name in ("DS_DATA_SOURCE", "RFM_ENGINE", "DS_READ_CHUNK_ROWS", "API_CONCURRENCY")
+                if name in os.environ
+            },
+            "tracemalloc": TRACEMALLOC,
+            "dump": DUMP or None,
+            "stages": self.stages,
+        }
+
+
+# The run in progress; the DS jobs run one pipeline at a time
+_active: Optional[Run] = None
+
+
+def stage(name: str):
+    """
+    Context manager timing one stage of the active run.
+    Returns a no-op stage when profiling is off or no run is active.
+    """
+    run = _active
+    if run is None:
+        return _NULL_STAGE
+    return run.stage(name)
+
+
+def _print_summary(report: dict) -> None:
+    print(f"Profile of {report['pipeline']}: {report['seconds']:.3f}s")
+    for record in report["stages"]:
+        indent = "    " if "parent" in record else "  "
+        rate = f"{record['rows_per_sec']:>12,.0f} rows/s" if record["rows_per_sec"] else " " * 19
+        memory = f"  {record['peak_rss_mb']:.0f} MiB RSS" if "peak_rss_mb" in record else ""
+        if "traced_peak_mb" in record:
+            memory += f", {record['traced_peak_mb']:.0f} MiB traced"
+        print(f"{indent}{record['name']:<32} {record['seconds']:>9.3f}s {rate}{memory}")
+
+
+@contextmanager
+def profile_run(name: str) -> Iterator[Optional[Run]]:
+    """
+    Profile everything inside the block as run `name` and write its report.
+    Yields the Run, or None when profiling is off.
+    """
+    global _active
+    if not ENABLED or _active is not None:
+        yield None
+        return
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    started_tracing = TRACEMALLOC and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    run = _active = Run(name)
+    started = time.perf_counter()
+    try:
+        yield run
+    finally:
+        _active = None
+        if started_tracing:
+            tracemalloc.stop()
+        report = run.report(time.perf_counter() - started)
+        path = f"{run.file_prefix}.json"
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        _print_summary(report)
+        print(f"Profile report written to {path}")
+
+
+def profiled(name: str) -> Callable:
+    """Decorator running a pipeline function inside `profile_run(name)`."""
+    def decorate(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_run(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,88 +1,122 @@
 # menu_recommendations_pipeline.py
 
-from typing import Optional
-import requests
+import numpy as np
 import pandas as pd
-from datetime import datetime, time
 
-API_BASE             = "http://api:8000/api"
-TXNS_ENDPOINT        = f"{API_BASE}/transactions/"
-TXN_ITEMS_ENDPOINT   = f"{API_BASE}/fact_transaction_items/"
-DAYTIMES_ENDPOINT    = f"{API_BASE}/dim_menu_daytimes/"
-MENU_RECS_ENDPOINT   = f"{API_BASE}/menu_recommendations/"
+import data_access
+import profiling
+from http_client import client
 
-def run_menu_recommendations():
-    # 1) Fetch data from your APIs
-    txns      = requests.get(TXNS_ENDPOINT).json()
-    items     = requests.get(TXN_ITEMS_ENDPOINT).json()
-    daytimes  = requests.get(DAYTIMES_ENDPOINT).json()
+MENU_RECS_ENDPOINT   = "/menu_recommendations/"
+MINUTE_INDEX_ENDPOINT = "/dim_menu_daytimes/minute_index"
+
+MINUTES_PER_DAY = 24 * 60
+
+def fetch_minute_slot_lookup() -> np.ndarray:
+    """
+    The API's minute-of-day → daytime_id index (api/daytime_index.py) as a 1440-entry array,
+    NaN where no slot covers the minute.
+    """
+    minutes = client.get_json(MINUTE_INDEX_ENDPOINT)["minutes"]
+    return np.array(minutes, dtype=float)
 
+def build_minute_slot_lookup(df_daytimes: pd.DataFrame) -> np.ndarray:
+    """
+    Build the same lookup as `fetch_minute_slot_lookup` from dim_menu_daytimes rows, for
+    DS_DATA_SOURCE=db/snapshot where the API is not read.
 
-    df_txns     = pd.DataFrame(txns)
-    df_items    = pd.DataFrame(items)
-    df_daytimes = pd.DataFrame(daytimes)
+    A slot covers every minute from start_time to end_time inclusive and may wrap past
+    midnight. Minutes outside every slot are NaN; where slots overlap the earlier row
+    wins, as with a first-match scan. These rules must stay those of
+    api/daytime_index.build_minute_index.
+    """
+    lookup = np.full(MINUTES_PER_DAY, np.nan)
+    slots = zip(df_daytimes["daytime_id"], df_daytimes["start_time"], df_daytimes["end_time"])
+    for daytime_id, start, end in reversed(list(slots)):
+        first = start.hour * 60 + start.minute
+        last = end.hour * 60 + end.minute
+        if first <= last:
+            lookup[first:last + 1] = daytime_id
+        else:
+            lookup[first:] = daytime_id
+            lookup[:last + 1] = daytime_id
+    return lookup
 
-    # 2) Parse timestamps and times
-    df_txns["created_at"]     = pd.to_datetime(df_txns["created_at"])
-    df_daytimes["start_time"] = pd.to_datetime(df_daytimes["start_time"], format="%H:%M:%S").dt.time
-    df_daytimes["end_time"] = pd.to_datetime(df_daytimes["end_time"], format="%H:%M:%S").dt.time
+def assign_daytime_slots(timestamps: pd.Series, lookup: np.ndarray) -> np.ndarray:
+    """Vectorized daytime_id for each timestamp via its minute of day (NaN if unassigned)."""
+    minutes = (timestamps.dt.hour * 60 + timestamps.dt.minute).to_numpy()
+    return lookup[minutes]
+
+@profiling.profiled("menu_recommendations")
+def run_menu_recommendations():
+    # 1-2) Read the needed columns concurrently, already typed (see data_access.DS_DATA_SOURCE)
+    # The API serves the slot lookup itself; other sources build it from the slots
+    from_api = data_access.DATA_SOURCE == "api"
+    with profiling.stage("fetch") as stage:
+        columns = {
+            "fact_transactions": ["transaction_id", "created_at"],
+            "fact_transaction_items": ["transaction_id", "item_id", "quantity"],
+        }
+        if not from_api:
+            columns["dim_menu_daytimes"] = ["daytime_id", "start_time", "end_time"]
+        tables = data_access.read_tables(columns)
+        df_txns     = tables["fact_transactions"]
+        df_items    = tables["fact_transaction_items"]
+        if from_api:
+            slot_lookup = fetch_minute_slot_lookup()
+        else:
+            slot_lookup = build_minute_slot_lookup(tables["dim_menu_daytimes"])
+        stage.rows(rows_out=len(df_txns) + len(df_items))
 
     # 3) Join transactions ⇆ items
-    df = (
-        df_items
-          .merge(
-             df_txns[["transaction_id", "created_at"]],
-             on="transaction_id",
-             how="inner"
-          )
-    )
-    df["order_time"] = df["created_at"].dt.time
-
-    # 4) Assign each sale to a daytime slot
-    def assign_daytime_slot(t: time) -> Optional[int]:
-        """
-        Return the daytime_id whose start_time ≤ t ≤ end_time,
-        or None if no slot matches.
-        """
-        for _, row in df_daytimes.iterrows():
-            if row["start_time"] <= t <= row["end_time"]:
-                return row["daytime_id"]
-        return None
-
-    df["daytime_id"] = df["order_time"].apply(assign_daytime_slot)
-    df = df.dropna(subset=["daytime_id"])  # drop sales outside defined slots
-
-    # 5) Aggregate popularity per slot + item
-    popularity = (
-        df.groupby(["daytime_id", "item_id"])
-          .agg(total_sold=("quantity", "sum"))
-          .reset_index()
-    )
-
-    # 6) For each slot, pick & rank top 5 items and POST to your API
-    failures = []
-    for dt in popularity["daytime_id"].unique():
+    with profiling.stage("join") as stage:
+        df = (
+            df_items
+              .merge(
+                 df_txns[["transaction_id", "created_at"]],
+                 on="transaction_id",
+                 how="inner"
+              )
+        )
+        stage.rows(rows_in=len(df_items), rows_out=len(df))
+
+    with profiling.stage("aggregate") as stage:
+        # 4) Assign each sale to a daytime slot with the minute-of-day lookup
+        df["daytime_id"] = assign_daytime_slots(df["created_at"], slot_lookup)
+        df = df.dropna(subset=["daytime_id"])  # drop sales outside defined slots
+
+        # 5) Aggregate popularity per slot + item
+        popularity = (
+            df.groupby(["daytime_id", "item_id"])
+              .agg(total_sold=("quantity", "sum"))
+              .reset_index()
+        )
+        stage.rows(rows_in=len(df), rows_out=len(popularity))
+
+    # 6) For each slot, pick & rank top 5 items and publish the whole ranking in one call
+    with profiling.stage("score") as stage:
         top5 = (
-            popularity[popularity["daytime_id"] == dt]
-              .sort_values("total_sold", ascending=False)
+            popularity
+              .sort_values(["daytime_id", "total_sold"], ascending=[True, False], kind="stable")
+              .groupby("daytime_id")
               .head(5)
-              .reset_index(drop=True)
         )
-        for rank, row in top5.iterrows():
-            payload = {
-                "menu_item_id": int(row["item_id"]),
-                "daytime_id":   int(dt),
-                "rank":         int(rank + 1)
-            }
-            resp = requests.post(MENU_RECS_ENDPOINT, json=payload)
-            if not resp.ok:
-                failures.append((dt, row["item_id"], resp.status_code, resp.text))
-
-    print(f"✅ Uploaded {len(popularity['daytime_id'].unique())*5 - len(failures)} recommendations.")
-    if failures:
-        print("❌ Failures:")
-        for f in failures:
-            print("  slot:", f[0], "item:", f[1], "→", f[2], f[3])
+        top5["rank"] = top5.groupby("daytime_id").cumcount() + 1
+        recommendations = [
+            {"menu_item_id": int(item_id), "daytime_id": int(dt), "rank": int(rank)}
+            for item_id, dt, rank in zip(top5["item_id"], top5["daytime_id"], top5["rank"])
+        ]
+        stage.rows(rows_in=len(popularity), rows_out=len(recommendations))
+
+    with profiling.stage("publish") as stage:
+        resp = client.put(MENU_RECS_ENDPOINT, json={"recommendations": recommendations})
+        stage.rows(rows_in=len(recommendations))
+    if resp.ok:
+        result = resp.json()
+        print(f"✅ Published {result['published']} recommendations "
+              f"for {len(result['daytime_ids'])} daytime slots.")
+    else:
+        print("❌ Publish failed:", resp.status_code, resp.text)
 
     print("Done.")
 
@@ -0,0 +1,32 @@
+"""
+Read the Parquet snapshots written by the ETL (etl/snapshot.py) straight from disk.
+
+Files are memory-mapped, so DS jobs start from a snapshot directory without calling the API
+or the database. Set SNAPSHOT_DIR to the directory to read from.
+"""
+
+import json
+import os
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+
+def read_manifest(directory: str) -> dict:
+    """Read a snapshot manifest, rejecting format versions this reader does not know."""
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')!r} in {directory}")
+    return manifest
+
+
+def read_table(directory: str, table: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a table (optionally only some columns) from a snapshot via a memory map."""
+    entry = read_manifest(directory)["tables"][table]
+    return pq.read_table(os.path.join(directory, entry["file"]), columns=columns, memory_map=True).to_pandas()
@@ -1,214 +1,478 @@
-from faker import Faker
 import pandas as pd
-import random
-from datetime import datetime, time
+import numpy as np
+import multiprocessing
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+from typing import Iterator, Optional, Tuple
 from loguru import logger
 
-fake = Faker()
 logger.add(lambda msg: print(msg), level="INFO")
 
-
-def generate_dim_user(mobile_id: str) -> dict:
+# Realistic menu catalog by category
+MENU_CATALOG = {
+    "Coffee": ["Espresso", "Americano", "Cappuccino", "Latte", "Mocha", "Flat White"],
+    "Tea": ["Black Tea", "Green Tea", "Herbal Tea", "Oolong Tea", "Chamomile"],
+    "Pastry": ["Croissant", "Blueberry Muffin", "Chocolate Donut", "Baklava", "Cherry Tart"],
+    "Sandwich": ["Club Sandwich", "Panini", "BLT", "Turkey Wrap", "Grilled Cheese"],
+    "Smoothie": ["Strawberry Banana Smoothie", "Green Detox Smoothie", "Mango Lassi"],
+    "Juice": ["Orange Juice", "Apple Juice", "Carrot Ginger Juice", "Beetroot Juice"],
+    "Salad": ["Caesar Salad", "Greek Salad", "Quinoa Salad", "Caprese Salad"],
+    "Soup": ["Tomato Basil Soup", "Chicken Noodle Soup", "Mushroom Soup", "Lentil Soup"],
+    "Breakfast": ["Pancakes", "French Toast", "Omelette", "Avocado Toast"],
+    "Snack": ["Fruit Bowl", "Yogurt Parfait", "Granola Bar", "Nachos"],
+    "Alcohol": ["Red Wine", "White Wine", "Local Beer", "Mojito", "Whiskey Sour"],
+    "Non‑Alcoholic": ["Sparkling Water", "Lemonade", "Iced Tea", "Soft Drink"],
+    "Specialty": ["Affogato", "Turkish Coffee", "Matcha Latte", "Chai Latte"]
+}
+PRICE_RANGES = {
+    "Coffee": (2.5, 5.0), "Tea": (1.5, 4.0), "Pastry": (1.0, 3.5),
+    "Sandwich": (4.0, 8.0), "Smoothie": (3.5, 6.5), "Juice": (2.5, 5.0),
+    "Salad": (3.5, 7.0), "Soup": (3.0, 6.0), "Breakfast": (5.0, 10.0),
+    "Snack": (1.0, 4.0), "Alcohol": (4.0, 12.0), "Non‑Alcoholic": (1.0, 3.0),
+    "Specialty": (3.0, 7.0)
+}
+TAG_TYPES = ["WiFi", "Menu", "Review"]
+CAMPAIGN_SEGMENTS = ["High Value", "At Risk", "New", "Promising"]
+CAMPAIGN_NAMES = [
+    "Double Points Week", "Smoothie Sunday", "Happy Hour Promo", "Loyalty Launch",
+    "Review & Reward", "VIP Tasting Event", "Menu Discovery Week"
+]
+CAMPAIGN_DESCRIPTIONS = [
+    "Get 2x points on all coffee orders", "Free dessert with lunch combos",
+    "Special discounts for new members", "Win-back offer for past visitors",
+    "Try our new seasonal menu and earn points"
+]
+# Hard-coded daytime definitions (dim_menu_daytimes)
+MENU_DAYTIMES = [
+    {"daytime_id":  1, "daytime_label": "Early Breakfast",         "start_time": time(4,  0), "end_time": time(6, 29)},
+    {"daytime_id":  2, "daytime_label": "Standard Breakfast",      "start_time": time(6, 30), "end_time": time(10,29)},
+    {"daytime_id":  3, "daytime_label": "Late Breakfast / Brunch", "start_time": time(10,30),"end_time": time(12,29)},
+    {"daytime_id":  4, "daytime_label": "Lunch",                   "start_time": time(12,30),"end_time": time(14,29)},
+    {"daytime_id":  5, "daytime_label": "Late Lunch",              "start_time": time(14,30),"end_time": time(16,29)},
+    {"daytime_id":  6, "daytime_label": "Afternoon Tea / Snack",   "start_time": time(16,30),"end_time": time(17,59)},
+    {"daytime_id":  7, "daytime_label": "Early Dinner",            "start_time": time(18, 0), "end_time": time(19,29)},
+    {"daytime_id":  8, "daytime_label": "Standard Dinner",         "start_time": time(19,30),"end_time": time(21,29)},
+    {"daytime_id":  9, "daytime_label": "Late Dinner / Supper",    "start_time": time(21,30),"end_time": time(23,59)},
+    {"daytime_id": 10, "daytime_label": "Midnight Snack",          "start_time": time(0,  0), "end_time": time(1, 59)},
+    {"daytime_id": 11, "daytime_label": "Closed / No Service",     "start_time": time(2,  0), "end_time": time(3, 59)},
+]
+# Window that engagement and transaction timestamps are drawn from, ending now
+ACTIVITY_WINDOW = timedelta(days=90)
+MAX_ITEMS_PER_TRANSACTION = 3
+# Rows per generated chunk of the user and fact tables
+CHUNK_ROWS = 100_000
+# Stable per-table ids that chunk seeds are derived from; never renumber
+TABLE_STREAMS = {
+    "dim_users": 0,
+    "dim_tables": 1,
+    "dim_time": 2,
+    "dim_menu_items": 3,
+    "nfc_engagements": 4,
+    "fact_transactions": 5,
+    "fact_transaction_items": 6,
+    "marketing_campaigns": 7,
+}
+
+
+def resolve_seed(seed: Optional[int]) -> int:
+    """Return `seed`, or fresh entropy when it is None, so every chunk derives from one master seed."""
+    return np.random.SeedSequence().entropy if seed is None else seed
+
+
+def chunk_rng(seed: int, table: str, chunk: int = 0) -> np.random.Generator:
     """
-    Generate a user record for the dimension table.
+    Random generator for one chunk of one table, independent of every other chunk.
     Args:
-        mobile_id (str): Unique mobile ID.
+        seed (int): Master seed.
+        table (str): Table name (a key of TABLE_STREAMS).
+        chunk (int, optional): Chunk index within the table. Defaults to 0.
     Returns:
-        dict: Dictionary with user data.
+        np.random.Generator: Generator seeded from (seed, table, chunk).
     """
-    return {"mobile_id": mobile_id, "notes": ""}
-
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(TABLE_STREAMS[table], chunk)))
 
 
-def generate_dim_table(table_id: int) -> dict:
+def random_uuids(rng: np.random.Generator, n: int) -> np.ndarray:
     """
-    Generate a table record with NFC tags.
+    Generate version-4 UUID strings from random bytes, without a Python loop.
     Args:
-        table_id (int): Unique table ID.
+        rng (np.random.Generator): Random generator.
+        n (int): Number of UUIDs.
     Returns:
-        dict: Dictionary with table data including NFC tags.
+        np.ndarray: Array of n UUID strings ("xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx").
     """
-    return {
-        "table_id": table_id,
-        "nfc_wifi_tag": fake.uuid4(),
-        "nfc_menu_tag": fake.uuid4(),
-        "nfc_review_tag": fake.uuid4()
-    }
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    hex_chars = np.frombuffer(raw.tobytes().hex().encode("ascii"), dtype="S1").reshape(n, 32)
+    dashed = np.insert(hex_chars, [8, 12, 16, 20], b"-", axis=1)
+    return np.ascontiguousarray(dashed).view("S36").ravel().astype(str)
 
 
-def generate_dim_time(time_id: int,
-                      start_date: datetime = datetime(2024, 1, 1),
-                      end_date: datetime = datetime(2024, 12, 31)) -> dict:
+def random_timestamps(rng: np.random.Generator, n: int, end: datetime, window: timedelta) -> np.ndarray:
     """
-    Generate a time dimension record with random date attributes.
+    Draw timestamps uniformly from (end - window, end] as int64 microsecond offsets.
     Args:
-        time_id (int): Unique time ID.
-        start_date (datetime, optional): Start of date range. Defaults to 2024-01-01.
-        end_date (datetime, optional): End of date range. Defaults to 2024-12-31.
+        rng (np.random.Generator): Random generator.
+        n (int): Number of timestamps.
+        end (datetime): Latest possible timestamp.
+        window (timedelta): Length of the period to draw from.
     Returns:
-        dict: Dictionary with time attributes (date, day, month, year, weekend flag).
+        np.ndarray: datetime64[us] array of n timestamps.
     """
-    # pick a random day in the year
-    rand_day = fake.date_between(start_date=start_date, end_date=end_date)
-    return {
-        "time_id": time_id,
-        "date": rand_day,
-        "day_of_week": rand_day.strftime("%A"),
-        "month": rand_day.month,
-        "year": rand_day.year,
-        "is_weekend": rand_day.weekday() >= 5
-    }
+    span_us = int(window / timedelta(microseconds=1))
+    offsets = rng.integers(0, span_us, size=n, dtype=np.int64, endpoint=True)
+    return np.datetime64(end, "us") - offsets.astype("timedelta64[us]")
+
+
+def random_prices(rng: np.random.Generator, low, high, n: int) -> np.ndarray:
+    """Uniform prices between low and high, rounded to cents."""
+    return np.round(rng.uniform(low, high, size=n), 2)
 
 
-def generate_dim_menu_item(item_id: int) -> dict:
+def generate_dim_users(rng: np.random.Generator, n_users: int) -> pd.DataFrame:
     """
-    Generate a menu item record with category, name, and price.
+    Generate the user dimension.
     Args:
-        item_id (int): Unique menu item ID.
+        rng (np.random.Generator): Random generator.
+        n_users (int): Number of users.
     Returns:
-        dict: Dictionary with menu item details.
+        pd.DataFrame: mobile_id, notes.
     """
-    # Realistic menu catalog by category
-    menu_catalog = {
-        "Coffee": ["Espresso", "Americano", "Cappuccino", "Latte", "Mocha", "Flat White"],
-        "Tea": ["Black Tea", "Green Tea", "Herbal Tea", "Oolong Tea", "Chamomile"],
-        "Pastry": ["Croissant", "Blueberry Muffin", "Chocolate Donut", "Baklava", "Cherry Tart"],
-        "Sandwich": ["Club Sandwich", "Panini", "BLT", "Turkey Wrap", "Grilled Cheese"],
-        "Smoothie": ["Strawberry Banana Smoothie", "Green Detox Smoothie", "Mango Lassi"],
-        "Juice": ["Orange Juice", "Apple Juice", "Carrot Ginger Juice", "Beetroot Juice"],
-        "Salad": ["Caesar Salad", "Greek Salad", "Quinoa Salad", "Caprese Salad"],
-        "Soup": ["Tomato Basil Soup", "Chicken Noodle Soup", "Mushroom Soup", "Lentil Soup"],
-        "Breakfast": ["Pancakes", "French Toast", "Omelette", "Avocado Toast"],
-        "Snack": ["Fruit Bowl", "Yogurt Parfait", "Granola Bar", "Nachos"],
-        "Alcohol": ["Red Wine", "White Wine", "Local Beer", "Mojito", "Whiskey Sour"],
-        "Non‑Alcoholic": ["Sparkling Water", "Lemonade", "Iced Tea", "Soft Drink"],
-        "Specialty": ["Affogato", "Turkish Coffee", "Matcha Latte", "Chai Latte"]
-    }
-    category = random.choice(list(menu_catalog.keys()))
-    item_name = random.choice(menu_catalog[category])
-    price_ranges = {
-        "Coffee": (2.5, 5.0), "Tea": (1.5, 4.0), "Pastry": (1.0, 3.5),
-        "Sandwich": (4.0, 8.0), "Smoothie": (3.5, 6.5), "Juice": (2.5, 5.0),
-        "Salad": (3.5, 7.0), "Soup": (3.0, 6.0), "Breakfast": (5.0, 10.0),
-        "Snack": (1.0, 4.0), "Alcohol": (4.0, 12.0), "Non-Alcoholic": (1.0, 3.0),
-        "Specialty": (3.0, 7.0)
-    }
-    low, high = price_ranges.get(category, (2.0, 6.0))
-    price = round(random.uniform(low, high), 2)
-
-    return {
-        "item_id": item_id,
-        "menu_item_name": item_name,
-        "price": price,
-        "category": category
-    }
+    return pd.DataFrame({"mobile_id": random_uuids(rng, n_users), "notes": ""})
 
 
-def generate_nfc_engagement(engagement_id: int, mobile_pool: list[str]) -> dict:
+def generate_dim_tables(rng: np.random.Generator, n_tables: int) -> pd.DataFrame:
     """
-    Generate a random NFC engagement record.
+    Generate table records with NFC tags.
     Args:
-        engagement_id (int): Unique engagement ID.
-        mobile_pool (list[str]): List of available mobile IDs.
+        rng (np.random.Generator): Random generator.
+        n_tables (int): Number of tables.
     Returns:
-        dict: Dictionary with NFC engagement data.
+        pd.DataFrame: table_id and the three NFC tag ids per table.
     """
-    return {
-        "engagement_id": engagement_id,
-        "table_id": random.randint(1, 10),
-        "tag_type": random.choice(["WiFi", "Menu", "Review"]),
-        "mobile_id": random.choice(mobile_pool),
-        "engagement_time": fake.date_time_between(start_date="-3M", end_date="now")
-    }
+    return pd.DataFrame({
+        "table_id": np.arange(1, n_tables + 1),
+        "nfc_wifi_tag": random_uuids(rng, n_tables),
+        "nfc_menu_tag": random_uuids(rng, n_tables),
+        "nfc_review_tag": random_uuids(rng, n_tables),
+    })
 
 
-def generate_fact_transaction(transaction_id: int, mobile_pool: list[str]) -> dict:
+def generate_dim_time(rng: np.random.Generator,
+                      n_days: int,
+                      start_date: datetime = datetime(2024, 1, 1),
+                      end_date: datetime = datetime(2024, 12, 31)) -> pd.DataFrame:
     """
-    Generate a transaction record for the fact table.
+    Generate time dimension records with random dates and their attributes.
     Args:
-        transaction_id (int): Unique transaction ID.
-        mobile_pool (list[str]): List of available mobile IDs.
+        rng (np.random.Generator): Random generator.
+        n_days (int): Number of time records.
+        start_date (datetime, optional): Start of date range. Defaults to 2024-01-01.
+        end_date (datetime, optional): End of date range. Defaults to 2024-12-31.
     Returns:
-        dict: Dictionary with transaction data.
+        pd.DataFrame: time_id, date, day_of_week, month, year, is_weekend.
     """
-    return {
-        "transaction_id": transaction_id,
-        "mobile_id": random.choice(mobile_pool),
-        "table_id": random.randint(1, 10),
-        "time_id": random.randint(1, 365),
-        "total_amount": round(random.uniform(5.0, 200.0), 2),
-        "created_at": fake.date_time_between(start_date="-3M", end_date="now")
-    }
+    span = (end_date - start_date).days
+    dates = pd.DatetimeIndex(
+        np.datetime64(start_date, "D") + rng.integers(0, span, size=n_days, endpoint=True)
+    )
+    return pd.DataFrame({
+        "time_id": np.arange(1, n_days + 1),
+        "date": dates.date,
+        "day_of_week": dates.day_name(),
+        "month": dates.month,
+        "year": dates.year,
+        "is_weekend": dates.dayofweek >= 5,
+    })
+
+
+def generate_dim_menu_items(rng: np.random.Generator, n_menu_items: int) -> pd.DataFrame:
+    """
+    Generate menu items with a category, a name from that category and a price in its range.
+    Args:
+        rng (np.random.Generator): Random generator.
+        n_menu_items (int): Number of menu items.
+    Returns:
+        pd.DataFrame: item_id, menu_item_name, price, category.
+    """
+    categories = np.array(list(MENU_CATALOG))
+    sizes = np.array([len(names) for names in MENU_CATALOG.values()])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    names = np.array([name for names in MENU_CATALOG.values() for name in names])
+    low, high = np.array([PRICE_RANGES[category] for category in categories]).T
+
+    category = rng.integers(0, len(categories), size=n_menu_items)
+    name = offsets[category] + (rng.random(n_menu_items) * sizes[category]).astype(np.int64)
+    return pd.DataFrame({
+        "item_id": np.arange(1, n_menu_items + 1),
+        "menu_item_name": names[name],
+        "price": random_prices(rng, low[category], high[category], n_menu_items),
+        "category": categories[category],
+    })
+
+
+def generate_nfc_engagements(rng: np.random.Generator, n_nfc: int, mobile_pool: np.ndarray,
+                             n_tables: int, now: datetime, first_id: int = 1) -> pd.DataFrame:
+    """
+    Generate NFC engagement events over the activity window.
+    Args:
+        rng (np.random.Generator): Random generator.
+        n_nfc (int): Number of engagements.
+        mobile_pool (np.ndarray): Available mobile IDs.
+        n_tables (int): Number of tables.
+        now (datetime): End of the activity window.
+        first_id (int, optional): engagement_id of the first row. Defaults to 1.
+    Returns:
+        pd.DataFrame: engagement_id, table_id, tag_type, mobile_id, engagement_time.
+    """
+    return pd.DataFrame({
+        "engagement_id": np.arange(first_id, first_id + n_nfc),
+        "table_id": rng.integers(1, n_tables, size=n_nfc, endpoint=True),
+        "tag_type": np.array(TAG_TYPES)[rng.integers(0, len(TAG_TYPES), size=n_nfc)],
+        "mobile_id": mobile_pool[rng.integers(0, len(mobile_pool), size=n_nfc)],
+        "engagement_time": random_timestamps(rng, n_nfc, now, ACTIVITY_WINDOW),
+    })
 
 
-def generate_fact_transaction_item(transaction_id: int, item_id: int) -> dict:
+def generate_fact_transactions(rng: np.random.Generator, n_tx: int, mobile_pool: np.ndarray,
+                               n_tables: int, n_days: int, now: datetime, first_id: int = 1) -> pd.DataFrame:
     """
-    Generate a transaction item record linking a transaction to menu items.
+    Generate transactions over the activity window.
     Args:
-        transaction_id (int): ID of the related transaction.
-        item_id (int): ID of the purchased item.
+        rng (np.random.Generator): Random generator.
+        n_tx (int): Number of transactions.
+        mobile_pool (np.ndarray): Available mobile IDs.
+        n_tables (int): Number of tables.
+        n_days (int): Number of time dimension records.
+        now (datetime): End of the activity window.
+        first_id (int, optional): transaction_id of the first row. Defaults to 1.
     Returns:
-        dict: Dictionary with transaction item data.
+        pd.DataFrame: transaction_id, mobile_id, table_id, time_id, total_amount, created_at.
     """
-    return {
-        "transaction_id": transaction_id,
-        "item_id": item_id,
-        "quantity": random.randint(1, 4),
-        "price": round(random.uniform(1.5, 15.0), 2)
-    }
-
+    return pd.DataFrame({
+        "transaction_id": np.arange(first_id, first_id + n_tx),
+        "mobile_id": mobile_pool[rng.integers(0, len(mobile_pool), size=n_tx)],
+        "table_id": rng.integers(1, n_tables, size=n_tx, endpoint=True),
+        "time_id": rng.integers(1, n_days, size=n_tx, endpoint=True),
+        "total_amount": random_prices(rng, 5.0, 200.0, n_tx),
+        "created_at": random_timestamps(rng, n_tx, now, ACTIVITY_WINDOW),
+    })
+
+
+def generate_fact_transaction_items(rng: np.random.Generator, transaction_ids: np.ndarray,
+                                    n_menu_items: int) -> pd.DataFrame:
+    """
+    Generate 1-3 line items with distinct menu items for every transaction.
 
-def generate_marketing_campaign(campaign_id: int, max_time_id: int = 365) -> dict:
+    Distinct items are drawn without a per-row sample: the second and third draws come from
+    a range one and two smaller and are shifted past the items already taken.
+    Args:
+        rng (np.random.Generator): Random generator.
+        transaction_ids (np.ndarray): Transactions to generate items for.
+        n_menu_items (int): Number of menu items.
+    Returns:
+        pd.DataFrame: transaction_id, item_id, quantity, price.
     """
-    Generate a marketing campaign record.
+    n = len(transaction_ids)
+    per_tx = min(MAX_ITEMS_PER_TRANSACTION, n_menu_items)
+    counts = np.minimum(rng.integers(1, MAX_ITEMS_PER_TRANSACTION, size=n, endpoint=True), per_tx)
+
+    first = rng.integers(0, n_menu_items, size=n)
+    second = rng.integers(0, max(n_menu_items - 1, 1), size=n)
+    third = rng.integers(0, max(n_menu_items - 2, 1), size=n)
+    second += second >= first
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    third += third >= low
+    third += third >= high
+    picks = np.stack([first, second, third], axis=1)[:, :per_tx] + 1
+
+    taken = np.arange(per_tx) < counts[:, None]
+    n_lines = int(taken.sum())
+    return pd.DataFrame({
+        "transaction_id": np.repeat(transaction_ids, counts),
+        "item_id": picks[taken],
+        "quantity": rng.integers(1, 4, size=n_lines, endpoint=True),
+        "price": random_prices(rng, 1.5, 15.0, n_lines),
+    })
+
+
+def generate_marketing_campaigns(rng: np.random.Generator, n_campaigns: int,
+                                 max_time_id: int = 365) -> pd.DataFrame:
+    """
+    Generate marketing campaigns spanning a random range of time IDs.
     Args:
-        campaign_id (int): Unique campaign ID.
+        rng (np.random.Generator): Random generator.
+        n_campaigns (int): Number of campaigns.
         max_time_id (int, optional): Maximum time ID available. Defaults to 365.
     Returns:
-        dict: Dictionary with marketing campaign data.
+        pd.DataFrame: campaign_id, name, start_time_id, end_time_id, target_segment, description.
     """
-    start = random.randint(1, max_time_id - 1)
-    end = random.randint(start, max_time_id)
-    segments = ["High Value", "At Risk", "New", "Promising"]
+    start = rng.integers(1, max_time_id - 1, size=n_campaigns, endpoint=True)
+    return pd.DataFrame({
+        "campaign_id": np.arange(1, n_campaigns + 1),
+        "name": rng.choice(CAMPAIGN_NAMES, size=n_campaigns),
+        "start_time_id": start,
+        "end_time_id": rng.integers(start, max_time_id, endpoint=True),
+        "target_segment": rng.choice(CAMPAIGN_SEGMENTS, size=n_campaigns),
+        "description": rng.choice(CAMPAIGN_DESCRIPTIONS, size=n_campaigns),
+    })
 
-    campaign_names = [
-        "Double Points Week", "Smoothie Sunday", "Happy Hour Promo", "Loyalty Launch",
-        "Review & Reward", "VIP Tasting Event", "Menu Discovery Week"
-    ]
 
-    descriptions = [
-        "Get 2x points on all coffee orders", "Free dessert with lunch combos",
-        "Special discounts for new members", "Win-back offer for past visitors",
-        "Try our new seasonal menu and earn points"
+def _chunk_sizes(total: int, chunk_rows: int) -> Iterator[Tuple[int, int, int]]:
+    """Yield (chunk index, first 1-based row number, row count) covering `total` rows."""
+    for index, start in enumerate(range(0, total, chunk_rows)):
+        yield index, start + 1, min(chunk_rows, total - start)
+
+
+def mobile_pool_for(seed: int, n_users: int, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """Rebuild the mobile_id pool of a stream from its seed, exactly as the dim_users chunks generate it."""
+    parts = [
+        generate_dim_users(chunk_rng(seed, "dim_users", chunk), size)["mobile_id"].to_numpy()
+        for chunk, _, size in _chunk_sizes(n_users, chunk_rows)
     ]
+    return np.concatenate(parts) if parts else np.array([], dtype=str)
+
+
+def generate_fact_chunk(task: Tuple[str, int, int, int], context: dict) -> list[Tuple[str, pd.DataFrame]]:
+    """
+    Generate one shard of the fact tables.
+    Args:
+        task (Tuple[str, int, int, int]): (table, chunk index, first id, row count).
+        context (dict): seed, mobile_pool, n_tables, n_days, n_menu_items and now.
+    Returns:
+        list[Tuple[str, pd.DataFrame]]: The chunk, plus its line items for a transaction chunk.
+    """
+    table, chunk, first_id, size = task
+    rng = chunk_rng(context["seed"], table, chunk)
+    if table == "nfc_engagements":
+        return [(table, generate_nfc_engagements(
+            rng, size, context["mobile_pool"], context["n_tables"], context["now"], first_id
+        ))]
+    transactions = generate_fact_transactions(
+        rng, size, context["mobile_pool"], context["n_tables"], context["n_days"], context["now"], first_id
+    )
+    items = generate_fact_transaction_items(
+        chunk_rng(context["seed"], "fact_transaction_items", chunk),
+        transactions["transaction_id"].to_numpy(),
+        context["n_menu_items"],
+    )
+    return [(table, transactions), ("fact_transaction_items", items)]
 
-    return {
-        "campaign_id": campaign_id,
-        "name": random.choice(campaign_names),
-        "start_time_id": start,
-        "end_time_id": end,
-        "target_segment": random.choice(segments),
-        "description": random.choice(descriptions)
-    }
 
+# Per-process context of shard workers, set once by _init_worker
+_worker_context: dict = {}
 
-def generate_dim_menu_daytimes() -> list[dict]:
+
+def _init_worker(context: dict, n_users: int, chunk_rows: int) -> None:
+    _worker_context.update(context, mobile_pool=mobile_pool_for(context["seed"], n_users, chunk_rows))
+
+
+def _generate_in_worker(task: Tuple[str, int, int, int]) -> list[Tuple[str, pd.DataFrame]]:
+    return generate_fact_chunk(task, _worker_context)
+
+
+def _generate_fact_chunks(tasks: list, context: dict, n_users: int, chunk_rows: int,
+                          workers: int) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Run fact shards serially or on a process pool, yielding results in task order.
+
+    At most two shards per worker are in flight, so a slow consumer bounds memory.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield from generate_fact_chunk(task, context)
+        return
+
+    shared = {key: value for key, value in context.items() if key != "mobile_pool"}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(shared, n_users, chunk_rows),
+    ) as executor:
+        pending = deque()
+        try:
+            for task in tasks:
+                pending.append(executor.submit(_generate_in_worker, task))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def generate_chunks(
+        n_tables: int = 10,
+        n_days: int = 365,
+        n_menu_items: int = 50,
+        n_users: int = 100,
+        n_nfc: int = 100,
+        n_tx: int = 300,
+        n_campaigns: int = 5,
+        seed: Optional[int] = None,
+        chunk_rows: int = CHUNK_ROWS,
+        workers: int = 1,
+        as_of: Optional[datetime] = None
+) -> Iterator[Tuple[str, pd.DataFrame]]:
     """
-    Hard-coded daytime definitions (dim_menu_daytimes).
+    Generate the dataset as a stream of (table name, DataFrame chunk) pairs.
+
+    Dimensions come first and each transaction chunk is followed by its line items, so
+    loading chunks in the order they arrive never breaks a foreign key. Every chunk has
+    its own generator derived from (seed, table, chunk index), and only the mobile_id
+    pool is kept across chunks, so memory stays flat however many rows are generated.
+
+    Fact chunks (nfc_engagements, fact_transactions, fact_transaction_items) are ID-range
+    shards that can be generated on `workers` processes. Because each shard's generator
+    depends only on the seed and its chunk index, the output is identical for any number
+    of workers.
+    Args:
+        n_tables .. n_campaigns: Table sizes, as in `simulate_all`.
+        seed (int, optional): Master seed. Defaults to fresh entropy.
+        chunk_rows (int, optional): Maximum rows per chunk. Defaults to CHUNK_ROWS.
+        workers (int, optional): Processes generating fact shards. Defaults to 1 (in-process).
+        as_of (datetime, optional): End of the activity window. Defaults to now; pass a fixed
+            value together with `seed` to reproduce a dataset exactly.
+    Yields:
+        Tuple[str, pd.DataFrame]: Table name and a chunk of its rows.
     """
-    return [
-        {"daytime_id":  1, "daytime_label": "Early Breakfast",         "start_time": time(4,  0), "end_time": time(6, 29)},
-        {"daytime_id":  2, "daytime_label": "Standard Breakfast",      "start_time": time(6, 30), "end_time": time(10,29)},
-        {"daytime_id":  3, "daytime_label": "Late Breakfast / Brunch", "start_time": time(10,30),"end_time": time(12,29)},
-        {"daytime_id":  4, "daytime_label": "Lunch",                   "start_time": time(12,30),"end_time": time(14,29)},
-        {"daytime_id":  5, "daytime_label": "Late Lunch",              "start_time": time(14,30),"end_time": time(16,29)},
-        {"daytime_id":  6, "daytime_label": "Afternoon Tea / Snack",   "start_time": time(16,30),"end_time": time(17,59)},
-        {"daytime_id":  7, "daytime_label": "Early Dinner",            "start_time": time(18, 0), "end_time": time(19,29)},
-        {"daytime_id":  8, "daytime_label": "Standard Dinner",         "start_time": time(19,30),"end_time": time(21,29)},
-        {"daytime_id":  9, "daytime_label": "Late Dinner / Supper",    "start_time": time(21,30),"end_time": time(23,59)},
-        {"daytime_id": 10, "daytime_label": "Midnight Snack",          "start_time": time(0,  0), "end_time": time(1, 59)},
-        {"daytime_id": 11, "daytime_label": "Closed / No Service",     "start_time": time(2,  0), "end_time": time(3, 59)},
+    seed = resolve_seed(seed)
+    now = as_of or datetime.now()
+
+    # 1) users, whose ids form the shared mobile_id pool
+    pool_parts = []
+    for chunk, _, size in _chunk_sizes(n_users, chunk_rows):
+        users = generate_dim_users(chunk_rng(seed, "dim_users", chunk), size)
+        pool_parts.append(users["mobile_id"].to_numpy())
+        yield "dim_users", users
+    mobile_pool = np.concatenate(pool_parts) if pool_parts else np.array([], dtype=str)
+
+    # 2) dims
+    yield "dim_tables", generate_dim_tables(chunk_rng(seed, "dim_tables"), n_tables)
+    yield "dim_time", generate_dim_time(chunk_rng(seed, "dim_time"), n_days)
+    yield "dim_menu_items", generate_dim_menu_items(chunk_rng(seed, "dim_menu_items"), n_menu_items)
+    yield "dim_menu_daytimes", pd.DataFrame(MENU_DAYTIMES)
+
+    # 3) interactions, then transactions with each chunk followed by its bridge rows
+    tasks = [
+        ("nfc_engagements", *shard) for shard in _chunk_sizes(n_nfc, chunk_rows)
+    ] + [
+        ("fact_transactions", *shard) for shard in _chunk_sizes(n_tx, chunk_rows)
     ]
+    context = {
+        "seed": seed, "mobile_pool": mobile_pool, "n_tables": n_tables,
+        "n_days": n_days, "n_menu_items": n_menu_items, "now": now,
+    }
+    yield from _generate_fact_chunks(tasks, context, n_users, chunk_rows, workers)
+
+    # 4) campaigns
+    yield "marketing_campaigns", generate_marketing_campaigns(
+        chunk_rng(seed, "marketing_campaigns"), n_campaigns, max_time_id=n_days
+    )
 
 
 def simulate_all(
@@ -218,7 +482,10 @@ def simulate_all(
         n_users: int = 100,
         n_nfc: int = 100,
         n_tx: int = 300,
-        n_campaigns: int = 5
+        n_campaigns: int = 5,
+        seed: Optional[int] = None,
+        workers: int = 1,
+        as_of: Optional[datetime] = None
 ) -> dict[str, pd.DataFrame]:
     """
     Simulate the entire database with generated data.
@@ -230,44 +497,19 @@ def simulate_all(
         n_nfc (int, optional): Number of NFC engagement events. Defaults to 100.
         n_tx (int, optional): Number of transactions to generate. Defaults to 300.
         n_campaigns (int, optional): Number of marketing campaigns to generate. Defaults to 5.
+        seed (int, optional): Seed for reproducible output. Defaults to fresh entropy.
+        workers (int, optional): Processes generating fact shards. Defaults to 1.
+        as_of (datetime, optional): End of the activity window. Defaults to now.
     Returns:
         dict[str, pd.DataFrame]: Dictionary of DataFrames for each table.
     """
-    # 1) build a shared pool of mobile_ids
-    mobile_pool = [fake.uuid4() for _ in range(n_users)]
-    dim_users   = [generate_dim_user(m) for m in mobile_pool]
-
-    # 2) dims
-    dim_tables  = [generate_dim_table(i) for i in range(1, n_tables + 1)]
-    dim_time    = [generate_dim_time(i)  for i in range(1, n_days   + 1)]
-    dim_menu    = [generate_dim_menu_item(i) for i in range(1, n_menu_items + 1)]
-    dim_daytimes = generate_dim_menu_daytimes()
-
-    # 3) interactions & transactions
-    nfc_events   = [generate_nfc_engagement(i, mobile_pool) for i in range(1, n_nfc + 1)]
-    transactions = [generate_fact_transaction(i, mobile_pool)     for i in range(1, n_tx  + 1)]
-
-    # 4) bridge table
-    txn_items = []
-    for tx in transactions:
-        for item_id in random.sample(range(1, n_menu_items + 1), random.randint(1, 3)):
-            txn_items.append(generate_fact_transaction_item(tx["transaction_id"], item_id))
-
-    # 5) campaigns
-    campaigns = [generate_marketing_campaign(i, max_time_id=n_days) for i in range(1, n_campaigns + 1)]
-
-    # 6) pack into DataFrames
-    dfs = {
-        "dim_users":              pd.DataFrame(dim_users),
-        "dim_tables":             pd.DataFrame(dim_tables),
-        "dim_time":               pd.DataFrame(dim_time),
-        "dim_menu_items":         pd.DataFrame(dim_menu),
-        "dim_menu_daytimes":      pd.DataFrame(dim_daytimes),
-        "nfc_engagements":        pd.DataFrame(nfc_events),
-        "fact_transactions":      pd.DataFrame(transactions),
-        "fact_transaction_items": pd.DataFrame(txn_items),
-        "marketing_campaigns":    pd.DataFrame(campaigns),
-    }
+    chunks = defaultdict(list)
+    stream = generate_chunks(
+        n_tables, n_days, n_menu_items, n_users, n_nfc, n_tx, n_campaigns, seed, workers=workers, as_of=as_of
+    )
+    for table, df in stream:
+        chunks[table].append(df)
+    dfs = {table: pd.concat(parts, ignore_index=True) for table, parts in chunks.items()}
 
     # Log counts
     for name, df in dfs.items():
@@ -1,20 +1,24 @@
 """
-ETL Process: Generate synthetic data and load directly into database using SQLAlchemy models.
+ETL Process: Generate synthetic data and bulk-load it directly into the database.
 """
 
 import os
 import sys
+from datetime import datetime
 from loguru import logger
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
 # Set up paths and imports
 sys.path.append(os.path.dirname(__file__)) ####### DONT FORGET __file__ IN CASE of COPY  PASTE
-from data_generator import simulate_all
+from data_generator import generate_chunks, resolve_seed
 
 # 👇 Import your models & DB session
-from database import SessionLocal
+from database import SessionLocal, engine
 import models
+from loader import load_stream
+from rollups import refresh_rollups
+import snapshot
 
 # 🔑 Load DB connection string
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
@@ -31,80 +35,54 @@ N_USERS        = 100
 N_NFC          = 100
 N_TRANSACTIONS = 300
 N_CAMPAIGNS    = 5
-
-# === Start Data Generation ===
-logger.info("Starting data generation…")
-dfs = simulate_all(
-    n_tables=N_TABLES,
-    n_days=N_DAYS,
-    n_menu_items=N_MENU_ITEMS,
-    n_nfc=N_NFC,
-    n_tx=N_TRANSACTIONS,
-    n_campaigns=N_CAMPAIGNS
-)
-# === ORM-based data loader ===
+# Set ETL_SEED to make the generated dataset reproducible
+SEED           = int(os.environ["ETL_SEED"]) if os.getenv("ETL_SEED") else None
+# Processes generating the fact tables; the data is the same for any value
+WORKERS        = int(os.getenv("ETL_WORKERS", "1"))
+# Parquet snapshot directory: loaded from if it holds a snapshot, otherwise written while generating
+SNAPSHOT_DIR   = os.getenv("SNAPSHOT_DIR")
+
+# === Streaming generate-and-load ===
 def load_data():
     """
-    Loads synthetic data into the database using SQLAlchemy ORM models.
+    Generates synthetic data in chunks and bulk-loads it into the database as it is produced.
 
     This function:
-    - Converts pandas DataFrames into SQLAlchemy model objects
-    - Performs bulk inserts for each table
-    - Commits the session or rolls back on failure
+    - Generates each table in fixed-size chunks, dimensions first, in a background thread
+    - Streams each chunk into its table (COPY on PostgreSQL, executemany elsewhere)
+    - Commits after every chunk, or rolls back the failing chunk
+    - Folds the new transactions into the sales rollup tables
+
+    With SNAPSHOT_DIR set, an existing snapshot there is loaded instead of generating,
+    and otherwise the generated chunks are also written there as a new snapshot.
     """
-    logger.info("Starting data loading using SQLAlchemy models…")
-    db: Session = SessionLocal()
+    models.Base.metadata.create_all(bind=engine)
+
+    if SNAPSHOT_DIR and snapshot.has_snapshot(SNAPSHOT_DIR):
+        manifest = snapshot.read_manifest(SNAPSHOT_DIR)
+        logger.info(f"Loading snapshot {SNAPSHOT_DIR} (seed {manifest['seed']}, scale {manifest['scale']})…")
+        chunks = snapshot.iter_snapshot(SNAPSHOT_DIR)
+    else:
+        seed = resolve_seed(SEED)
+        as_of = datetime.now()
+        scale = {
+            "n_tables": N_TABLES,
+            "n_days": N_DAYS,
+            "n_menu_items": N_MENU_ITEMS,
+            "n_users": N_USERS,
+            "n_nfc": N_NFC,
+            "n_tx": N_TRANSACTIONS,
+            "n_campaigns": N_CAMPAIGNS,
+        }
+        logger.info(f"Starting data generation and loading (seed {seed})…")
+        chunks = generate_chunks(**scale, seed=seed, workers=WORKERS, as_of=as_of)
+        if SNAPSHOT_DIR:
+            chunks = snapshot.record(chunks, SNAPSHOT_DIR, seed=seed, scale=scale, as_of=as_of)
 
+    db: Session = SessionLocal()
     try:
-        # --- Load dim_users ---
-        users = [models.DimUser(**row) for row in dfs["dim_users"].to_dict(orient="records")]
-        db.bulk_save_objects(users)
-        logger.info(f"Inserted {len(users)} rows into dim_users")
-
-        # --- Load dim_tables ---
-        tables = [models.DimTable(**row) for row in dfs["dim_tables"].to_dict(orient="records")]
-        db.bulk_save_objects(tables)
-        logger.info(f"Inserted {len(tables)} rows into dim_tables")
-
-        # --- Load dim_time ---
-        times = [models.DimTime(**row) for row in dfs["dim_time"].to_dict(orient="records")]
-        db.bulk_save_objects(times)
-        logger.info(f"Inserted {len(times)} rows into dim_time")
-
-        # --- Load dim_menu_items ---
-        menu_items = [models.DimMenuItem(**row) for row in dfs["dim_menu_items"].to_dict(orient="records")]
-        db.bulk_save_objects(menu_items)
-        logger.info(f"Inserted {len(menu_items)} rows into dim_menu_items")
-
-        # --- Load dim_menu_daytimes ---
-        daytimes = [models.DimMenuDaytime(**row) for row in dfs["dim_menu_daytimes"].to_dict(orient="records")]
-        db.bulk_save_objects(daytimes)
-        logger.info(f"Inserted {len(daytimes)} rows into dim_menu_daytimes")
-
-        # --- Load nfc_engagements ---
-        engagements = [models.NfcEngagement(**row) for row in dfs["nfc_engagements"].to_dict(orient="records")]
-        db.bulk_save_objects(engagements)
-        logger.info(f"Inserted {len(engagements)} rows into nfc_engagements")
-
-        # --- Load fact_transactions ---
-        transactions = [models.FactTransaction(**row) for row in dfs["fact_transactions"].to_dict(orient="records")]
-        db.bulk_save_objects(transactions)
-        logger.info(f"Inserted {len(transactions)} rows into fact_transactions")
-
-        # --- Load fact_transaction_items ---
-        txn_items = [models.FactTransactionItem(**row) for row in dfs["fact_transaction_items"].to_dict(orient="records")]
-        db.bulk_save_objects(txn_items)
-        logger.info(f"Inserted {len(txn_items)} rows into fact_transaction_items")
-
-        # --- Load marketing_campaigns ---
-        campaigns = [models.MarketingCampaign(**row) for row in dfs["marketing_campaigns"].to_dict(orient="records")]
-        db.bulk_save_objects(campaigns)
-        logger.info(f"Inserted {len(campaigns)} rows into marketing_campaigns")
-
-        # ✅ COMMIT all
-        db.commit()
+        load_stream(db, chunks)
         logger.info("✅ All data successfully committed to the database.")
-
     except Exception as e:
         logger.error(f"❌ Error during data loading: {e}")
         db.rollback()
@@ -112,6 +90,16 @@ def load_data():
         db.close()
         logger.info("Database session closed.")
 
+    # Also after a failed load: the chunks it committed are in the fact tables already
+    db = SessionLocal()
+    try:
+        refresh_rollups(db)
+    except Exception as e:
+        logger.error(f"❌ Error during rollup refresh: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
 # === Run loader ===
 if __name__ == "__main__":
     load_data()
@@ -0,0 +1,220 @@
+"""
+Bulk loader: write DataFrames straight into their tables without building ORM objects.
+
+On PostgreSQL each DataFrame is streamed with COPY ... FROM STDIN in CSV chunks through the
+session's own connection, so the load stays in one transaction. Other databases (SQLite for
+local runs) fall back to chunked executemany INSERTs. Every table logs its rows/sec.
+
+`load_stream` consumes (table, chunk) pairs from a generator running in a background thread,
+committing each chunk, so generation and insertion overlap and memory stays bounded.
+"""
+
+import io
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Iterable, Tuple
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy import Integer, insert, text
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.dirname(__file__))
+import models
+
+# Rows per COPY buffer / executemany batch
+CHUNK_ROWS = int(os.getenv("ETL_CHUNK_ROWS", "100000"))
+# Generated chunks buffered ahead of the loader
+QUEUE_CHUNKS = int(os.getenv("ETL_QUEUE_CHUNKS", "4"))
+
+# Dimensions first, so every foreign key already exists when a fact row arrives
+LOAD_ORDER = [
+    models.DimUser,
+    models.DimTable,
+    models.DimTime,
+    models.DimMenuItem,
+    models.DimMenuDaytime,
+    models.NfcEngagement,
+    models.FactTransaction,
+    models.FactTransactionItem,
+    models.MarketingCampaign,
+]
+
+
+def _copy_frame(db: Session, table, df: pd.DataFrame) -> None:
+    """COPY a DataFrame into `table` in CSV chunks (PostgreSQL only)."""
+    columns = ", ".join(f'"{name}"' for name in df.columns)
+    # \N marks NULL so empty strings survive as empty strings
+    sql = f'COPY "{table.name}" ({columns}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')'
+    cursor = db.connection().connection.cursor()
+    try:
+        for start in range(0, len(df), CHUNK_ROWS):
+            buffer = io.StringIO()
+            df.iloc[start:start + CHUNK_ROWS].to_csv(buffer, index=False, header=False, na_rep="\\N")
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+
+
+def _insert_frame(db: Session, table, df: pd.DataFrame) -> None:
+    """Insert a DataFrame into `table` with chunked executemany INSERTs."""
+    stmt = insert(table)
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        db.execute(stmt, chunk.to_dict(orient="records"))
+
+
+def _reset_sequence(db: Session, table) -> None:
+    """
+    Move a serial primary key's sequence past the highest loaded ID (PostgreSQL only),
+    since rows loaded with explicit IDs do not advance it.
+    """
+    key = list(table.primary_key.columns)
+    if len(key) != 1 or not isinstance(key[0].type, Integer):
+        return
+    column = key[0].name
+    db.execute(text(
+        f"SELECT setval(pg_get_serial_sequence(:table, :column), COALESCE(MAX(\"{column}\"), 1), "
+        f"MAX(\"{column}\") IS NOT NULL) FROM \"{table.name}\""
+    ), {"table": table.name, "column": column})
+
+
+def _log_rate(name: str, rows: int, elapsed: float) -> None:
+    logger.info(f"Inserted {rows} rows into {name} in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def write_frame(db: Session, model, df: pd.DataFrame) -> int:
+    """
+    Write one DataFrame into the table of `model` without committing or logging.
+    Columns that are not in the table are ignored. Returns the number of rows written.
+    """
+    table = model.__table__
+    df = df[[column.name for column in table.columns if column.name in df.columns]]
+    if df.empty:
+        return 0
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_frame(db, table, df)
+    else:
+        _insert_frame(db, table, df)
+    return len(df)
+
+
+def reset_sequences(db: Session, models_loaded: Iterable) -> None:
+    """Move serial sequences past the IDs loaded into the given tables (PostgreSQL only)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for model in models_loaded:
+        _reset_sequence(db, model.__table__)
+
+
+def load_frame(db: Session, model, df: pd.DataFrame) -> int:
+    """
+    Bulk-load one DataFrame into the table of `model`.
+    Args:
+        db (Session): Open session; the caller commits.
+        model: ORM model of the target table.
+        df (pd.DataFrame): Rows to load; columns that are not in the table are ignored.
+    Returns:
+        int: Number of rows loaded.
+    """
+    started = time.perf_counter()
+    rows = write_frame(db, model, df)
+    if rows:
+        reset_sequences(db, [model])
+        _log_rate(model.__tablename__, rows, time.perf_counter() - started)
+    return rows
+
+
+def load_frames(db: Session, dfs: dict[str, pd.DataFrame]) -> int:
+    """
+    Bulk-load every generated table in foreign-key-safe order.
+    Args:
+        db (Session): Open session; the caller commits.
+        dfs (dict[str, pd.DataFrame]): DataFrames keyed by table name.
+    Returns:
+        int: Total number of rows loaded.
+    """
+    started = time.perf_counter()
+    total = sum(
+        load_frame(db, model, dfs[model.__tablename__])
+        for model in LOAD_ORDER
+        if model.__tablename__ in dfs
+    )
+    elapsed = time.perf_counter() - started
+    logger.info(f"Loaded {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
+
+
+def load_stream(db: Session, chunks: Iterable[Tuple[str, pd.DataFrame]], queue_size: int = QUEUE_CHUNKS) -> int:
+    """
+    Load (table name, DataFrame) chunks, committing after each one.
+
+    The chunk iterator runs in a background thread that stays at most `queue_size`
+    chunks ahead, so generating the next chunk overlaps with inserting the current one.
+    Chunks must arrive in foreign-key-safe order. A failure stops the producer and
+    re-raises; chunks committed before it stay in the database.
+    Args:
+        db (Session): Open session.
+        chunks (Iterable[Tuple[str, pd.DataFrame]]): Chunks to load, e.g. from data_generator.generate_chunks.
+        queue_size (int, optional): Chunks buffered ahead of the loader. Defaults to QUEUE_CHUNKS.
+    Returns:
+        int: Total number of rows loaded.
+    """
+    by_name = {model.__tablename__: model for model in LOAD_ORDER}
+    buffer: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in chunks:
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as exc:
+            put(exc)
+
+    producer = threading.Thread(target=produce, name="etl-generator", daemon=True)
+    started = time.perf_counter()
+    producer.start()
+    rows_by_table: dict = {}
+    seconds_by_table: dict = {}
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            name, df = item
+            chunk_started = time.perf_counter()
+            rows = write_frame(db, by_name[name], df)
+            db.commit()
+            rows_by_table[name] = rows_by_table.get(name, 0) + rows
+            seconds_by_table[name] = seconds_by_table.get(name, 0.0) + time.perf_counter() - chunk_started
+    finally:
+        stop.set()
+        producer.join()
+
+    reset_sequences(db, [by_name[name] for name in rows_by_table])
+    db.commit()
+    for name, rows in rows_by_table.items():
+        _log_rate(name, rows, seconds_by_table[name])
+    total = sum(rows_by_table.values())
+    elapsed = time.perf_counter() - started
+    logger.info(f"Loaded {total} rows in {elapsed:.2f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
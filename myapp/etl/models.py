@@ -1,6 +1,6 @@
 # models.py
 
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Time, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Time, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base  # Assuming you have Base from declarative_base()
@@ -8,13 +8,17 @@ from database import Base  # Assuming you have Base from declarative_base()
 # ---------- Fact Transactions ----------
 class FactTransaction(Base):
     __tablename__ = "fact_transactions"
+    __table_args__ = (
+        # Per-customer history in RFM and exports, newest first
+        Index("ix_fact_transactions_mobile_id_created_at", "mobile_id", "created_at"),
+    )
 
     transaction_id = Column(Integer, primary_key=True, index=True)
     mobile_id = Column(String, ForeignKey("dim_users.mobile_id"))
     table_id = Column(Integer, ForeignKey("dim_tables.table_id"))
-    time_id = Column(Integer, ForeignKey("dim_time.time_id"))
+    time_id = Column(Integer, ForeignKey("dim_time.time_id"), index=True)
     total_amount = Column(Float)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     items = relationship("FactTransactionItem", back_populates="transaction")
     user = relationship("DimUser", back_populates="transactions")
@@ -23,10 +27,14 @@ class FactTransaction(Base):
 # ---------- Fact Transaction Items ----------
 class FactTransactionItem(Base):
     __tablename__ = "fact_transaction_items"
+    __table_args__ = (
+        # Joins from transactions, covering the item for basket queries
+        Index("ix_fact_transaction_items_transaction_id_item_id", "transaction_id", "item_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     transaction_id = Column(Integer, ForeignKey("fact_transactions.transaction_id"))
-    item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"), index=True)
     quantity = Column(Integer)
     price = Column(Float)
 
@@ -57,6 +65,38 @@ class MenuRecommendation(Base):
     daytime = relationship("DimMenuDaytime")
 
 
+# ---------- Menu Item Pairs ----------
+class MenuItemPair(Base):
+    __tablename__ = "menu_item_pairs"
+    __table_args__ = (
+        # Companions of one item in rank order, read as a single index range
+        Index("ix_menu_item_pairs_item_id_rank", "item_id", "rank", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    companion_item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    rank = Column(Integer)
+    pair_count = Column(Integer)
+    confidence = Column(Float)
+    lift = Column(Float)
+
+    companion = relationship("DimMenuItem", foreign_keys=[companion_item_id])
+
+
+# ---------- User Menu Recommendations ----------
+class UserMenuRecommendation(Base):
+    __tablename__ = "user_menu_recommendations"
+
+    # The (mobile_id, rank) primary key serves one customer's list as a single index range
+    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    menu_item_id = Column(Integer, ForeignKey("dim_menu_items.item_id"))
+    score = Column(Float)
+
+    menu_item = relationship("DimMenuItem")
+
+
 # ---------- Dim Users ----------
 class DimUser(Base):
     __tablename__ = "dim_users"
@@ -72,6 +112,9 @@ class DimUser(Base):
 # ---------- RFM Segments ----------
 class RfmSegment(Base):
     __tablename__ = "rfm_segments"
+    __table_args__ = (
+        Index("uq_rfm_segments_mobile_date", "mobile_id", "date_created", unique=True),
+    )
 
     rfm_id = Column(Integer, primary_key=True, index=True)
     mobile_id = Column(String, ForeignKey("dim_users.mobile_id"))
@@ -88,6 +131,59 @@ class RfmSegment(Base):
     user = relationship("DimUser", back_populates="rfm_segments")
 
 
+# ---------- RFM Customer Stats ----------
+class RfmCustomerStat(Base):
+    __tablename__ = "rfm_customer_stats"
+
+    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"), primary_key=True, index=True)
+    last_transaction_date = Column(DateTime(timezone=True))
+    frequency = Column(Integer, nullable=False, default=0)
+    monetary = Column(Float, nullable=False, default=0.0)
+    RFM_score = Column(String, nullable=True)
+    segment = Column(String, nullable=True)
+
+
+# ---------- Pipeline Watermarks ----------
+class PipelineWatermark(Base):
+    __tablename__ = "pipeline_watermarks"
+
+    name = Column(String, primary_key=True, index=True)
+    last_transaction_id = Column(Integer, nullable=False, default=0)
+    last_created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# ---------- Sales Rollups ----------
+class SalesDailyTable(Base):
+    __tablename__ = "sales_daily_table"
+
+    date = Column(Date, primary_key=True)
+    table_id = Column(Integer, primary_key=True)
+    transactions = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Float, nullable=False, default=0.0)
+
+
+class SalesDailyItem(Base):
+    __tablename__ = "sales_daily_item"
+
+    date = Column(Date, primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Float, nullable=False, default=0.0)
+    line_count = Column(Integer, nullable=False, default=0)
+    price_sum = Column(Float, nullable=False, default=0.0)
+
+
+class SalesMonthly(Base):
+    __tablename__ = "sales_monthly"
+
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    transactions = Column(Integer, nullable=False, default=0)
+    total_sales = Column(Float, nullable=False, default=0.0)
+    items_sold = Column(Integer, nullable=False, default=0)
+
+
 # ---------- Marketing Campaigns ----------
 class MarketingCampaign(Base):
     __tablename__ = "marketing_campaigns"
@@ -128,12 +224,16 @@ class DimTable(Base):
 # ---------- NFC Engagements ----------
 class NfcEngagement(Base):
     __tablename__ = "nfc_engagements"
+    __table_args__ = (
+        # Engagement counts per tag type, optionally within a time range
+        Index("ix_nfc_engagements_tag_type_engagement_time", "tag_type", "engagement_time"),
+    )
 
     engagement_id = Column(Integer, primary_key=True, index=True)
-    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"))
+    mobile_id = Column(String, ForeignKey("dim_users.mobile_id"), index=True)
     table_id = Column(Integer, ForeignKey("dim_tables.table_id"))
     tag_type = Column(String)
-    engagement_time = Column(DateTime)
+    engagement_time = Column(DateTime, index=True)
 
     user = relationship("DimUser", back_populates="engagements")
     table = relationship("DimTable")
@@ -0,0 +1,141 @@
+"""
+Parquet snapshots of a generated dataset.
+
+A snapshot is a directory with one Parquet file per table plus a manifest.json recording
+the format version, row counts, seed, scale (table sizes) and activity-window end of the
+generation run. Loading a snapshot replays the same rows without regenerating them, and the
+DS jobs and notebook can memory-map the files directly.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+# Rows per Parquet row group when writing and per batch when reading back
+BATCH_ROWS = 100_000
+
+
+def has_snapshot(directory: str) -> bool:
+    """True if `directory` contains a complete snapshot (the manifest is written last)."""
+    return os.path.isfile(os.path.join(directory, MANIFEST_NAME))
+
+
+def read_manifest(directory: str) -> dict:
+    """
+    Read and validate a snapshot manifest.
+    Args:
+        directory (str): Snapshot directory.
+    Returns:
+        dict: The manifest.
+    """
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot version {manifest.get('version')!r} in {directory} "
+            f"(expected {SNAPSHOT_VERSION})"
+        )
+    return manifest
+
+
+class SnapshotWriter:
+    """
+    Write (table, DataFrame) chunks into a snapshot directory.
+
+    Each table gets one Parquet file whose schema is fixed by its first chunk; the
+    manifest is only written by `close()`, so an interrupted run never looks complete.
+    """
+
+    def __init__(self, directory: str, seed: Optional[int] = None, scale: Optional[dict] = None,
+                 as_of: Optional[datetime] = None):
+        self.directory = directory
+        self.seed = seed
+        self.scale = scale or {}
+        self.as_of = as_of
+        self._writers: dict = {}
+        self._rows: dict = {}
+        os.makedirs(directory, exist_ok=True)
+        manifest = os.path.join(directory, MANIFEST_NAME)
+        if os.path.exists(manifest):
+            os.remove(manifest)
+
+    def write(self, table: str, df: pd.DataFrame) -> None:
+        """Append a chunk of rows to the table's Parquet file."""
+        writer = self._writers.get(table)
+        batch = pa.Table.from_pandas(df, schema=writer.schema if writer else None, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(os.path.join(self.directory, f"{table}.parquet"), batch.schema)
+            self._writers[table] = writer
+        writer.write_table(batch, row_group_size=BATCH_ROWS)
+        self._rows[table] = self._rows.get(table, 0) + len(df)
+
+    def close(self) -> dict:
+        """Close every table file and write the manifest. Returns the manifest."""
+        for writer in self._writers.values():
+            writer.close()
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "seed": self.seed,
+            "scale": self.scale,
+            "as_of": self.as_of.isoformat() if self.as_of else None,
+            # In write order, which is foreign-key-safe for generated streams
+            "tables": {
+                table: {"file": f"{table}.parquet", "rows": rows}
+                for table, rows in self._rows.items()
+            },
+        }
+        with open(os.path.join(self.directory, MANIFEST_NAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+        logger.info(f"Wrote snapshot of {sum(self._rows.values())} rows to {self.directory}")
+        return manifest
+
+
+def record(chunks: Iterable[Tuple[str, pd.DataFrame]], directory: str,
+           **manifest_fields) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Pass chunks through unchanged while writing them into a snapshot.
+
+    The manifest is written once the stream is exhausted.
+    Args:
+        chunks (Iterable[Tuple[str, pd.DataFrame]]): Chunk stream, e.g. from data_generator.generate_chunks.
+        directory (str): Snapshot directory.
+        **manifest_fields: seed, scale and as_of for the manifest.
+    Yields:
+        Tuple[str, pd.DataFrame]: The input chunks.
+    """
+    writer = SnapshotWriter(directory, **manifest_fields)
+    for table, df in chunks:
+        writer.write(table, df)
+        yield table, df
+    writer.close()
+
+
+def iter_snapshot(directory: str, batch_rows: int = BATCH_ROWS) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Read a snapshot back as (table, DataFrame) chunks in manifest order.
+    Args:
+        directory (str): Snapshot directory.
+        batch_rows (int, optional): Rows per chunk. Defaults to BATCH_ROWS.
+    Yields:
+        Tuple[str, pd.DataFrame]: Table name and a chunk of its rows.
+    """
+    manifest = read_manifest(directory)
+    for table, entry in manifest["tables"].items():
+        parquet = pq.ParquetFile(os.path.join(directory, entry["file"]), memory_map=True)
+        for batch in parquet.iter_batches(batch_size=batch_rows):
+            yield table, batch.to_pandas()
+
+
+def read_table(directory: str, table: str) -> pd.DataFrame:
+    """Read one whole table of a snapshot, memory-mapping its Parquet file."""
+    entry = read_manifest(directory)["tables"][table]
+    return pq.read_table(os.path.join(directory, entry["file"]), memory_map=True).to_pandas()
@@ -1,9 +1,8 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import requests
 
-API_BASE = "http://api:8000/api"
+from http_client import client
 
 st.set_page_config(page_title="SmartCRM", layout="wide")
 st.markdown(
@@ -43,27 +42,39 @@ st.markdown("""
 
 @st.cache_data
 def load_data():
-    menu = pd.DataFrame(requests.get(f"{API_BASE}/dim_menu_items/").json())
-    tables = pd.DataFrame(requests.get(f"{API_BASE}/dim_tables/").json())
-    time_df = pd.DataFrame(requests.get(f"{API_BASE}/dim_time/").json())
-    trans_items = pd.DataFrame(requests.get(f"{API_BASE}/fact_transaction_items/").json())
-    trans = pd.DataFrame(requests.get(f"{API_BASE}/transactions/").json())
-    campaigns = pd.DataFrame(requests.get(f"{API_BASE}/campaigns/").json())
-    nfc = pd.DataFrame(requests.get(f"{API_BASE}/nfc_engagements/").json())
+    # Independent endpoints, fetched concurrently over pooled connections
+    data = client.get_many({
+        "menu": "/dim_menu_items/",
+        "campaigns": "/campaigns/",
+        "rfm_segments": "/rfm_segments/",
+        "menu_recs": "/menu_recommendations/",
+    })
+    menu = pd.DataFrame(data["menu"])
+    campaigns = pd.DataFrame(data["campaigns"])
 
-    rfm_segments = pd.DataFrame(requests.get(f"{API_BASE}/rfm_segments/").json())
-    menu_recs = pd.DataFrame(requests.get(f"{API_BASE}/menu_recommendations/").json())
+    rfm_segments = pd.DataFrame(data["rfm_segments"])
+    menu_recs = pd.DataFrame(data["menu_recs"])
 
-    return menu, tables, time_df, trans_items, trans, campaigns, nfc, rfm_segments, menu_recs
+    return menu, campaigns, rfm_segments, menu_recs
 
 
-menu, tables, time_df, trans_items, trans, campaigns, nfc, rfm_segments, menu_recs = load_data()
+@st.cache_data(ttl=300)
+def load_months():
+    return pd.DataFrame(client.get_json("/dashboard/months"))
 
 
+@st.cache_data(ttl=300)
+def load_month(year, month):
+    return client.get_json(f"/dashboard/month/{year}/{month}")
 
 
-trans = trans.merge(time_df, on="time_id", how="left")
-trans["month"] = pd.to_numeric(trans["month"], errors="coerce")
+@st.cache_data(ttl=300)
+def load_nfc_stats():
+    return pd.DataFrame(client.get_json("/dashboard/nfc_engagement")["stats"])
+
+
+menu, campaigns, rfm_segments, menu_recs = load_data()
+
 
 st.sidebar.markdown("## Navigation")
 
@@ -90,31 +101,29 @@ if section == "Dashboard":
         "July", "August", "September", "October", "November", "December"
     ], start=1)}
 
-    available_months = sorted(trans["month"].dropna().unique().astype(int))
-    month_names = [month_map[m] for m in available_months]
+    months = load_months()
+    if months.empty:
+        st.warning("No sales data available.")
+        st.stop()
+    month_labels = {f"{month_map[m]} {y}": (y, m) for y, m in zip(months["year"], months["month"])}
 
-    selected_name = st.selectbox("Select Month", month_names)
-    selected_month = next((k for k, v in month_map.items() if v == selected_name), None)
-    month_data = trans[trans["month"] == selected_month]
+    selected_name = st.selectbox("Select Month", list(month_labels))
+    selected_year, selected_month = month_labels[selected_name]
+    month_data = load_month(selected_year, selected_month)
+    kpis = month_data["kpis"]
+    month_items = pd.DataFrame(month_data["items"], columns=["item_id", "menu_item_name", "quantity", "total_sales", "avg_price"])
 
     st.markdown(f"<h3 style='font-family: Georgia, serif;'>Overview – {selected_name}</h3>", unsafe_allow_html=True)
 
-    total_sales = month_data["total_amount"].sum()
-    num_transactions = month_data["transaction_id"].nunique()
-    avg_check = month_data["total_amount"].mean()
-
-    top_items = trans_items.merge(menu[["item_id", "menu_item_name"]], on="item_id", how="left")
-    top_items = top_items.merge(trans[["transaction_id", "month"]], on="transaction_id")
-    top_items = top_items[top_items["month"] == selected_month]
-    top_items_grouped = top_items.groupby("menu_item_name")["quantity"].sum().sort_values(ascending=False).head(3)
+    top_items_grouped = month_items.groupby("menu_item_name")["quantity"].sum().sort_values(ascending=False).head(3)
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Sales", f"${total_sales:,.0f}")
+        st.metric("Total Sales", f"${kpis['total_sales']:,.0f}")
     with col2:
-        st.metric("Transactions", f"{num_transactions:,}")
+        st.metric("Transactions", f"{kpis['transactions']:,}")
     with col3:
-        st.metric("Avg Check", f"${avg_check:,.2f}")
+        st.metric("Avg Check", f"${kpis['avg_check']:,.2f}")
     with col4:
         st.markdown("**Top Menu Items:**")
         for item in top_items_grouped.index:
@@ -125,22 +134,17 @@ if section == "Dashboard":
     col5, col6 = st.columns(2)
 
     with col5:
-        daily_sales = month_data.groupby("date")["total_amount"].sum().reset_index()
+        daily_sales = pd.DataFrame(month_data["daily_sales"], columns=["date", "total_sales"])
         if not daily_sales.empty:
             chart = alt.Chart(daily_sales).mark_line().encode(
-                x='date:T', y='total_amount:Q'
+                x='date:T', y=alt.Y('total_sales:Q', title="total_amount")
             ).properties(title=f"{selected_name} – Sales Trend")
             st.altair_chart(chart, use_container_width=True)
         else:
             st.warning(f"No sales data for {selected_name}.")
 
     with col6:
-        nfc_filtered = nfc.copy()
-        nfc_filtered["engagement_date"] = pd.to_datetime(nfc_filtered["engagement_time"], errors="coerce")
-        nfc_filtered = nfc_filtered[nfc_filtered["engagement_date"].dt.month == selected_month]
-        nfc_filtered["engagement_hour"] = nfc_filtered["engagement_date"].dt.hour
-        engagement_by_hour = nfc_filtered["engagement_hour"].value_counts().sort_index().reset_index()
-        engagement_by_hour.columns = ["hour", "count"]
+        engagement_by_hour = pd.DataFrame(month_data["nfc_hourly"], columns=["hour", "count"])
         if not engagement_by_hour.empty:
             chart = alt.Chart(engagement_by_hour).mark_line().encode(
                 x='hour:O', y='count:Q'
@@ -151,24 +155,20 @@ if section == "Dashboard":
 
     st.markdown("<h3 style='font-family: Georgia, serif;'>Menu Performance & Monthly Sales</h3>",
                 unsafe_allow_html=True)
-    perf = trans_items.merge(menu[["item_id", "menu_item_name"]], on="item_id", how="left")
-    perf = perf.merge(trans[["transaction_id", "month"]], on="transaction_id", how="left")
-    perf = perf[perf["month"] == selected_month]
-    perf["total_price"] = perf["price"] * perf["quantity"]
-    menu_summary = perf.groupby("menu_item_name").agg(
-        Total_Sales=pd.NamedAgg(column="total_price", aggfunc="sum"),
-        Avg_Price=pd.NamedAgg(column="price", aggfunc="mean")
+    menu_summary = month_items.groupby("menu_item_name").agg(
+        Total_Sales=pd.NamedAgg(column="total_sales", aggfunc="sum"),
+        Avg_Price=pd.NamedAgg(column="avg_price", aggfunc="mean")
     ).sort_values("Total_Sales", ascending=False).reset_index()
 
-    monthly_sales = trans.groupby("month")["total_amount"].sum().reset_index()
+    monthly_sales = months.assign(period=months["year"].astype(str) + "-" + months["month"].astype(str).str.zfill(2))
 
     col7, col8 = st.columns([1.5, 1])
     with col7:
         st.dataframe(menu_summary.style.format({"Total_Sales": "${:,.0f}", "Avg_Price": "${:,.2f}"}))
     with col8:
         chart = alt.Chart(monthly_sales).mark_bar().encode(
-            x=alt.X('month:O', title="Month"),
-            y=alt.Y('total_amount:Q', title="Total Sales")
+            x=alt.X('period:O', title="Month"),
+            y=alt.Y('total_sales:Q', title="Total Sales")
         ).properties(title="Monthly Sales")
         st.altair_chart(chart, use_container_width=True)
 
@@ -178,15 +178,14 @@ if section == "Dashboard":
     with col9:
         if not daily_sales.empty:
             chart = alt.Chart(daily_sales).mark_line().encode(
-                x='date:T', y='total_amount:Q'
+                x='date:T', y=alt.Y('total_sales:Q', title="total_amount")
             ).properties(title=f"{selected_name} – Campaign Trend")
             st.altair_chart(chart, use_container_width=True)
         else:
             st.warning(f"No campaign data for {selected_name}.")
 
     with col10:
-        table_usage = month_data["table_id"].value_counts().reset_index()
-        table_usage.columns = ["table_id", "count"]
+        table_usage = pd.DataFrame(month_data["table_usage"], columns=["table_id", "count"])
         if not table_usage.empty:
             chart = alt.Chart(table_usage).mark_bar().encode(
                 x='table_id:N', y='count:Q'
@@ -196,9 +195,9 @@ if section == "Dashboard":
             st.warning("No table usage data.")
 
     st.markdown("<h3 style='font-family: Georgia, serif;'>NFC Engagement Breakdown</h3>", unsafe_allow_html=True)
-    if not nfc.empty:
-        tag_counts = nfc["tag_type"].value_counts().reset_index()
-        tag_counts.columns = ["tag_type", "count"]
+    tag_counts = load_nfc_stats()
+    if not tag_counts.empty:
+        tag_counts = tag_counts.rename(columns={"total_engagements": "count"})
         chart = alt.Chart(tag_counts).mark_bar().encode(
             x='tag_type:N', y='count:Q'
         ).properties(title="NFC Tag Engagement")
@@ -303,49 +302,26 @@ elif section == "Menu Recommendation":
     if menu_recs.empty or menu.empty:
         st.warning("No menu recommendations available.")
     else:
-        # Daytime display names
-        daytime_map = {
-            1: "🌅 Early Breakfast (04:00–06:29)",
-            2: "🍳 Standard Breakfast (06:30–10:29)",
-            3: "🥞 Late Breakfast / Brunch (10:30–12:29)",
-            4: "🥪 Lunch (12:30–14:29)",
-            5: "🫖 Late Lunch (14:30–16:29)",
-            6: "🍰 Afternoon Tea / Snack (16:30–17:59)",
-            7: "🍝 Early Dinner (18:00–19:29)",
-            8: "🥩 Standard Dinner (19:30–21:29)",
-            9: "🍣 Late Dinner / Supper (21:30–23:59)",
-            10: "🌙 Midnight Snack (00:00–01:59)",
-            11: "⛔ Closed / No Service (02:00–03:59)",
-        }
-        reverse_daytime_map = {v: k for k, v in daytime_map.items()}
-
-        # Let user pick a time slot (but default is nothing shown)
-        selected_slot = st.selectbox("Select Time Period", [""] + list(daytime_map.values()))
-
-        if selected_slot:
-            selected_id = reverse_daytime_map[selected_slot]
-            filtered_recs = (
-                menu_recs[menu_recs["daytime_id"] == selected_id]
-                .merge(menu[["item_id", "menu_item_name"]], left_on="menu_item_id", right_on="item_id", how="left")
-                .drop_duplicates(subset=["menu_item_id", "rank"])
-                .sort_values("rank")
-            )
-
-            if not filtered_recs.empty:
-                st.markdown(f"<h4 style='margin-top: 1em;'>Top Menu Items for {selected_slot}</h4>", unsafe_allow_html=True)
-                for _, row in filtered_recs.iterrows():
-                    st.markdown(
-                        f"""
-                        <div style="background-color:#f5f8ff; padding:10px; margin-bottom:10px; border-radius:8px; box-shadow:0 1px 2px rgba(0,0,0,0.05);">
-                            <strong>#{row['rank']}</strong> — {row['menu_item_name']}
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-            else:
-                st.info("No recommendations found for this time slot.")
+        # The API resolves any time of day to its daytime slot and ranked items in one lookup
+        picked = st.time_input("Time of Day", value="now", step=1800)
+        now = client.get_json("/recommendations/now", at=picked.strftime("%H:%M"))
+
+        if now["daytime_id"] is None:
+            st.info("No daytime slot covers this time.")
+        elif now["items"]:
+            slot = f"{now['daytime_label']} ({now['start_time'][:5]}–{now['end_time'][:5]})"
+            st.markdown(f"<h4 style='margin-top: 1em;'>Top Menu Items for {slot}</h4>", unsafe_allow_html=True)
+            for item in now["items"]:
+                st.markdown(
+                    f"""
+                    <div style="background-color:#f5f8ff; padding:10px; margin-bottom:10px; border-radius:8px; box-shadow:0 1px 2px rgba(0,0,0,0.05);">
+                        <strong>#{item['rank']}</strong> — {item['menu_item_name']}
+                    </div>
+                    """,
+                    unsafe_allow_html=True
+                )
         else:
-            st.markdown("<div style='color: #999;'>Please select a time slot to view recommendations.</div>", unsafe_allow_html=True)
+            st.info("No recommendations found for this time slot.")
     with st.expander("Top 10 Most-Recommended Items"):
         top_items = (
             menu_recs
@@ -0,0 +1,157 @@
+"""
+Shared HTTP client for calls to the SmartCRM API.
+
+One requests.Session keeps connections to the API alive, so calls reuse pooled TCP
+connections instead of opening one each. Every request has a timeout, and failed requests
+(connection errors, timeouts, 429 and 5xx responses) are retried with exponential backoff.
+GET, PUT and DELETE are retried by default; a POST is retried only when the caller marks it
+idempotent. `fetch_many` runs independent requests on a thread pool, and `post_many` uploads
+payloads with at most API_CONCURRENCY requests in flight.
+
+Configuration (environment):
+- API_BASE: Base URL of the API (default http://api:8000/api)
+- API_TIMEOUT: Seconds to wait for the server to answer or send more data (default 30)
+- API_RETRIES: Retries after the first attempt (default 3)
+- API_BACKOFF: Seconds before the first retry, doubled for each later one (default 0.5)
+- API_CONCURRENCY: Requests in flight in fetch_many and post_many (default 4)
+
+This module is shared by the ds and frontend services, which are built from separate
+contexts; CI (.github/workflows/checks.yaml) fails when the two copies differ.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE = os.getenv("API_BASE", "http://api:8000/api")
+TIMEOUT = float(os.getenv("API_TIMEOUT", "30"))
+CONNECT_TIMEOUT = 5.0
+RETRIES = int(os.getenv("API_RETRIES", "3"))
+BACKOFF = float(os.getenv("API_BACKOFF", "0.5"))
+CONCURRENCY = int(os.getenv("API_CONCURRENCY", "4"))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+class ApiClient:
+    """
+    Pooled, retrying client for one API base URL. Safe to share between threads.
+
+    Parameters:
+    - base_url: URL that request paths are appended to
+    - timeout: Read timeout in seconds
+    - retries: Retries after the first attempt
+    - backoff: Seconds before the first retry, doubled for each later one
+    - concurrency: Requests in flight in fetch_many and post_many
+    """
+
+    def __init__(self, base_url: str = API_BASE, timeout: float = TIMEOUT, retries: int = RETRIES,
+                 backoff: float = BACKOFF, concurrency: int = CONCURRENCY):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (CONNECT_TIMEOUT, timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.concurrency = concurrency
+        self.session = requests.Session()
+        # Enough pooled connections for every concurrent request to keep its own alive
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(concurrency, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path: str) -> str:
+        """Absolute URL for a path under the base URL (absolute URLs pass through)."""
+        return path if "://" in path else f"{self.base_url}/{path.lstrip('/')}"
+
+    def _delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2 ** attempt
+
+    def request(self, method: str, path: str, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying failures if it is idempotent.
+
+        Returns the final response whatever its status; call `raise_for_status()` to turn
+        errors into exceptions. Connection errors and timeouts are raised once retries run out.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        kwargs.setdefault("timeout", self.timeout)
+        retries = self.retries if idempotent else 0
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, self.url(path), **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= retries:
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                response.close()
+            time.sleep(self._delay(attempt, response))
+            attempt += 1
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, idempotent: bool = False, **kwargs) -> requests.Response:
+        return self.request("POST", path, idempotent=idempotent, **kwargs)
+
+    def put(self, path: str, **kwargs) -> requests.Response:
+        return self.request("PUT", path, **kwargs)
+
+    def get_json(self, path: str, **params) -> Any:
+        """GET a path and decode its JSON body, raising on error statuses."""
+        response = self.get(path, params=params or None)
+        response.raise_for_status()
+        return response.json()
+
+    def get_ndjson(self, path: str, **params) -> List[dict]:
+        """Stream an NDJSON endpoint (e.g. an export) into a list of records."""
+        with self.get(path, params=params or None, stream=True) as response:
+            response.raise_for_status()
+            return [json.loads(line) for line in response.iter_lines() if line]
+
+    def fetch_many(self, calls: Mapping[K, Callable[[], T]]) -> Dict[K, T]:
+        """
+        Run independent fetches concurrently.
+        Parameters:
+        - calls: Zero-argument callables by key, e.g. `lambda: client.get_json("/campaigns/")`
+        Returns:
+        - Results by the same keys; the first failure is re-raised
+        """
+        with ThreadPoolExecutor(max_workers=max(self.concurrency, 1)) as pool:
+            futures = {key: pool.submit(call) for key, call in calls.items()}
+            return {key: future.result() for key, future in futures.items()}
+
+    def get_many(self, paths: Mapping[K, str]) -> Dict[K, Any]:
+        """GET several JSON endpoints concurrently, returning decoded bodies by key."""
+        return self.fetch_many({key: (lambda path=path: self.get_json(path)) for key, path in paths.items()})
+
+    def post_many(self, path: str, payloads: Iterable[Any], idempotent: bool = False) -> List[requests.Response]:
+        """
+        POST each JSON payload to `path` with bounded concurrency.
+
+        Responses are returned in payload order and are not checked for errors.
+        """
+        with ThreadPoolExecutor(max_workers=max(self.concurrency, 1)) as pool:
+            return list(pool.map(lambda payload: self.post(path, idempotent=idempotent, json=payload), payloads))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+client = ApiClient()